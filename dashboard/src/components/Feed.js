@@ -46,10 +46,13 @@ class Feed extends React.Component {
 const FeedHeader = (props) => {
   const { feedData } = props;
   const { lastPostAt } = props;
+  const iconSrc = feedData.icon_hash
+    ? `${process.env.REACT_APP_RSS_API_URL}/icons/${feedData.icon_hash}`
+    : feedData.icon;
 
   return (
     <div className="feed-header">
-      <img src={feedData.icon} alt={feedData.name} />
+      <img src={iconSrc} alt={feedData.name} />
       <a href={feedData.url} target="_blank" rel="noopener noreferrer nofollow">
         {feedData.name}
       </a>
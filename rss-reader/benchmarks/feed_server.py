@@ -0,0 +1,328 @@
+"""
+Local server of synthetic RSS and Atom feeds.
+
+Each feed gets its own deterministic profile: the format, the number and
+size of entries, the response latency, whether it fails, and whether it
+supports ETag and gzip. Feeds are spread over loopback addresses
+127.0.0.2, 127.0.0.3, ... so the per-host limits of the fetcher apply the
+way they do to real feeds.
+
+Feeds get new entries when a new generation is published with
+`POST /_publish`, and `GET /_stats` reports served requests since the
+previous publish.
+
+Usage:
+    python -m benchmarks.feed_server [--feeds N] [--hosts N] [--port N]
+"""
+
+from typing import Dict, NamedTuple, Optional
+from datetime import datetime
+from datetime import timedelta
+import argparse
+import asyncio
+import collections
+import email.utils
+import gzip
+import hashlib
+import multiprocessing
+import random
+import time
+
+from aiohttp import web
+
+
+WORDS = (
+    "release python async database feed update security performance "
+    "celery worker postgres index query cache network rust kernel linux "
+    "browser privacy design review"
+).split()
+
+
+class ServerConfig(NamedTuple):
+    """Synthetic feeds configuration."""
+    feeds: int = 1000
+    hosts: int = 20
+    port: int = 8780
+    seed: int = 42
+    # A mean number of entries and a mean size of an entry summary.
+    entries: int = 20
+    entry_bytes: int = 500
+    # A mean response latency, latencies are distributed exponentially.
+    latency_ms: float = 50
+    # Fractions of feeds which fail, are in Atom, support ETag, and are
+    # served gzipped to clients which accept it.
+    error_rate: float = 0.02
+    atom_rate: float = 0.3
+    etag_rate: float = 0.5
+    gzip_rate: float = 0.7
+    # A fraction of feeds which get a new entry with each generation.
+    change_rate: float = 0.2
+
+
+class FeedProfile(NamedTuple):
+    """Synthetic feed profile."""
+    num: int
+    atom: bool
+    entries: int
+    entry_bytes: int
+    latency: float
+    error: Optional[int]
+    etag: bool
+    gzip: bool
+
+
+def feed_host(config: ServerConfig, num: int) -> str:
+    """Get a loopback address which serves feed."""
+    return f"127.0.0.{2 + num % config.hosts}"
+
+
+def feed_url(config: ServerConfig, num: int) -> str:
+    """Get feed URL."""
+    return f"http://{feed_host(config, num)}:{config.port}/feeds/{num}.xml"
+
+
+def feed_profile(config: ServerConfig, num: int) -> FeedProfile:
+    """Get deterministic feed profile."""
+    rng = random.Random(config.seed * 1_000_003 + num)
+    return FeedProfile(
+        num=num,
+        atom=rng.random() < config.atom_rate,
+        entries=max(1, int(rng.expovariate(1 / config.entries))),
+        entry_bytes=max(0, int(rng.expovariate(1 / config.entry_bytes))),
+        latency=config.latency_ms / 1000,
+        error=rng.choice([500, 404]) if rng.random() < config.error_rate
+        else None,
+        etag=rng.random() < config.etag_rate,
+        gzip=rng.random() < config.gzip_rate,
+    )
+
+
+def changes_count(config: ServerConfig, num: int, generation: int) -> int:
+    """Get a number of generations which brought feed a new entry."""
+    return sum(
+        random.Random(f"{config.seed}:{num}:{g}").random() < config.change_rate
+        for g in range(1, generation + 1)
+    )
+
+
+def render_feed(
+    profile: FeedProfile,
+    changes: int,
+    started_at: datetime,
+) -> bytes:
+    """Render feed with its latest entries.
+
+    Args:
+        profile (FeedProfile): A feed profile.
+        changes (int): A number of new entries published since the start.
+        started_at (datetime): A datetime of the server start.
+
+    Returns:
+        bytes: A feed body.
+    """
+    rng = random.Random(profile.num)
+    base = f"https://blog{profile.num}.example.com"
+    items = []
+    for index in range(changes + profile.entries, changes, -1):
+        title = " ".join(rng.choices(WORDS, k=6)).capitalize()
+        summary = ("lorem ipsum " * (profile.entry_bytes // 12 + 1))[
+            :profile.entry_bytes
+        ]
+        published_at = started_at + timedelta(minutes=index - profile.entries)
+        link = f"{base}/posts/{index}/"
+        if profile.atom:
+            items.append(
+                f"<entry><title>{title}</title>"
+                f'<link rel="alternate" href="{link}"/>'
+                f"<id>{link}</id>"
+                f"<published>{published_at:%Y-%m-%dT%H:%M:%SZ}</published>"
+                f"<updated>{published_at:%Y-%m-%dT%H:%M:%SZ}</updated>"
+                f"<summary>{summary}</summary></entry>"
+            )
+        else:
+            items.append(
+                f"<item><title>{title}</title><link>{link}</link>"
+                f"<guid>{link}</guid>"
+                "<pubDate>"
+                f"{email.utils.format_datetime(published_at)}"
+                "</pubDate>"
+                f"<description>{summary}</description></item>"
+            )
+
+    if profile.atom:
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>Blog {profile.num}</title>"
+            f'<link rel="alternate" href="{base}/"/>'
+            f"{''.join(items)}</feed>"
+        )
+    else:
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?><rss version="2.0">'
+            f"<channel><title>Blog {profile.num}</title><link>{base}/</link>"
+            f"{''.join(items)}</channel></rss>"
+        )
+    return body.encode()
+
+
+class FeedServer:
+    """Server of synthetic feeds."""
+
+    def __init__(self, config: ServerConfig):
+        self.config = config
+        self.started_at = datetime.utcnow().replace(microsecond=0)
+        self.generation = 0
+        self.profiles = [
+            feed_profile(config, num) for num in range(config.feeds)
+        ]
+        self._bodies: Dict[int, bytes] = {}
+        self._rng = random.Random(config.seed)
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        """Reset stats of served requests."""
+        self.statuses = collections.Counter()
+        self.wire_bytes = 0
+        self.requested_at: Dict[int, float] = {}
+
+    def body(self, num: int) -> bytes:
+        """Get feed body of the current generation."""
+        body = self._bodies.get(num)
+        if body is None:
+            body = render_feed(
+                self.profiles[num],
+                changes_count(self.config, num, self.generation),
+                self.started_at,
+            )
+            self._bodies[num] = body
+        return body
+
+    async def handle_feed(self, request: web.Request) -> web.Response:
+        """Serve feed."""
+        num = int(request.match_info["num"])
+        if not 0 <= num < self.config.feeds:
+            raise web.HTTPNotFound()
+        profile = self.profiles[num]
+        self.requested_at.setdefault(num, time.time())
+        if profile.latency:
+            await asyncio.sleep(self._rng.expovariate(1 / profile.latency))
+
+        if profile.error is not None:
+            return self._respond(web.Response(status=profile.error))
+
+        body = self.body(num)
+        headers = {"Content-Type": (
+            "application/atom+xml" if profile.atom else "application/rss+xml"
+        )}
+        if profile.etag:
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                return self._respond(web.Response(status=304, headers=headers))
+        if profile.gzip and "gzip" in request.headers.get(
+            "Accept-Encoding", "",
+        ):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return self._respond(web.Response(body=body, headers=headers))
+
+    def _respond(self, response: web.Response) -> web.Response:
+        """Record response stats."""
+        self.statuses[response.status] += 1
+        self.wire_bytes += len(response.body or b"")
+        return response
+
+    async def handle_publish(self, request: web.Request) -> web.Response:
+        """Publish the next generation of feeds and reset stats."""
+        self.generation += 1
+        self._bodies.clear()
+        self._reset_stats()
+        return web.json_response({"generation": self.generation})
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """Report stats of served requests."""
+        return web.json_response({
+            "generation": self.generation,
+            "statuses": {str(k): v for k, v in self.statuses.items()},
+            "wire_bytes": self.wire_bytes,
+            "requested_at": self.requested_at,
+        })
+
+    def app(self) -> web.Application:
+        """Get web application."""
+        web_app = web.Application()
+        web_app.router.add_get("/feeds/{num:\\d+}.xml", self.handle_feed)
+        web_app.router.add_post("/_publish", self.handle_publish)
+        web_app.router.add_get("/_stats", self.handle_stats)
+        return web_app
+
+    async def serve(self, ready: Optional[multiprocessing.Event] = None):
+        """Serve feeds on all hosts until cancelled."""
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        for num in range(max(min(self.config.feeds, self.config.hosts), 1)):
+            host = feed_host(self.config, num)
+            await web.TCPSite(runner, host, self.config.port).start()
+        if ready is not None:
+            ready.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+
+def _serve(config: ServerConfig, ready: multiprocessing.Event) -> None:
+    """Run server in a process."""
+    asyncio.run(FeedServer(config).serve(ready))
+
+
+def start(config: ServerConfig) -> multiprocessing.Process:
+    """Start server in a separate process.
+
+    Args:
+        config (ServerConfig): A server configuration.
+
+    Returns:
+        multiprocessing.Process: A server process.
+
+    Raises:
+        RuntimeError: if server has not started.
+    """
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=_serve, args=(config, ready), daemon=True,
+    )
+    process.start()
+    if not ready.wait(30):
+        process.terminate()
+        raise RuntimeError("Feed server has not started")
+    return process
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add server configuration arguments to parser."""
+    for name, default in ServerConfig._field_defaults.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", type=type(default), default=default,
+        )
+
+
+def config_from_args(args: argparse.Namespace) -> ServerConfig:
+    """Get server configuration from parsed arguments."""
+    return ServerConfig(**{
+        name: getattr(args, name) for name in ServerConfig._fields
+    })
+
+
+def main() -> None:
+    """Run server."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_arguments(parser)
+    config = config_from_args(parser.parse_args())
+    print(f"Serving {config.feeds} feeds, e.g. {feed_url(config, 0)}")
+    asyncio.run(FeedServer(config).serve())
+
+
+if __name__ == "__main__":
+    main()
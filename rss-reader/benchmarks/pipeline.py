@@ -0,0 +1,254 @@
+"""
+End-to-end benchmark of feeds ingestion.
+
+A local server of synthetic feeds is started, feeds pointing at it are
+created in the DB configured by RSS_DB_URI, and the real pipeline, i.e.
+`load_feeds_updates`, the fetch and parse tasks, and the save tasks, is
+driven by an embedded worker with an in-memory broker. Chords and metrics
+use the results backend configured by RSS_TASKS_RES_BACKEND_URI, so Redis
+is required too.
+
+Each run makes all feeds due, runs the pipeline until all of them are
+saved, and reports throughput, per-feed latency from the request to the
+save, DB queries, DNS cache hits, and worker memory. Runs after the first
+one publish a new generation of feeds first, so only some feeds change and
+the rest answer 304 or are skipped by the content hash. Created feeds are
+deleted afterwards.
+
+Fetches are limited per host as usual, so the throughput is bounded by
+RSS_HOST_RATE times the number of hosts, see `--hosts`. The persistence
+mode and other settings are taken from the environment too, e.g.
+RSS_PERSIST_MODE=stream.
+
+Usage:
+    python -m benchmarks.pipeline [--feeds N] [--hosts N] [--runs N]
+        [--latency-ms N] [--error-rate F] [--etag-rate F] [--gzip-rate F]
+"""
+
+from typing import Dict, List
+import argparse
+import collections
+import functools
+import json
+import logging
+import resource
+import statistics
+import time
+import urllib.request
+
+from celery.contrib.testing import worker as celery_worker
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from benchmarks import feed_server
+from rss_reader import models
+from rss_reader.config import settings
+from rss_reader.db import session
+from rss_reader.fetcher import dns
+from rss_reader.workers import tasks
+from rss_reader.workers.app import QUEUES
+from rss_reader.workers.app import app
+from rss_reader.workers.tasks import process_feeds
+
+
+FEED_NAME_PREFIX = "Benchmark"
+
+
+def create_feeds(
+    db: sa.orm.Session,
+    config: feed_server.ServerConfig,
+) -> Dict[int, int]:
+    """Create feeds of the synthetic feeds server in DB.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        config (ServerConfig): A server configuration.
+
+    Returns:
+        Dict[int, int]: Feed numbers on the server by feed IDs.
+    """
+    result = db.execute(
+        sa.insert(models.RssFeed).returning(models.RssFeed.id),
+        [
+            {
+                "name": f"{FEED_NAME_PREFIX} {num}",
+                "url": f"https://blog{num}.example.com",
+                "rss": feed_server.feed_url(config, num),
+            }
+            for num in range(config.feeds)
+        ],
+    )
+    ids = [row.id for row in result]
+    db.commit()
+    return dict(zip(ids, range(config.feeds)))
+
+
+def make_due(db: sa.orm.Session, ids: List[int]) -> None:
+    """Make feeds due to be fetched.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        ids (List[int]): Feed IDs.
+    """
+    db.execute(
+        sa.update(models.RssFeed)
+        .where(models.RssFeed.id.in_(ids))
+        .values(
+            next_fetch_at=None,
+            backoff_until=None,
+            failures_count=0,
+            disabled_at=None,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+
+def pending_count(db: sa.orm.Session, ids: List[int]) -> int:
+    """Get a number of feeds which are not saved yet.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        ids (List[int]): Feed IDs.
+
+    Returns:
+        int: A number of feeds.
+    """
+    count = db.query(models.RssFeed).filter(
+        models.RssFeed.id.in_(ids),
+        models.RssFeed.next_fetch_at.is_(None),
+    ).count()
+    db.rollback()
+    return count
+
+
+def server_call(config: feed_server.ServerConfig, method: str, path: str):
+    """Call the service endpoint of the feeds server."""
+    url = f"http://{feed_server.feed_host(config, 0)}:{config.port}{path}"
+    request = urllib.request.Request(url, method=method)
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.load(response)
+
+
+def percentile(values: List[float], q: int) -> float:
+    """Get percentile of values."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def max_rss_mb() -> float:
+    """Get peak resident memory of the process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    feed_server.add_arguments(parser)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--log-level", default="CRITICAL")
+    args = parser.parse_args()
+    config = feed_server.config_from_args(args)
+
+    # Synthetic failures are logged by tasks, which would clutter the report.
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("rss_reader"):
+            logging.getLogger(name).setLevel(args.log_level)
+
+    server = feed_server.start(config)
+
+    queries = collections.Counter()
+
+    def count_query(conn, cursor, statement, parameters, context, many):
+        queries[statement.split(None, 1)[0].upper()] += 1
+
+    saved_at: Dict[int, float] = {}
+    save_feeds = process_feeds._save_feeds
+
+    @functools.wraps(save_feeds)
+    def timed_save_feeds(db, feeds):
+        saved = save_feeds(db, feeds)
+        now = time.time()
+        saved_at.update((f.id, now) for f in saved)
+        return saved
+
+    process_feeds._save_feeds = timed_save_feeds
+    app.conf.update(broker_url="memory://", broker_transport_options={})
+
+    # The harness uses its own connections, so its queries are not counted.
+    db = sa.orm.Session(sa.create_engine(settings.RSS_DB_URI))
+    nums = create_feeds(db, config)
+    ids = list(nums)
+    try:
+        with celery_worker.start_worker(
+            app,
+            perform_ping_check=False,
+            queues=[app.conf.task_default_queue, *QUEUES],
+        ):
+            for run in range(args.runs):
+                if run:
+                    server_call(config, "POST", "/_publish")
+                make_due(db, ids)
+                posts_before = db.query(models.Post).filter(
+                    models.Post.rss_feed_id.in_(ids),
+                ).count()
+                saved_at.clear()
+                queries.clear()
+                dns_before = dns.stats()
+
+                sa.event.listen(
+                    session.engine, "before_cursor_execute", count_query,
+                )
+                started = time.time()
+                tasks.load_feeds_updates.delay()
+                while pending_count(db, ids):
+                    if time.time() - started > args.timeout:
+                        raise TimeoutError("Feeds are not saved in time")
+                    time.sleep(0.2)
+                elapsed = time.time() - started
+                sa.event.remove(
+                    session.engine, "before_cursor_execute", count_query,
+                )
+
+                stats = server_call(config, "GET", "/_stats")
+                requested_at = {
+                    int(num): at for num, at in stats["requested_at"].items()
+                }
+                latencies = [
+                    (at - requested_at[nums[feed_id]]) * 1000
+                    for feed_id, at in saved_at.items()
+                    if nums.get(feed_id) in requested_at
+                ]
+                posts = db.query(models.Post).filter(
+                    models.Post.rss_feed_id.in_(ids),
+                ).count() - posts_before
+                db.rollback()
+                dns_stats = dns.stats()
+
+                print(
+                    f"run {run + 1}: {len(ids)} feeds in {elapsed:.2f} s, "
+                    f"{len(ids) / elapsed:.1f} feeds/s, {posts} posts\n"
+                    f"  latency: p50 {percentile(latencies, 50):.0f} ms, "
+                    f"p99 {percentile(latencies, 99):.0f} ms\n"
+                    f"  responses: {stats['statuses']}, "
+                    f"{stats['wire_bytes'] / 1024 / 1024:.1f} MB\n"
+                    f"  queries: {sum(queries.values())} {dict(queries)}\n"
+                    f"  DNS cache: {dns_stats['hits'] - dns_before['hits']} "
+                    f"hits, {dns_stats['misses'] - dns_before['misses']} "
+                    f"misses\n"
+                    f"  max RSS: {max_rss_mb():.0f} MB"
+                )
+    finally:
+        process_feeds._save_feeds = save_feeds
+        db.rollback()
+        db.execute(
+            sa.delete(models.RssFeed).where(models.RssFeed.id.in_(ids))
+        )
+        db.commit()
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Offline replay of archived fetches.
+
+Fetches archived by the fetcher, see RSS_FETCH_ARCHIVE_DIR, are read into
+memory and fed through `parse_feed_batch` and `save_feeds_updates` with the
+fetcher replaced by the archive, so parsing and saving run at full speed on
+a fixed corpus without any network. Fetches are replayed in the archived
+order, in batches of distinct feeds, so later fetches of a feed see the
+state saved from the earlier ones, as they would in the workers.
+
+Feeds of the archived URLs are created in the DB configured by RSS_DB_URI
+and deleted afterwards. With --parse-only nothing is saved and no DB is
+needed. Feeds are parsed by the parse pool of --processes processes, none
+by default, so the profile covers parsing too.
+
+Usage:
+    python -m benchmarks.replay ARCHIVE [ARCHIVE ...] [--batch-size N]
+        [--processes N] [--parse-only] [--profile FILE] [--top N]
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import asyncio
+import cProfile
+import logging
+import pstats
+import time
+import urllib.parse
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.config import settings
+from rss_reader.db import session
+from rss_reader.fetcher import archive
+from rss_reader.fetcher import client
+from rss_reader.workers import tasks
+from rss_reader.workers.tasks import process_feeds
+from rss_reader.workers.tasks import utils as task_utils
+
+
+FEED_NAME_PREFIX = "Replay"
+
+
+def batches(
+    fetches: Iterable[archive.ArchivedFetch],
+    size: int,
+) -> List[List[archive.ArchivedFetch]]:
+    """Split fetches into batches of distinct feeds.
+
+    Args:
+        fetches (Iterable[ArchivedFetch]): Archived fetches.
+        size (int): A maximum number of fetches in a batch.
+
+    Returns:
+        List[List[ArchivedFetch]]: Batches in the archived order.
+    """
+    result = [[]]
+    for fetch in fetches:
+        batch = result[-1]
+        if len(batch) >= size or any(
+            f.request.url == fetch.request.url for f in batch
+        ):
+            batch = []
+            result.append(batch)
+        batch.append(fetch)
+    return [batch for batch in result if batch]
+
+
+def create_feeds(db: sa.orm.Session, urls: List[str]) -> Dict[str, int]:
+    """Create feeds of archived URLs in DB.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        urls (List[str]): Feed URLs.
+
+    Returns:
+        Dict[str, int]: Feed IDs by URLs.
+    """
+    result = db.execute(
+        sa.insert(models.RssFeed).returning(models.RssFeed.id),
+        [
+            {
+                "name": f"{FEED_NAME_PREFIX} {num}",
+                "url": "{0.scheme}://{0.netloc}".format(
+                    urllib.parse.urlsplit(url)
+                ),
+                "rss": url,
+            }
+            for num, url in enumerate(urls)
+        ],
+    )
+    ids = [row.id for row in result]
+    db.commit()
+    return dict(zip(urls, ids))
+
+
+def load_jobs(
+    db: Optional[sa.orm.Session],
+    ids: Dict[str, int],
+    batch: List[archive.ArchivedFetch],
+) -> List[task_utils.FeedJob]:
+    """Build feed jobs of a batch from the saved state of its feeds.
+
+    Args:
+        db (Optional[sa.orm.Session]): A DB session, or None if feeds are
+            not saved.
+        ids (Dict[str, int]): Feed IDs by URLs.
+        batch (List[ArchivedFetch]): Archived fetches.
+
+    Returns:
+        List[FeedJob]: Feed jobs in the order of fetches.
+    """
+    if db is None:
+        return [
+            task_utils.FeedJob(
+                id=ids[f.request.url],
+                url=f.request.url,
+                prev_parsed_at=None,
+                modified_at=None,
+                etag=None,
+            )
+            for f in batch
+        ]
+    feed_objs = {
+        feed_obj.id: feed_obj
+        for feed_obj in db.query(models.RssFeed).filter(
+            models.RssFeed.id.in_([ids[f.request.url] for f in batch]),
+        )
+    }
+    jobs = [
+        process_feeds._feed_job(feed_objs[ids[f.request.url]]) for f in batch
+    ]
+    db.rollback()
+    return jobs
+
+
+def replay_fetch_all(batch: List[archive.ArchivedFetch]):
+    """Get a replacement of `fetch_all` which serves the archived batch.
+
+    Args:
+        batch (List[ArchivedFetch]): Archived fetches.
+
+    Returns:
+        Callable: A function which serves fetch results like `fetch_all`.
+    """
+    results = {f.request.url: f.result for f in batch}
+
+    def fetch_all(
+        requests: Iterable[client.FetchRequest],
+        *,
+        concurrency: Optional[int] = None,
+        on_result: Optional[client.ResultCallback] = None,
+        on_fetched: Optional[client.FetchCallback] = None,
+    ) -> List[client.FetchResult]:
+        fetched = [results[r.url] for r in requests]
+
+        async def report(index: int, result: client.FetchResult) -> None:
+            reported = on_result(index, result)
+            if reported is not None:
+                await reported
+
+        async def run() -> None:
+            await asyncio.gather(
+                *(report(i, r) for i, r in enumerate(fetched))
+            )
+
+        if on_result is not None:
+            asyncio.run(run())
+        return fetched
+
+    return fetch_all
+
+
+def replay(
+    db: Optional[sa.orm.Session],
+    ids: Dict[str, int],
+    fetches: List[archive.ArchivedFetch],
+    batch_size: int,
+    profiler: Optional[cProfile.Profile] = None,
+) -> Tuple[float, float, int]:
+    """Replay fetches through parse and save tasks.
+
+    Args:
+        db (Optional[sa.orm.Session]): A DB session, or None if feeds are
+            not saved.
+        ids (Dict[str, int]): Feed IDs by URLs.
+        fetches (List[ArchivedFetch]): Archived fetches.
+        batch_size (int): A maximum number of fetches in a batch.
+        profiler (Optional[cProfile.Profile]): A profiler of parse and save.
+
+    Returns:
+        Tuple[float, float, int]: Parse and save durations in seconds, and
+            a number of new posts.
+    """
+    fetch_all = process_feeds.fetcher.fetch_all
+    parse_time = save_time = 0.0
+    posts = 0
+    try:
+        for batch in batches(fetches, batch_size):
+            jobs = load_jobs(db, ids, batch)
+            process_feeds.fetcher.fetch_all = replay_fetch_all(batch)
+            if profiler is not None:
+                profiler.enable()
+            started = time.perf_counter()
+            feeds = tasks.parse_feed_batch(jobs)
+            parsed = time.perf_counter()
+            if db is not None:
+                tasks.save_feeds_updates(feeds)
+            saved = time.perf_counter()
+            if profiler is not None:
+                profiler.disable()
+            parse_time += parsed - started
+            save_time += saved - parsed
+            posts += sum(len(f.posts) for f in feeds)
+    finally:
+        process_feeds.fetcher.fetch_all = fetch_all
+    return parse_time, save_time, posts
+
+
+def main() -> None:
+    """Run replay."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("archives", nargs="+", metavar="ARCHIVE")
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.RSS_FETCH_BATCH_SIZE,
+    )
+    parser.add_argument("--processes", type=int, default=0)
+    parser.add_argument("--parse-only", action="store_true")
+    parser.add_argument("--profile", metavar="FILE")
+    parser.add_argument("--top", type=int, default=30)
+    parser.add_argument("--log-level", default="CRITICAL")
+    args = parser.parse_args()
+
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("rss_reader"):
+            logging.getLogger(name).setLevel(args.log_level)
+    settings.RSS_PARSE_PROCESSES = args.processes
+
+    fetches = [f for path in args.archives for f in archive.read(path)]
+    urls = list(dict.fromkeys(f.request.url for f in fetches))
+    print(
+        f"{len(fetches)} fetches of {len(urls)} feeds, "
+        f"{sum(f.result.body_size for f in fetches) / 2 ** 20:.1f} MiB, "
+        f"{sum(f.elapsed for f in fetches):.1f} s fetching originally"
+    )
+
+    db = None if args.parse_only else session.SessionLocal()
+    if db is None:
+        ids = {url: num for num, url in enumerate(urls)}
+    else:
+        ids = create_feeds(db, urls)
+
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        parse_time, save_time, posts = replay(
+            db, ids, fetches, args.batch_size, profiler,
+        )
+    finally:
+        if db is not None:
+            db.rollback()
+            db.execute(sa.delete(models.RssFeed).where(
+                models.RssFeed.id.in_(list(ids.values())),
+            ))
+            db.commit()
+
+    print(
+        f"parsed in {parse_time:.2f} s "
+        f"({len(fetches) / (parse_time or 1):.0f} fetches/s), "
+        f"{posts} posts to save"
+    )
+    if db is not None:
+        print(f"saved in {save_time:.2f} s")
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark of saving parsed feeds in DB.
+
+Feeds are created in the DB configured by RSS_DB_URI, then a batch of
+parsed feeds is saved the same way the save tasks do, and the number of
+queries and the time are reported. Created feeds are deleted afterwards.
+
+Usage:
+    python -m benchmarks.save_feeds [--feeds N]
+"""
+
+from datetime import datetime
+from datetime import timedelta
+import argparse
+import random
+import time
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.db import session
+from rss_reader.workers.tasks import process_feeds
+from rss_reader.workers.tasks import utils as task_utils
+
+
+def create_feeds(db: sa.orm.Session, count: int) -> list:
+    """Create feeds in DB.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        count (int): A number of feeds.
+
+    Returns:
+        list: Feed IDs.
+    """
+    now = datetime.utcnow()
+    result = db.execute(
+        sa.insert(models.RssFeed).returning(models.RssFeed.id),
+        [
+            {
+                "name": f"Benchmark {i}",
+                "url": f"https://blog{i}.example.com",
+                "rss": f"https://blog{i}.example.com/feed.xml",
+                "created_at": now,
+                "posts_last_week": 0,
+                "unchanged_rate": 0,
+                "failures_count": 0,
+            }
+            for i in range(count)
+        ],
+    )
+    ids = [row.id for row in result]
+    db.commit()
+    return ids
+
+
+def parsed_feeds(ids: list, seed: int = 42) -> list:
+    """Generate parsed feeds.
+
+    About a third of feeds bring new posts and a few percent fail.
+
+    Args:
+        ids (list): Feed IDs.
+        seed (int): A random seed.
+
+    Returns:
+        list: Feed stubs.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    feeds = []
+    for feed_id in ids:
+        posts = []
+        if rng.random() < .3:
+            for num in range(rng.choice([1, 2, 5, 20])):
+                url = f"https://blog{feed_id}.example.com/post-{num}"
+                posts.append(task_utils.PostStub(
+                    title=f"Post {num}",
+                    url=url,
+                    published_at=now - timedelta(hours=rng.randint(0, 100)),
+                    feed_id=feed_id,
+                    uid=task_utils.post_uid(None, url),
+                ))
+        feeds.append(task_utils.FeedStub(
+            id=feed_id,
+            url=f"https://blog{feed_id}.example.com/feed.xml",
+            parsed_at=now,
+            modified=now,
+            etag=f'"{rng.getrandbits(32):x}"',
+            posts=tuple(posts),
+            content_hash=f"{rng.getrandbits(128):032x}",
+            wire_size=1000,
+            body_size=5000,
+            error="HttpError: HTTP 500" if rng.random() < .05 else None,
+        ))
+    return feeds
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--feeds", type=int, default=10_000)
+    args = parser.parse_args()
+
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, many):
+        queries.append(statement)
+
+    db = session.SessionLocal()
+    ids = create_feeds(db, args.feeds)
+    feeds = parsed_feeds(ids)
+    try:
+        sa.event.listen(session.engine, "before_cursor_execute", count_query)
+        started = time.perf_counter()
+        saved = process_feeds._save_feeds(db, feeds)
+        elapsed = time.perf_counter() - started
+        sa.event.remove(session.engine, "before_cursor_execute", count_query)
+
+        print(
+            f"{len(feeds)} feeds, {sum(len(f.posts) for f in saved)} posts "
+            f"saved with {len(queries)} queries in {elapsed:.2f} s"
+        )
+    finally:
+        db.rollback()
+        db.execute(
+            sa.delete(models.RssFeed).where(models.RssFeed.id.in_(ids))
+        )
+        db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark of the tasks serializer against pickle.
+
+Feed batches are generated to look like real ones: most feeds bring nothing
+new, and the rest bring a few posts with realistic titles and URLs.
+
+Usage:
+    python -m benchmarks.serialization [--feeds N] [--repeat N]
+"""
+
+from datetime import datetime
+from datetime import timedelta
+import argparse
+import pickle
+import random
+import timeit
+
+from rss_reader.workers import serialization
+from rss_reader.workers.tasks import utils as task_utils
+
+
+WORDS = (
+    "release python async database feed update security performance "
+    "celery worker postgres index query cache network rust kernel linux "
+    "browser privacy design review"
+).split()
+
+
+def _post(rng: random.Random, feed_id: int, now: datetime):
+    """Generate post stub."""
+    title = " ".join(rng.choices(WORDS, k=rng.randint(4, 12))).capitalize()
+    slug = "-".join(title.lower().split()[:6])
+    url = f"https://blog{feed_id}.example.com/{now:%Y/%m}/{slug}/"
+    return task_utils.PostStub(
+        title=title,
+        url=url,
+        published_at=now - timedelta(minutes=rng.randint(0, 7 * 24 * 60)),
+        feed_id=feed_id,
+        uid=task_utils.post_uid(None, url),
+    )
+
+
+def generate_batch(feeds: int, seed: int = 42) -> list:
+    """Generate a batch of parsed feeds.
+
+    Args:
+        feeds (int): A number of feeds.
+        seed (int): A random seed.
+
+    Returns:
+        list: Feed stubs.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    batch = []
+    for feed_id in range(1, feeds + 1):
+        # About a third of fetches bring new posts.
+        posts_count = (
+            rng.choice([0, 0, 1, 2, 5, 20]) if rng.random() < .3 else 0
+        )
+        batch.append(task_utils.FeedStub(
+            id=feed_id,
+            url=f"https://blog{feed_id}.example.com/feed.xml",
+            parsed_at=now,
+            modified=now - timedelta(hours=rng.randint(1, 48)),
+            etag=f'W/"{rng.getrandbits(64):x}"',
+            posts=tuple(
+                _post(rng, feed_id, now) for _ in range(posts_count)
+            ),
+            content_hash=f"{rng.getrandbits(128):032x}",
+            wire_size=rng.randint(2_000, 200_000),
+            body_size=rng.randint(10_000, 1_000_000),
+        ))
+    return batch
+
+
+def bench(name: str, dumps, loads, payload, repeat: int) -> None:
+    """Benchmark serializer and print results."""
+    data = dumps(payload)
+    assert loads(data) == payload, f"{name} round trip failed"
+    dump_time = min(timeit.repeat(lambda: dumps(payload), number=1,
+                                  repeat=repeat))
+    load_time = min(timeit.repeat(lambda: loads(data), number=1,
+                                  repeat=repeat))
+    print(
+        f"{name:10} size {len(data):>10,} B  "
+        f"dumps {dump_time * 1000:8.2f} ms  loads {load_time * 1000:8.2f} ms"
+    )
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--feeds", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # The chord callback gets a list of batch results.
+    batch = generate_batch(args.feeds)
+    payload = [batch[i:i + 50] for i in range(0, len(batch), 50)]
+    posts = sum(len(f.posts) for f in batch)
+    print(f"{args.feeds} feeds, {posts} posts")
+
+    bench("pickle", pickle.dumps, pickle.loads, payload, args.repeat)
+    bench(serialization.NAME, serialization.dumps, serialization.loads,
+          payload, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Add post count buckets and rolling post counters
+
+Revision ID: 3b9d6a2f7e41
+Revises: 7c3e5f92d1b8
+Create Date: 2026-10-18 17:24:05.318042
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3b9d6a2f7e41"
+down_revision = "7c3e5f92d1b8"
+branch_labels = None
+depends_on = None
+
+
+t_name = "post_count_buckets"
+feeds_t_name = "rss_feeds"
+index_name = "ix_post_count_buckets_rss_feed_id_bucket"
+
+
+def upgrade():
+    op.create_table(
+        t_name,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column(
+            "rss_feed_id",
+            sa.Integer,
+            sa.ForeignKey(f"{feeds_t_name}.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("bucket", sa.DateTime, nullable=False),
+        sa.Column("count", sa.Integer, nullable=False),
+    )
+    op.create_index(
+        index_name=index_name,
+        table_name=t_name,
+        columns=["rss_feed_id", "bucket"],
+        unique=True,
+    )
+    op.create_index(
+        index_name=op.f(f"ix_{t_name}_bucket"),
+        table_name=t_name,
+        columns=["bucket"],
+    )
+    op.add_column(
+        feeds_t_name, sa.Column("posts_last_day", sa.Integer, nullable=False,
+                                server_default="0"))
+    op.add_column(
+        feeds_t_name, sa.Column("posts_last_month", sa.Integer,
+                                nullable=False, server_default="0"))
+
+    # Count posts of the last 30 days in buckets, then counters from them.
+    op.execute(
+        f"INSERT INTO {t_name} (rss_feed_id, bucket, count) "
+        "SELECT rss_feed_id, date_trunc('hour', published_at), count(*) "
+        "FROM posts "
+        "WHERE published_at >= date_trunc('hour', "
+        "timezone('UTC', now()) - interval '30 days') "
+        "GROUP BY 1, 2"
+    )
+    op.execute(
+        f"UPDATE {feeds_t_name} SET "
+        "posts_last_day = counters.posts_last_day, "
+        "posts_last_week = counters.posts_last_week, "
+        "posts_last_month = counters.posts_last_month "
+        "FROM ("
+        "SELECT rss_feed_id, "
+        "coalesce(sum(count) FILTER (WHERE bucket >= date_trunc('hour', "
+        "timezone('UTC', now()) - interval '1 day')), 0) AS posts_last_day, "
+        "coalesce(sum(count) FILTER (WHERE bucket >= date_trunc('hour', "
+        "timezone('UTC', now()) - interval '7 days')), 0) "
+        "AS posts_last_week, "
+        "sum(count) AS posts_last_month "
+        f"FROM {t_name} GROUP BY rss_feed_id"
+        ") AS counters "
+        f"WHERE {feeds_t_name}.id = counters.rss_feed_id"
+    )
+
+
+def downgrade():
+    op.drop_column(feeds_t_name, "posts_last_month")
+    op.drop_column(feeds_t_name, "posts_last_day")
+    op.drop_index(op.f(f"ix_{t_name}_bucket"), table_name=t_name)
+    op.drop_index(index_name, table_name=t_name)
+    op.drop_table(t_name)
@@ -0,0 +1,39 @@
+"""Add next_fetch_at and unchanged_rate to rss_feeds
+
+Revision ID: 3f1c9a7b2e4d
+Revises: cca62cbe5aad
+Create Date: 2026-10-18 09:12:40.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f1c9a7b2e4d"
+down_revision = "cca62cbe5aad"
+branch_labels = None
+depends_on = None
+
+
+t_name = "rss_feeds"
+
+
+def upgrade():
+    op.add_column(
+        t_name, sa.Column("next_fetch_at", sa.DateTime, nullable=True))
+    op.add_column(
+        t_name, sa.Column("unchanged_rate", sa.Float, nullable=False,
+                          server_default="0"))
+
+    op.create_index(
+        index_name=op.f("ix_rss_feeds_next_fetch_at"),
+        table_name=t_name,
+        columns=["next_fetch_at"],
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_rss_feeds_next_fetch_at"), table_name=t_name)
+    op.drop_column(t_name, "unchanged_rate")
+    op.drop_column(t_name, "next_fetch_at")
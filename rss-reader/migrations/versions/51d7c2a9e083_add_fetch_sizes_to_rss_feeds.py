@@ -0,0 +1,29 @@
+"""Add wire_size and body_size to rss_feeds
+
+Revision ID: 51d7c2a9e083
+Revises: 8b0e6d1f4a27
+Create Date: 2026-10-18 11:26:02.733190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "51d7c2a9e083"
+down_revision = "8b0e6d1f4a27"
+branch_labels = None
+depends_on = None
+
+
+t_name = "rss_feeds"
+
+
+def upgrade():
+    op.add_column(t_name, sa.Column("wire_size", sa.Integer, nullable=True))
+    op.add_column(t_name, sa.Column("body_size", sa.Integer, nullable=True))
+
+
+def downgrade():
+    op.drop_column(t_name, "body_size")
+    op.drop_column(t_name, "wire_size")
@@ -0,0 +1,45 @@
+"""Create icons table
+
+Revision ID: 5e8b1d4c9a62
+Revises: 9a4c2e7d5f13
+Create Date: 2026-10-18 19:12:37.204516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e8b1d4c9a62"
+down_revision = "9a4c2e7d5f13"
+branch_labels = None
+depends_on = None
+
+
+t_name = "icons"
+feeds_t_name = "rss_feeds"
+
+
+def upgrade():
+    op.create_table(
+        t_name,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("hash", sa.String(64), nullable=False, unique=True),
+        sa.Column("content_type", sa.String(64), nullable=False),
+        sa.Column("data", sa.LargeBinary, nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+    )
+    op.add_column(
+        feeds_t_name,
+        sa.Column(
+            "icon_hash",
+            sa.String(64),
+            sa.ForeignKey(f"{t_name}.hash", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column(feeds_t_name, "icon_hash")
+    op.drop_table(t_name)
@@ -0,0 +1,109 @@
+"""Add uid to posts
+
+Revision ID: 7c3e5f92d1b8
+Revises: e4a81f0c6b95
+Create Date: 2026-10-18 13:02:17.664210
+
+"""
+import hashlib
+import urllib.parse
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7c3e5f92d1b8"
+down_revision = "e4a81f0c6b95"
+branch_labels = None
+depends_on = None
+
+
+t_name = "posts"
+index_name = "ix_posts_rss_feed_id_uid"
+batch_size = 1000
+
+
+def _canonical_url(url: str) -> str:
+    """Canonicalize post URL, as `task_utils.canonical_url` does."""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = {"http": ":80", "https": ":443"}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    query = urllib.parse.urlencode([
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(
+            parts.query, keep_blank_values=True,
+        )
+        if not key.startswith("utm_")
+    ])
+    return urllib.parse.urlunsplit(
+        (scheme, netloc, parts.path or "/", query, "")
+    )
+
+
+def _post_uid(url: str) -> str:
+    """Get uid of post identified by its link, as `task_utils.post_uid` does.
+
+    The migration keeps its own copy, so it does not import the workers.
+    """
+    key = _canonical_url(url)
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def upgrade():
+    op.add_column(t_name, sa.Column("uid", sa.String(32), nullable=True))
+
+    # Entry GUIDs of saved posts are unknown, so they are identified by
+    # their links. Posts are read and updated in batches by ID, so neither
+    # the table nor all of its links are held in memory.
+    posts = sa.table(
+        t_name,
+        sa.column("id", sa.Integer),
+        sa.column("url", sa.String),
+        sa.column("uid", sa.String),
+    )
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            sa.select(posts.c.id, posts.c.url)
+            .where(posts.c.id > last_id)
+            .order_by(posts.c.id)
+            .limit(batch_size)
+        ).fetchall()
+        if not batch:
+            break
+        uids = sa.values(
+            sa.column("id", sa.Integer),
+            sa.column("uid", sa.String),
+            name="uids",
+        ).data([(id_, _post_uid(url)) for id_, url in batch])
+        conn.execute(
+            sa.update(posts)
+            .where(posts.c.id == uids.c.id)
+            .values(uid=uids.c.uid)
+        )
+        last_id = batch[-1].id
+
+    # Drop duplicates, so the unique index can be created.
+    op.execute(
+        f"DELETE FROM {t_name} AS a USING {t_name} AS b "
+        "WHERE a.rss_feed_id = b.rss_feed_id AND a.uid = b.uid "
+        "AND a.id > b.id"
+    )
+
+    op.alter_column(t_name, "uid", nullable=False)
+    op.create_index(
+        index_name=index_name,
+        table_name=t_name,
+        columns=["rss_feed_id", "uid"],
+        unique=True,
+    )
+
+
+def downgrade():
+    op.drop_index(index_name, table_name=t_name)
+    op.drop_column(t_name, "uid")
@@ -0,0 +1,25 @@
+"""Add content_hash to rss_feeds
+
+Revision ID: 8b0e6d1f4a27
+Revises: 3f1c9a7b2e4d
+Create Date: 2026-10-18 10:03:17.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8b0e6d1f4a27"
+down_revision = "3f1c9a7b2e4d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "rss_feeds", sa.Column("content_hash", sa.String(32), nullable=True))
+
+
+def downgrade():
+    op.drop_column("rss_feeds", "content_hash")
@@ -0,0 +1,38 @@
+"""Add WebSub columns to rss_feeds
+
+Revision ID: 9a4c2e7d5f13
+Revises: 3b9d6a2f7e41
+Create Date: 2026-10-18 18:02:41.527114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9a4c2e7d5f13"
+down_revision = "3b9d6a2f7e41"
+branch_labels = None
+depends_on = None
+
+
+t_name = "rss_feeds"
+
+
+def upgrade():
+    op.add_column(t_name, sa.Column("hub_url", sa.Text, nullable=True))
+    op.add_column(t_name, sa.Column("hub_topic", sa.Text, nullable=True))
+    op.add_column(
+        t_name, sa.Column("hub_secret", sa.String(64), nullable=True))
+    op.add_column(
+        t_name, sa.Column("hub_requested_at", sa.DateTime, nullable=True))
+    op.add_column(
+        t_name, sa.Column("hub_expires_at", sa.DateTime, nullable=True))
+
+
+def downgrade():
+    op.drop_column(t_name, "hub_expires_at")
+    op.drop_column(t_name, "hub_requested_at")
+    op.drop_column(t_name, "hub_secret")
+    op.drop_column(t_name, "hub_topic")
+    op.drop_column(t_name, "hub_url")
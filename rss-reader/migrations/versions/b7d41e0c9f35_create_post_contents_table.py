@@ -0,0 +1,42 @@
+"""Create post contents table
+
+Revision ID: b7d41e0c9f35
+Revises: 5e8b1d4c9a62
+Create Date: 2026-10-18 21:04:51.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b7d41e0c9f35"
+down_revision = "5e8b1d4c9a62"
+branch_labels = None
+depends_on = None
+
+
+t_name = "post_contents"
+
+
+def upgrade():
+    op.create_table(
+        t_name,
+        sa.Column(
+            "id",
+            sa.Integer,
+            sa.ForeignKey("posts.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("summary", sa.LargeBinary, nullable=True),
+        sa.Column("content", sa.LargeBinary, nullable=True),
+    )
+    # Texts are compressed already, so they are stored out of line as is.
+    for column in ("summary", "content"):
+        op.execute(
+            f"ALTER TABLE {t_name} ALTER COLUMN {column} SET STORAGE EXTERNAL"
+        )
+
+
+def downgrade():
+    op.drop_table(t_name)
@@ -0,0 +1,200 @@
+"""Partition posts by month
+
+Revision ID: e1a6c3b8d047
+Revises: b7d41e0c9f35
+Create Date: 2026-10-18 22:37:12.508914
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from rss_reader.db import partitions
+
+
+# revision identifiers, used by Alembic.
+revision = "e1a6c3b8d047"
+down_revision = "b7d41e0c9f35"
+branch_labels = None
+depends_on = None
+
+
+t_name = "posts"
+contents_t_name = "post_contents"
+old_t_name = "posts_unpartitioned"
+old_contents_t_name = "post_contents_unpartitioned"
+uid_index_name = "ix_posts_rss_feed_id_uid"
+published_index_name = "ix_posts_rss_feed_id_published_at"
+columns = "id, rss_feed_id, title, url, published_at, created_at, uid"
+
+# Monthly partitions are created for the posts of the last months and the
+# upcoming ones, older posts go to the default partition.
+months_back = 12
+months_ahead = 3
+
+
+def _create_posts_table(partitioned: bool):
+    """Create posts table, partitioned by month or plain.
+
+    Constraints are named explicitly, otherwise Postgres would choose other
+    names while the constraints of the old table exist.
+    """
+    op.create_table(
+        t_name,
+        sa.Column(
+            "id",
+            sa.Integer,
+            server_default=sa.text("nextval('posts_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "rss_feed_id",
+            sa.Integer,
+            sa.ForeignKey(
+                "rss_feeds.id",
+                name=f"{t_name}_rss_feed_id_fkey",
+                ondelete="CASCADE",
+            ),
+            nullable=False,
+        ),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("url", sa.Text, nullable=False),
+        sa.Column("published_at", sa.DateTime, nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("uid", sa.String(32), nullable=False),
+        sa.PrimaryKeyConstraint(
+            *(("id", "published_at") if partitioned else ("id",)),
+            name=f"{t_name}_pkey",
+        ),
+        **({"postgresql_partition_by": "RANGE (published_at)"}
+           if partitioned else {}),
+    )
+    # Unique indexes of partitioned tables include the partition key.
+    op.create_index(
+        index_name=uid_index_name,
+        table_name=t_name,
+        columns=["rss_feed_id", "uid"] + (
+            ["published_at"] if partitioned else []
+        ),
+        unique=True,
+    )
+    if partitioned:
+        # Latest posts of a feed are read from the latest partitions.
+        op.create_index(
+            index_name=published_index_name,
+            table_name=t_name,
+            columns=["rss_feed_id", "published_at"],
+        )
+
+
+def _create_contents_table(partitioned: bool):
+    """Create post contents table, partitioned like posts or plain."""
+    key = ("id", "published_at") if partitioned else ("id",)
+    op.create_table(
+        contents_t_name,
+        sa.Column("id", sa.Integer, nullable=False),
+        *((sa.Column("published_at", sa.DateTime, nullable=False),)
+          if partitioned else ()),
+        sa.Column("summary", sa.LargeBinary, nullable=True),
+        sa.Column("content", sa.LargeBinary, nullable=True),
+        sa.PrimaryKeyConstraint(*key, name=f"{contents_t_name}_pkey"),
+        sa.ForeignKeyConstraint(
+            key,
+            [f"{t_name}.{name}" for name in key],
+            name=f"{contents_t_name}_id_fkey",
+            ondelete="CASCADE",
+        ),
+        **({"postgresql_partition_by": "RANGE (published_at)"}
+           if partitioned else {}),
+    )
+
+
+def _set_contents_storage():
+    """Store compressed texts out of line as is."""
+    for column in ("summary", "content"):
+        op.execute(
+            f"ALTER TABLE {contents_t_name} "
+            f"ALTER COLUMN {column} SET STORAGE EXTERNAL"
+        )
+
+
+def _rename_old_tables():
+    """Rename tables and their constraints out of the way of new ones."""
+    op.execute(
+        f"ALTER TABLE {contents_t_name} "
+        f"DROP CONSTRAINT {contents_t_name}_id_fkey"
+    )
+    for table, old_table in (
+        (t_name, old_t_name),
+        (contents_t_name, old_contents_t_name),
+    ):
+        op.rename_table(table, old_table)
+        op.execute(
+            f"ALTER TABLE {old_table} "
+            f"RENAME CONSTRAINT {table}_pkey TO {old_table}_pkey"
+        )
+    op.execute(f"ALTER INDEX {uid_index_name} RENAME TO {old_t_name}_uid")
+    op.execute(
+        f"ALTER INDEX IF EXISTS {published_index_name} "
+        f"RENAME TO {old_t_name}_published_at"
+    )
+
+
+def _drop_old_tables():
+    """Drop old tables and keep the sequence of post IDs."""
+    op.execute(f"ALTER SEQUENCE posts_id_seq OWNED BY {t_name}.id")
+    op.drop_table(old_contents_t_name)
+    op.drop_table(old_t_name)
+
+
+def upgrade():
+    conn = op.get_bind()
+    _rename_old_tables()
+    _create_posts_table(partitioned=True)
+    _create_contents_table(partitioned=True)
+
+    partitions.create_default_partitions(conn)
+    oldest = conn.execute(
+        sa.text(f"SELECT min(published_at) FROM {old_t_name}")
+    ).scalar()
+    current = partitions.month_start(datetime.utcnow())
+    month = partitions.add_months(current, -months_back)
+    if oldest is not None:
+        month = max(month, partitions.month_start(oldest))
+    while month <= partitions.add_months(current, months_ahead):
+        partitions.create_partitions(conn, month)
+        month = partitions.add_months(month, 1)
+    _set_contents_storage()
+
+    op.execute(
+        f"INSERT INTO {t_name} ({columns}) "
+        f"SELECT {columns} FROM {old_t_name}"
+    )
+    op.execute(
+        f"INSERT INTO {contents_t_name} (id, published_at, summary, content) "
+        f"SELECT c.id, p.published_at, c.summary, c.content "
+        f"FROM {old_contents_t_name} AS c JOIN {old_t_name} AS p USING (id)"
+    )
+    _drop_old_tables()
+
+
+def downgrade():
+    _rename_old_tables()
+    _create_posts_table(partitioned=False)
+    _create_contents_table(partitioned=False)
+    _set_contents_storage()
+
+    # Posts are unique by their feeds and UIDs again.
+    op.execute(
+        f"INSERT INTO {t_name} ({columns}) "
+        f"SELECT DISTINCT ON (rss_feed_id, uid) {columns} FROM {old_t_name} "
+        f"ORDER BY rss_feed_id, uid, id"
+    )
+    op.execute(
+        f"INSERT INTO {contents_t_name} (id, summary, content) "
+        f"SELECT id, summary, content FROM {old_contents_t_name} "
+        f"WHERE id IN (SELECT id FROM {t_name})"
+    )
+    # Partitions are dropped along with their tables.
+    _drop_old_tables()
@@ -0,0 +1,38 @@
+"""Add circuit breaker columns to rss_feeds
+
+Revision ID: e4a81f0c6b95
+Revises: 51d7c2a9e083
+Create Date: 2026-10-18 12:14:51.090127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e4a81f0c6b95"
+down_revision = "51d7c2a9e083"
+branch_labels = None
+depends_on = None
+
+
+t_name = "rss_feeds"
+
+
+def upgrade():
+    op.add_column(
+        t_name, sa.Column("failures_count", sa.Integer, nullable=False,
+                          server_default="0"))
+    op.add_column(
+        t_name, sa.Column("last_error", sa.String(255), nullable=True))
+    op.add_column(
+        t_name, sa.Column("backoff_until", sa.DateTime, nullable=True))
+    op.add_column(
+        t_name, sa.Column("disabled_at", sa.DateTime, nullable=True))
+
+
+def downgrade():
+    op.drop_column(t_name, "disabled_at")
+    op.drop_column(t_name, "backoff_until")
+    op.drop_column(t_name, "last_error")
+    op.drop_column(t_name, "failures_count")
@@ -1,4 +1,5 @@
 from .category import category  # noqa
+from .icon import icon  # noqa
 from .post import post  # noqa
 from .rss_feed import rss_feed  # noqa
 from .user import user  # noqa
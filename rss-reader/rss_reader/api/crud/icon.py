@@ -0,0 +1,39 @@
+"""
+Module which contains Icon CRUD operations.
+"""
+
+from typing import Optional
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader.api.crud import base
+from rss_reader import models
+
+
+class CrudIcon(
+    base.ReadonlyCrudBase[models.Icon],
+):
+    """
+    Icon CRUD class.
+    """
+
+    def get_by_hash(
+        self,
+        db: sa.orm.Session,
+        *,
+        hash: str,
+    ) -> Optional[models.Icon]:
+        """Get icon by its content hash.
+
+        Args:
+            db (sa.orm.Session): A DB instance.
+            hash (str): An icon hash.
+
+        Returns:
+            Optional[models.Icon]: Found object or None.
+        """
+        return db.query(self.model).filter(models.Icon.hash == hash).first()
+
+
+icon = CrudIcon(models.Icon)
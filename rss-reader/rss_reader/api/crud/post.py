@@ -3,11 +3,14 @@ Module which contains Post CRUD operations.
 """
 
 from typing import List
+from datetime import datetime
+from datetime import timedelta
 
 import sqlalchemy as sa
 import sqlalchemy.orm
 
 from rss_reader.api.crud import base
+from rss_reader.config import settings
 from rss_reader import models
 
 
@@ -16,8 +19,37 @@ class CrudPost(
 ):
     """
     Post CRUD class.
+
+    Posts listed newest first are read from the last
+    `RSS_POST_LISTING_WINDOW` seconds first if it is set, and from all
+    partitions only if the window holds fewer posts than requested. The
+    window start is a parameter rather than an SQL expression, so only the
+    partitions of recent months are planned and scanned.
     """
 
+    def get_multiple(
+        self,
+        db: sa.orm.Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: List[dict] = None,
+    ) -> List[models.Post]:
+        """List posts.
+
+        Args:
+            db (sa.orm.Session): A DB instance.
+            skip (int, optional): Offset. Defaults to 0.
+            limit (int, optional): Number of objects to fetch. Defaults to 100.
+            order_by (List[dict]): A list of dicts with keys "name" (the name
+                of the field by which to sort) and "desc" (optional; do reverse
+                sort if True).
+
+        Returns:
+            List[ModelType]: List of found objects.
+        """
+        return self._list(db.query(self.model), skip, limit, order_by)
+
     def get_multiple_by_feed(
         self,
         db: sa.orm.Session,
@@ -41,11 +73,40 @@ class CrudPost(
         Returns:
             List[ModelType]: List of found objects.
         """
-        query = db.query(self.model).filter(models.Post.rss_feed_id == feed_id)
-        query = self._apply_order_by(query, order_by)
-        query = query.limit(limit).offset(skip)
+        query = db.query(self.model).filter(
+            models.Post.rss_feed_id == feed_id,
+        )
+        return self._list(query, skip, limit, order_by)
 
-        return query.all()
+    def _list(
+        self,
+        query: sa.orm.Query,
+        skip: int,
+        limit: int,
+        order_by: List[dict] = None,
+    ) -> List[models.Post]:
+        """List posts of query, from the listing window first if possible.
+
+        Posts of the window are the first ones of the whole listing when it
+        is ordered newest first, so a full page of them is the same page as
+        the one of all posts.
+        """
+        query = self._apply_order_by(query, order_by)
+        window = settings.RSS_POST_LISTING_WINDOW
+        if window is not None and order_by and (
+            order_by[0]["name"].lower() == "published_at"
+            and order_by[0].get("desc", False)
+        ):
+            start = datetime.utcnow() - timedelta(seconds=window)
+            posts = (
+                query.filter(models.Post.published_at >= start)
+                .offset(skip)
+                .limit(limit)
+                .all()
+            )
+            if len(posts) == limit:
+                return posts
+        return query.offset(skip).limit(limit).all()
 
 
 post = CrudPost(models.Post)
@@ -2,6 +2,12 @@
 Module which contains RSS Feed CRUD operations.
 """
 
+from datetime import datetime
+from datetime import timedelta
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
 from rss_reader.api import schemas
 from rss_reader.api.crud import base
 from rss_reader import models
@@ -14,5 +20,83 @@ class CrudRssFeed(
     RSS Feed CRUD class.
     """
 
+    def update(
+        self,
+        db: sa.orm.Session,
+        *,
+        obj: models.RssFeed,
+        update_src: schemas.RssFeedUpdate,
+    ) -> models.RssFeed:
+        """Update an RSS feed.
+
+        An updated feed is re-enabled and fetched on the next run, even if
+        it has been backed off or disabled due to failures.
+
+        Args:
+            db (sa.orm.Session): A DB instance.
+            obj (models.RssFeed): A feed to update.
+            update_src (schemas.RssFeedUpdate): Data used to update a feed.
+
+        Returns:
+            models.RssFeed: Updated feed.
+        """
+        obj.failures_count = 0
+        obj.backoff_until = None
+        obj.disabled_at = None
+        obj.next_fetch_at = None
+        return super().update(db, obj=obj, update_src=update_src)
+
+    def confirm_subscription(
+        self,
+        db: sa.orm.Session,
+        *,
+        obj: models.RssFeed,
+        lease_seconds: int,
+    ) -> models.RssFeed:
+        """Confirm WebSub subscription of an RSS feed verified by its hub.
+
+        The request of the subscription is not pending anymore, so it can
+        not be verified or denied again until it is renewed.
+
+        Args:
+            db (sa.orm.Session): A DB instance.
+            obj (models.RssFeed): A subscribed feed.
+            lease_seconds (int): A subscription lease granted by the hub.
+
+        Returns:
+            models.RssFeed: Updated feed.
+        """
+        obj.hub_expires_at = datetime.utcnow() + timedelta(
+            seconds=lease_seconds,
+        )
+        obj.hub_requested_at = None
+        db.add(obj)
+        db.commit()
+        db.refresh(obj)
+        return obj
+
+    def cancel_subscription(
+        self,
+        db: sa.orm.Session,
+        *,
+        obj: models.RssFeed,
+    ) -> models.RssFeed:
+        """Cancel WebSub subscription of an RSS feed denied by its hub.
+
+        The subscription is requested again after `RSS_WEBSUB_RETRY_AFTER`.
+
+        Args:
+            db (sa.orm.Session): A DB instance.
+            obj (models.RssFeed): A feed.
+
+        Returns:
+            models.RssFeed: Updated feed.
+        """
+        obj.hub_expires_at = None
+        db.add(obj)
+        db.commit()
+        db.refresh(obj)
+        return obj
+
 
 rss_feed = CrudRssFeed(models.RssFeed)
@@ -0,0 +1,61 @@
+"""
+Module which contains API endpoints for Icons.
+"""
+
+from typing import Optional
+
+import fastapi
+import sqlalchemy as sa
+import sqlalchemy.orm
+from fastapi import params
+
+from rss_reader.api import crud
+from rss_reader.api import deps
+
+
+# Icons are addressed by their content hash, so they never change.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# SVG icons are served to be rendered as images only, never as documents.
+SVG_CONTENT_SECURITY_POLICY = "default-src 'none'; style-src 'unsafe-inline'"
+
+router = fastapi.APIRouter(
+    prefix="/icons",
+    tags=["icons"],
+)
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Check if If-None-Match header matches ETag."""
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+@router.get("/{hash}", response_class=fastapi.Response)
+async def read_icon(
+    *,
+    db: sa.orm.Session = params.Depends(deps.get_db),
+    hash: str,
+    if_none_match: Optional[str] = fastapi.Header(None),
+):
+    """
+    Get icon.
+    """
+    etag = f'"{hash}"'
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag}
+    # The ETag is the hash, so the cached icon is valid if the hash matches.
+    if _etag_matches(etag, if_none_match):
+        return fastapi.Response(status_code=304, headers=headers)
+
+    obj = crud.icon.get_by_hash(db, hash=hash)
+    if obj is None:
+        raise fastapi.HTTPException(404, detail="Icon not found")
+
+    headers["X-Content-Type-Options"] = "nosniff"
+    if obj.content_type == "image/svg+xml":
+        headers["Content-Security-Policy"] = SVG_CONTENT_SECURITY_POLICY
+    return fastapi.Response(
+        content=obj.data, media_type=obj.content_type, headers=headers,
+    )
@@ -12,6 +12,7 @@ from rss_reader.api import crud
 from rss_reader.api import deps
 from rss_reader.api import schemas
 from rss_reader.config import settings
+from rss_reader.db import compression
 
 
 router = fastapi.APIRouter(
@@ -51,6 +52,29 @@ async def read_post(
     return obj
 
 
+@router.get("/posts/{id}/content", response_model=schemas.PostContent)
+async def read_post_content(
+    *,
+    db: sa.orm.Session = fastapi.Depends(deps.get_db),
+    cache_control: deps.CacheControl = fastapi.Depends(),
+    id: int,
+):
+    """
+    Get post summary and content.
+    """
+    cache_control.set(f"max-age: {settings.RSS_PARSE_FEEDS_INTERVAL}, public")
+    obj = crud.post.get(db, id=id)
+    if obj is None:
+        raise fastapi.HTTPException(404, detail="Post not found")
+    # Posts of feeds which publish titles only have no content.
+    content = obj.content
+    return schemas.PostContent(
+        id=obj.id,
+        summary=compression.decompress(content and content.summary),
+        content=compression.decompress(content and content.content),
+    )
+
+
 @router.get("/feeds/{id}/posts", response_model=List[schemas.Post])
 async def list_feed_posts(
     *,
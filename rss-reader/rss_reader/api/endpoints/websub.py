@@ -0,0 +1,121 @@
+"""
+Module which contains API endpoints for WebSub callbacks.
+"""
+
+from typing import Optional
+from datetime import datetime
+from datetime import timedelta
+import logging
+
+import fastapi
+import sqlalchemy as sa
+import sqlalchemy.orm
+from fastapi import params
+
+from rss_reader import models
+from rss_reader import websub
+from rss_reader.api import crud
+from rss_reader.api import deps
+from rss_reader.config import settings
+from rss_reader.workers import tasks
+
+
+logger = logging.getLogger(__name__)
+
+# Content headers which are passed to the parser along with pushed content.
+PUSHED_HEADERS = ("content-type", "content-location", "link")
+
+# Leases granted by hubs are limited to a year.
+MAX_LEASE_SECONDS = 365 * 24 * 60 * 60
+
+router = fastapi.APIRouter(
+    prefix="/websub",
+    tags=["websub"],
+)
+
+
+@router.get("/{id}", response_class=fastapi.responses.PlainTextResponse)
+async def verify_subscription(
+    *,
+    db: sa.orm.Session = params.Depends(deps.get_db),
+    id: int,
+    mode: str = fastapi.Query(..., alias="hub.mode"),
+    topic: str = fastapi.Query(..., alias="hub.topic"),
+    challenge: Optional[str] = fastapi.Query(None, alias="hub.challenge"),
+    lease_seconds: Optional[int] = fastapi.Query(
+        None, alias="hub.lease_seconds", ge=1, le=MAX_LEASE_SECONDS,
+    ),
+    reason: Optional[str] = fastapi.Query(None, alias="hub.reason"),
+    token: Optional[str] = None,
+):
+    """
+    Verify subscription request of RSS feed.
+    """
+    obj = crud.rss_feed.get(db, id=id)
+    # Only a pending request is verified or denied, and only by the hub
+    # which is given the callback URL with the token of the subscription.
+    if (
+        obj is None or
+        topic != obj.hub_topic or
+        not _is_pending(obj) or
+        not websub.verify_callback_token(obj.hub_secret, token)
+    ):
+        raise fastapi.HTTPException(404, detail="Subscription not found")
+
+    if mode == "denied":
+        logger.warning("Feed %d: hub denied subscription: %s", id, reason)
+        crud.rss_feed.cancel_subscription(db, obj=obj)
+        return ""
+
+    # Unsubscriptions are not confirmed.
+    if mode != "subscribe":
+        raise fastapi.HTTPException(404, detail="Subscription not found")
+    crud.rss_feed.confirm_subscription(
+        db,
+        obj=obj,
+        lease_seconds=lease_seconds or settings.RSS_WEBSUB_LEASE_SECONDS,
+    )
+    return challenge or ""
+
+
+def _is_pending(obj: models.RssFeed) -> bool:
+    """Check subscription request of RSS feed waits for its hub."""
+    if obj.hub_requested_at is None:
+        return False
+    # A request which is not verified by then is requested again.
+    return obj.hub_requested_at > datetime.utcnow() - timedelta(
+        seconds=settings.RSS_WEBSUB_RETRY_AFTER,
+    )
+
+
+@router.post("/{id}", status_code=202)
+async def receive_content(
+    *,
+    db: sa.orm.Session = params.Depends(deps.get_db),
+    id: int,
+    request: fastapi.Request,
+):
+    """
+    Receive RSS feed content pushed by hub.
+    """
+    obj = crud.rss_feed.get(db, id=id)
+    if obj is None:
+        # Gone tells the hub to drop the subscription.
+        raise fastapi.HTTPException(410, detail="RSS Feed not found")
+
+    body = await request.body()
+    signature = request.headers.get("x-hub-signature")
+    # Content which is not signed properly is acknowledged, but ignored, so
+    # the hub does not retry it.
+    if obj.hub_secret is None or not websub.verify_signature(
+        obj.hub_secret, body, signature,
+    ):
+        logger.warning("Feed %d: ignoring content with invalid signature", id)
+        return None
+
+    headers = {
+        name: request.headers[name]
+        for name in PUSHED_HEADERS if name in request.headers
+    }
+    tasks.parse_pushed_feed.delay(id, body, headers)
+    return None
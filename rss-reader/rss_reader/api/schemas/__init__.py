@@ -2,6 +2,7 @@ from .category import Category  # noqa
 from .category import CategoryCreate  # noqa
 from .category import CategoryUpdate  # noqa
 from .post import Post  # noqa
+from .post import PostContent  # noqa
 from .rss_feed import RssFeed  # noqa
 from .rss_feed import RssFeedCreate  # noqa
 from .rss_feed import RssFeedUpdate  # noqa
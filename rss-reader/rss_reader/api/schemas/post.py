@@ -2,6 +2,7 @@
 Module which contains API schema definition for Posts.
 """
 
+from typing import Optional
 from datetime import datetime
 
 import pydantic
@@ -21,3 +22,12 @@ class Post(pydantic.BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class PostContent(pydantic.BaseModel):
+    """
+    Model used for post content representation.
+    """
+    id: int
+    summary: Optional[str]
+    content: Optional[str]
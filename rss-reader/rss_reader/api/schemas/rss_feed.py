@@ -41,12 +41,25 @@ class RssFeed(pydantic.BaseModel):
     url: HttpUrl
     rss: HttpUrl
     icon: Optional[HttpUrl]
+    icon_hash: Optional[str]
     category: Optional[category_schemas.Category]
+    posts_last_day: int
     posts_last_week: int
+    posts_last_month: int
 
     parsed_at: Optional[datetime]
+    next_fetch_at: Optional[datetime]
+
+    failures_count: int
+    last_error: Optional[str]
+    backoff_until: Optional[datetime]
+    disabled_at: Optional[datetime]
     modified_at: Optional[datetime]
     etag: Optional[str]
+    wire_size: Optional[int]
+    hub_url: Optional[str]
+    hub_expires_at: Optional[datetime]
+    body_size: Optional[int]
 
     created_at: datetime
 
@@ -2,7 +2,7 @@
 Module with RSS reader settings.
 """
 
-from typing import List, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 import secrets
 
 import pydantic
@@ -39,6 +39,141 @@ class Settings(pydantic.BaseSettings):
     RSS_TASKS_RES_BACKEND_URI: AnyUrl
     RSS_PARSE_FEEDS_INTERVAL: int
 
+    # Each feed is polled in between RSS_PARSE_FEEDS_INTERVAL and
+    # RSS_PARSE_FEEDS_MAX_INTERVAL seconds depending on its publishing
+    # cadence, randomized by RSS_PARSE_FEEDS_JITTER.
+    RSS_PARSE_FEEDS_MAX_INTERVAL: int = 6 * 60 * 60
+    RSS_PARSE_FEEDS_JITTER: float = 0.2
+
+    # Failing feeds are backed off exponentially starting from
+    # RSS_PARSE_FEEDS_INTERVAL and disabled after RSS_FEED_DISABLE_AFTER
+    # consecutive failures.
+    RSS_FEED_BACKOFF_MAX_INTERVAL: int = 24 * 60 * 60
+    RSS_FEED_DISABLE_AFTER: int = 10
+
+    # Feeds are fetched in batches, each batch within a single task which
+    # fetches its feeds concurrently over a shared connection pool.
+    RSS_FETCH_BATCH_SIZE: int = 50
+    RSS_FETCH_CONCURRENCY: int = 20
+    RSS_FETCH_TIMEOUT: int = 30
+    RSS_FETCH_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Raw responses of feeds are appended to an archive file per worker
+    # process in RSS_FETCH_ARCHIVE_DIR if it is set, so they can be replayed
+    # offline, see benchmarks/replay.py.
+    RSS_FETCH_ARCHIVE_DIR: Optional[str] = None
+
+    # Fetched feeds are parsed by a pool of RSS_PARSE_PROCESSES processes
+    # per worker process, a process per CPU core by default, or by fetching
+    # threads if it is 0. Fetches wait once RSS_PARSE_BACKLOG fetched feeds
+    # wait for parsing, twice the number of processes by default.
+    RSS_PARSE_PROCESSES: Optional[int] = None
+    RSS_PARSE_BACKLOG: Optional[int] = None
+
+    # Due feeds are dispatched in shards of RSS_DISPATCH_SHARD_SIZE feeds,
+    # each shard is saved as soon as its batches are fetched. No more than
+    # RSS_DISPATCH_SHARDS_IN_FLIGHT shards are processed at once. Dispatched
+    # feeds are leased for RSS_DISPATCH_LEASE seconds, so they are not
+    # dispatched again while they wait, and feeds which are never saved are
+    # due again once their lease ends.
+    RSS_DISPATCH_SHARD_SIZE: int = 1000
+    RSS_DISPATCH_SHARDS_IN_FLIGHT: int = 4
+    RSS_DISPATCH_LEASE: int = 60 * 60
+
+    # In the "stream" persistence mode there are no shards, each batch
+    # sends its parsed feeds to be saved in micro-batches of
+    # RSS_PERSIST_BATCH_SIZE feeds, or RSS_PERSIST_MAX_DELAY seconds after
+    # the first feed of a micro-batch is parsed.
+    RSS_PERSIST_MODE: Literal["chord", "stream"] = "chord"
+    RSS_PERSIST_BATCH_SIZE: int = 10
+    RSS_PERSIST_MAX_DELAY: float = 2.0
+
+    # In the streaming mode feeds are parsed one entry at a time up to the
+    # first known entry, within the entries and bytes budget per feed.
+    RSS_STREAM_PARSING: bool = False
+    RSS_STREAM_MAX_ENTRIES: int = 100
+    RSS_STREAM_MAX_BYTES: int = 4 * 1024 * 1024
+
+    # Posts published up to RSS_POST_LOOKBACK seconds before the previous
+    # parse are parsed again, already saved ones are skipped by the DB.
+    RSS_POST_LOOKBACK: int = 24 * 60 * 60
+
+    # Rolling post counters of feeds are aged out every
+    # RSS_POST_COUNTERS_AGING_INTERVAL seconds.
+    RSS_POST_COUNTERS_AGING_INTERVAL: int = 60 * 60
+
+    # Posts are partitioned by month of publication. Partitions are created
+    # RSS_POST_PARTITIONS_AHEAD months ahead, and partitions older than
+    # RSS_POST_PARTITIONS_RETENTION months are detached or dropped, as set by
+    # RSS_POST_PARTITIONS_EXPIRED, all partitions are kept if it is not set.
+    # Partitions are checked every RSS_POST_PARTITIONS_INTERVAL seconds.
+    # Partitions which hold any of the newest RSS_POST_RETENTION_MIN_POSTS
+    # posts of a feed are kept however old they are. Post listings ordered
+    # newest first read posts of the last RSS_POST_LISTING_WINDOW seconds
+    # first if it is set, so older partitions are scanned only when the
+    # window holds fewer posts than requested.
+    RSS_POST_PARTITIONS_AHEAD: int = 3
+    RSS_POST_PARTITIONS_RETENTION: Optional[int] = None
+    RSS_POST_PARTITIONS_EXPIRED: Literal["detach", "drop"] = "detach"
+    RSS_POST_PARTITIONS_INTERVAL: int = 24 * 60 * 60
+    RSS_POST_LISTING_WINDOW: Optional[int] = None
+
+    # Posts older than RSS_POST_RETENTION_DAYS days are deleted, except the
+    # newest RSS_POST_RETENTION_MIN_POSTS posts of each feed, nothing is
+    # deleted if it is not set. Posts are deleted every
+    # RSS_POST_RETENTION_INTERVAL seconds, in batches of
+    # RSS_POST_RETENTION_BATCH_SIZE posts with RSS_POST_RETENTION_BATCH_PAUSE
+    # seconds between them. Deleted posts are written to a zstd compressed
+    # JSON lines file per run in RSS_POST_RETENTION_ARCHIVE_DIR if it is set.
+    RSS_POST_RETENTION_DAYS: Optional[int] = None
+    RSS_POST_RETENTION_MIN_POSTS: int = 15
+    RSS_POST_RETENTION_INTERVAL: int = 24 * 60 * 60
+    RSS_POST_RETENTION_BATCH_SIZE: int = 1000
+    RSS_POST_RETENTION_BATCH_PAUSE: float = 0.1
+    RSS_POST_RETENTION_ARCHIVE_DIR: Optional[str] = None
+
+    # Feeds which advertise a WebSub hub are subscribed to it when
+    # RSS_WEBSUB_CALLBACK_URL is set to the public URL of the websub
+    # endpoint, e.g. https://reader.example.com/api/v1/websub. Subscribed
+    # feeds are polled every RSS_WEBSUB_FALLBACK_INTERVAL seconds only.
+    # Subscriptions are renewed RSS_WEBSUB_RENEW_BEFORE seconds before they
+    # expire, and failed requests are retried after RSS_WEBSUB_RETRY_AFTER
+    # seconds, both are checked every RSS_WEBSUB_RENEW_INTERVAL seconds.
+    RSS_WEBSUB_CALLBACK_URL: Optional[AnyUrl] = None
+    RSS_WEBSUB_LEASE_SECONDS: int = 10 * 24 * 60 * 60
+    RSS_WEBSUB_FALLBACK_INTERVAL: int = 24 * 60 * 60
+    RSS_WEBSUB_RENEW_BEFORE: int = 24 * 60 * 60
+    RSS_WEBSUB_RETRY_AFTER: int = 60 * 60
+    RSS_WEBSUB_RENEW_INTERVAL: int = 10 * 60
+
+    # Icons of feed sites are looked up within RSS_ICON_TIMEOUT seconds, and
+    # are cached per host for RSS_ICON_CACHE_TTL seconds in each process.
+    RSS_ICON_TIMEOUT: int = 10
+    RSS_ICON_CACHE_TTL: int = 24 * 60 * 60
+
+    # Addresses of hosts are cached for RSS_DNS_CACHE_TTL seconds by each
+    # worker process for fetches of feeds and icons, and failed lookups for
+    # RSS_DNS_NEGATIVE_TTL seconds.
+    RSS_DNS_CACHE_TTL: int = 5 * 60
+    RSS_DNS_NEGATIVE_TTL: int = 30
+
+    # Fetches from one host are limited for all workers together, the limits
+    # are kept in Redis which defaults to the tasks results backend.
+    RSS_HOST_LIMITS_URI: Optional[AnyUrl] = None
+    RSS_HOST_MAX_CONCURRENCY: int = 2
+    RSS_HOST_RATE: float = 1.0
+    RSS_HOST_BURST: int = 5
+    RSS_HOST_MAX_WAIT: int = 120
+    RSS_HOST_MAX_RETRIES: int = 2
+    RSS_HOST_RETRY_AFTER: int = 30
+
+    @pydantic.validator("RSS_HOST_LIMITS_URI", pre=True, always=True)
+    def assemble_host_limits_uri(
+        cls, value: Optional[str], values: Dict[str, Any]
+    ) -> Optional[str]:
+        """Default `RSS_HOST_LIMITS_URI` to the tasks results backend."""
+        return value or values.get("RSS_TASKS_RES_BACKEND_URI")
+
     ACCESS_TOKEN_EXP_SECONDS: int
 
 
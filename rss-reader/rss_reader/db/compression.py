@@ -0,0 +1,53 @@
+"""
+Module with compression of large text columns.
+
+Texts are compressed with zstd, which is fast enough to compress them while
+feeds are parsed and to decompress them on every request.
+"""
+
+from typing import Optional
+import threading
+
+import zstandard
+
+
+LEVEL = 3
+
+# Compression contexts are reused, but they are not thread-safe.
+_contexts = threading.local()
+
+
+def compress(text: Optional[str]) -> Optional[bytes]:
+    """Compress text.
+
+    Args:
+        text (Optional[str]): A text.
+
+    Returns:
+        Optional[bytes]: Compressed text, or None if text is empty.
+    """
+    if not text:
+        return None
+    compressor = getattr(_contexts, "compressor", None)
+    if compressor is None:
+        compressor = _contexts.compressor = zstandard.ZstdCompressor(
+            level=LEVEL,
+        )
+    return compressor.compress(text.encode())
+
+
+def decompress(data: Optional[bytes]) -> Optional[str]:
+    """Decompress text compressed by `compress`.
+
+    Args:
+        data (Optional[bytes]): Compressed text.
+
+    Returns:
+        Optional[str]: A text.
+    """
+    if data is None:
+        return None
+    decompressor = getattr(_contexts, "decompressor", None)
+    if decompressor is None:
+        decompressor = _contexts.decompressor = zstandard.ZstdDecompressor()
+    return decompressor.decompress(data).decode()
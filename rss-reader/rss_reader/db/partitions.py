@@ -0,0 +1,204 @@
+"""
+Module with management of monthly partitions of tables.
+
+Tables are partitioned by ranges of the `published_at` column, a partition
+per month, named like `posts_p2021_10`. Rows out of the ranges of monthly
+partitions go to the default partition, e.g. posts which are dated far in
+the past or in the future.
+"""
+
+from typing import List, Sequence, Union
+from datetime import datetime
+import re
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+
+# Tables of posts are partitioned alike, a referenced table goes first.
+POST_TABLES = ("posts", "post_contents")
+
+Connection = Union[sa.engine.Connection, sa.orm.Session]
+
+
+def month_start(value: datetime) -> datetime:
+    """Get the start of month which datetime belongs to.
+
+    Args:
+        value (datetime): A datetime.
+
+    Returns:
+        datetime: A month start.
+    """
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Get the start of month `months` after the month.
+
+    Args:
+        month (datetime): A month start.
+        months (int): A number of months, negative ones go back.
+
+    Returns:
+        datetime: A month start.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """Get name of the partition of table for month.
+
+    Args:
+        table (str): A partitioned table name.
+        month (datetime): A month start.
+
+    Returns:
+        str: A partition name.
+    """
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table: str) -> str:
+    """Get name of the default partition of table.
+
+    Args:
+        table (str): A partitioned table name.
+
+    Returns:
+        str: A partition name.
+    """
+    return f"{table}_default"
+
+
+def list_months(db: Connection, table: str) -> List[datetime]:
+    """List months which table has partitions for.
+
+    Args:
+        db (Connection): A DB connection or session.
+        table (str): A partitioned table name.
+
+    Returns:
+        List[datetime]: Sorted month starts.
+    """
+    names = db.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits AS i "
+            "JOIN pg_class AS c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    ).scalars()
+    pattern = re.compile(rf"{re.escape(table)}_p(\d{{4}})_(\d{{2}})")
+    months = []
+    for name in names:
+        match = pattern.fullmatch(name)
+        if match is not None:
+            months.append(datetime(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def create_default_partitions(
+    db: Connection,
+    tables: Sequence[str] = POST_TABLES,
+) -> None:
+    """Create default partitions of tables.
+
+    Args:
+        db (Connection): A DB connection or session.
+        tables (Sequence[str]): Partitioned table names.
+    """
+    for table in tables:
+        db.execute(sa.text(
+            f"CREATE TABLE {default_partition_name(table)} "
+            f"PARTITION OF {table} DEFAULT"
+        ))
+
+
+def create_partitions(
+    db: Connection,
+    month: datetime,
+    tables: Sequence[str] = POST_TABLES,
+) -> None:
+    """Create partitions of tables for month.
+
+    Rows of the month which are in the default partitions already are moved
+    to the new partitions. Partitions are created as tables and then
+    attached, so their indexes and constraints are created from those of the
+    partitioned tables.
+
+    Args:
+        db (Connection): A DB connection or session.
+        month (datetime): A month start.
+        tables (Sequence[str]): Partitioned table names.
+    """
+    bounds = {"start": month, "end": add_months(month, 1)}
+    in_month = "published_at >= :start AND published_at < :end"
+    for table in tables:
+        name = partition_name(table, month)
+        db.execute(sa.text(
+            f"CREATE TABLE {name} (LIKE {table} INCLUDING STORAGE)"
+        ))
+        db.execute(
+            sa.text(
+                f"INSERT INTO {name} SELECT * FROM "
+                f"{default_partition_name(table)} WHERE {in_month}"
+            ),
+            bounds,
+        )
+    # Referencing rows are deleted first, so nothing is cascaded.
+    for table in reversed(tables):
+        db.execute(
+            sa.text(
+                f"DELETE FROM {default_partition_name(table)} "
+                f"WHERE {in_month}"
+            ),
+            bounds,
+        )
+    for table in tables:
+        db.execute(sa.text(
+            f"ALTER TABLE {table} ATTACH PARTITION "
+            f"{partition_name(table, month)} FOR VALUES "
+            f"FROM ('{bounds['start']:%Y-%m-%d}') "
+            f"TO ('{bounds['end']:%Y-%m-%d}')"
+        ))
+
+
+def remove_partitions(
+    db: Connection,
+    month: datetime,
+    *,
+    drop: bool,
+    tables: Sequence[str] = POST_TABLES,
+) -> None:
+    """Detach or drop partitions of tables for month.
+
+    Detached partitions stay as standalone tables, e.g. to be archived, and
+    their foreign keys to the other tables are dropped, so the partitions
+    of the referenced tables can be detached too.
+
+    Args:
+        db (Connection): A DB connection or session.
+        month (datetime): A month start.
+        drop (bool): Drop partitions if True, detach them otherwise.
+        tables (Sequence[str]): Partitioned table names.
+    """
+    for table in reversed(tables):
+        name = partition_name(table, month)
+        db.execute(sa.text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if drop:
+            db.execute(sa.text(f"DROP TABLE {name}"))
+            continue
+        foreign_keys = db.execute(
+            sa.text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = CAST(:name AS regclass) AND contype = 'f' "
+                "AND confrelid::regclass::text = ANY(:tables)"
+            ),
+            {"name": name, "tables": list(tables)},
+        ).scalars().all()
+        for constraint in foreign_keys:
+            db.execute(sa.text(
+                f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'
+            ))
@@ -0,0 +1,43 @@
+"""
+Module with DB utils.
+"""
+
+from typing import List
+
+import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as sa_pg
+
+
+def unnest(
+    table: sa.Table,
+    names: List[str],
+    rows: List[dict],
+    alias: str,
+) -> sa.sql.FromClause:
+    """Build a set of rows to select from.
+
+    Rows are passed as one array parameter per column, so the statement
+    does not grow with the number of rows and is compiled once.
+
+    Args:
+        table (sa.Table): A table which columns the rows have.
+        names (List[str]): Column names.
+        rows (List[dict]): Rows.
+        alias (str): A name of the set.
+
+    Returns:
+        sa.sql.FromClause: A set of rows.
+    """
+    arrays = [
+        sa.bindparam(
+            f"{alias}_{name}",
+            [row[name] for row in rows],
+            type_=sa_pg.ARRAY(table.c[name].type),
+        )
+        for name in names
+    ]
+    return (
+        sa.func.unnest(*arrays)
+        .table_valued(*(sa.column(name, table.c[name].type) for name in names))
+        .render_derived(name=alias)
+    )
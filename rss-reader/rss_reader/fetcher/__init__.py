@@ -0,0 +1,3 @@
+from .client import FetchRequest  # noqa
+from .client import FetchResult  # noqa
+from .client import fetch_all  # noqa
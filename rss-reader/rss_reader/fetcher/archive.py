@@ -0,0 +1,211 @@
+"""
+Module with the archive of raw fetches.
+
+When RSS_FETCH_ARCHIVE_DIR is set, every response the fetcher reads, or a
+failure to read it, is appended to an archive in the directory along with
+its request and timing, so feeds can be parsed again offline against a
+fixed corpus, see `benchmarks.replay`.
+
+An archive is a file of msgpack records, each compressed as a separate zstd
+frame, so a record is appended with a single write, and an archive which is
+cut short loses its last record only. Each process writes its own archive,
+records are compressed and written by a thread of the writer, so fetches
+are not held up by them.
+"""
+
+from typing import Iterator, NamedTuple, Optional
+from datetime import datetime
+import atexit
+import logging
+import os
+import queue
+import threading
+
+import msgpack
+import zstandard
+
+from rss_reader.config import settings
+from rss_reader.fetcher import client
+from rss_reader.fetcher import exceptions
+
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+LEVEL = 3
+# A maximum number of fetches which wait to be written, fetches wait for
+# the writer once there are more of them.
+QUEUE_SIZE = 64
+
+_writer: Optional["ArchiveWriter"] = None
+_writer_lock = threading.Lock()
+
+
+class ArchivedFetch(NamedTuple):
+    """Archived fetch."""
+    request: client.FetchRequest
+    result: client.FetchResult
+    # A UNIX time when the fetch is started, and its duration in seconds.
+    fetched_at: float
+    elapsed: float
+
+
+class ArchiveWriter:
+    """
+    Writer which appends fetches to an archive.
+
+    Fetches are queued from any thread, and they are written one record at
+    a time by the writer thread in the order they are queued.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = os.getpid()
+        self._file = open(path, "ab")
+        self._compressor = zstandard.ZstdCompressor(level=LEVEL)
+        self._queue: "queue.Queue[Optional[ArchivedFetch]]" = queue.Queue(
+            QUEUE_SIZE,
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="fetch-archive", daemon=True,
+        )
+        self._thread.start()
+
+    def write(
+        self,
+        request: client.FetchRequest,
+        result: client.FetchResult,
+        fetched_at: float,
+        elapsed: float,
+    ) -> None:
+        """Queue fetch to be appended to the archive.
+
+        Args:
+            request (FetchRequest): A fetch request.
+            result (FetchResult): Its result.
+            fetched_at (float): A UNIX time when the fetch is started.
+            elapsed (float): A duration of the fetch in seconds.
+        """
+        self._queue.put(ArchivedFetch(request, result, fetched_at, elapsed))
+
+    def close(self) -> None:
+        """Write queued fetches and close the archive."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        """Write queued fetches until the writer is closed."""
+        while True:
+            fetch = self._queue.get()
+            if fetch is None:
+                return
+            try:
+                record = msgpack.packb(_pack(fetch), use_bin_type=True)
+                self._file.write(self._compressor.compress(record))
+                self._file.flush()
+            except Exception:
+                # The archive is for replays only, so fetches go on.
+                logger.exception(
+                    "Failed to archive fetch of %s", fetch.request.url,
+                )
+
+
+def get_writer() -> Optional[ArchiveWriter]:
+    """Get the archive writer of the process.
+
+    Returns:
+        Optional[ArchiveWriter]: An archive writer, or None if fetches are
+            not archived.
+    """
+    global _writer
+    if settings.RSS_FETCH_ARCHIVE_DIR is None:
+        return None
+    with _writer_lock:
+        # A writer inherited from a parent process is not shared.
+        if _writer is None or _writer.pid != os.getpid():
+            os.makedirs(settings.RSS_FETCH_ARCHIVE_DIR, exist_ok=True)
+            _writer = ArchiveWriter(os.path.join(
+                settings.RSS_FETCH_ARCHIVE_DIR,
+                f"fetches-{datetime.utcnow():%Y%m%dT%H%M%S}-{os.getpid()}"
+                f".msgpack.zst",
+            ))
+            atexit.register(_writer.close)
+            logger.info("Fetches are archived to %s", _writer.path)
+        return _writer
+
+
+def read(path: str) -> Iterator[ArchivedFetch]:
+    """Read fetches from an archive.
+
+    Errors of failed fetches are read as `HttpError` for error statuses
+    and as `FetchError` with the original message otherwise.
+
+    Args:
+        path (str): An archive path.
+
+    Yields:
+        ArchivedFetch: Archived fetches in the order they are written.
+    """
+    with open(path, "rb") as file:
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            file, read_across_frames=True,
+        )
+        try:
+            for record in msgpack.Unpacker(reader, raw=False):
+                yield _unpack(record)
+        except zstandard.ZstdError as err:
+            logger.warning("Archive %s is cut short: %s", path, err)
+
+
+def _pack(fetch: ArchivedFetch) -> list:
+    """Pack fetch into a record."""
+    request, result = fetch.request, fetch.result
+    return [
+        VERSION,
+        fetch.fetched_at,
+        fetch.elapsed,
+        request.url,
+        request.modified and request.modified.isoformat(),
+        request.etag,
+        result.url,
+        result.status,
+        result.headers,
+        result.body,
+        result.wire_size,
+        result.error and f"{type(result.error).__name__}: {result.error}",
+    ]
+
+
+def _unpack(record: list) -> ArchivedFetch:
+    """Unpack fetch from a record."""
+    (
+        _, fetched_at, elapsed,
+        request_url, modified, etag,
+        url, status, headers, body, wire_size, error,
+    ) = record
+    if error is not None:
+        if status is not None and status >= 400:
+            error = exceptions.HttpError(status)
+        else:
+            error = exceptions.FetchError(error)
+    return ArchivedFetch(
+        request=client.FetchRequest(
+            url=request_url,
+            modified=modified and datetime.fromisoformat(modified),
+            etag=etag,
+        ),
+        result=client.FetchResult(
+            url=url,
+            status=status,
+            headers=headers,
+            body=body,
+            etag=headers.get("etag"),
+            modified=client.parse_http_date(headers.get("last-modified")),
+            error=error,
+            wire_size=wire_size,
+        ),
+        fetched_at=fetched_at,
+        elapsed=elapsed,
+    )
@@ -0,0 +1,82 @@
+"""
+Module with the in-process cache of fetched data.
+"""
+
+from typing import Any, Callable, Hashable, Optional, Tuple
+import collections
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Cache which expires items after their TTL.
+
+    The cache holds up to `max_size` items, the least recently set ones are
+    evicted first. Hits and misses are counted, so the cache efficiency can
+    be reported. The cache is shared by threads of the process.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._items: "collections.OrderedDict[Hashable, Tuple[float, Any]]"
+        self._items = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value.
+
+        Args:
+            key (Hashable): A key.
+            default (Any): A value to return if key is missing or expired.
+
+        Returns:
+            Any: A cached value or `default`.
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > self._clock():
+                    self.hits += 1
+                    return value
+                del self._items[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Cache a value.
+
+        Args:
+            key (Hashable): A key.
+            value (Any): A value.
+            ttl (Optional[float]): A TTL in seconds, defaults to the cache
+                TTL.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (
+                self._clock() + (self.ttl if ttl is None else ttl),
+                value,
+            )
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all items and reset counters."""
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,421 @@
+"""
+Module with the asynchronous feeds fetcher.
+"""
+
+from typing import (
+    Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple,
+)
+from datetime import datetime
+from datetime import timezone
+import asyncio
+import email.utils
+import hashlib
+import logging
+import time
+import urllib.parse
+
+import aiohttp
+import redis.asyncio
+
+from rss_reader.config import settings
+from rss_reader.fetcher import decoding
+from rss_reader.fetcher import dns
+from rss_reader.fetcher import exceptions
+from rss_reader.fetcher import ratelimit
+
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "rss-reader/0.1"
+
+CHUNK_SIZE = 64 * 1024
+
+# Statuses which mean the host asks to slow down.
+RETRY_STATUSES = (429, 503)
+
+
+class FetchRequest(NamedTuple):
+    """Fetch request."""
+    url: str
+    modified: Optional[datetime] = None
+    etag: Optional[str] = None
+
+
+class FetchResult(NamedTuple):
+    """Fetch result."""
+    url: str
+    status: Optional[int]
+    headers: Dict[str, str]
+    body: bytes
+    etag: Optional[str]
+    modified: Optional[datetime]
+    error: Optional[Exception] = None
+    wire_size: int = 0
+
+    @property
+    def body_size(self) -> int:
+        """Return the decoded body size."""
+        return len(self.body)
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the response contains a feed body."""
+        return self.error is None and 200 <= self.status < 300
+
+    @property
+    def content_hash(self) -> str:
+        """Return a hash of the response body."""
+        return hashlib.blake2b(self.body, digest_size=16).hexdigest()
+
+    @property
+    def not_modified(self) -> bool:
+        """Return True if the feed has not changed since the last fetch."""
+        return self.error is None and self.status == 304
+
+
+# Called with an index of request and its result, may return an awaitable
+# which is awaited before the fetch is done.
+ResultCallback = Callable[[int, FetchResult], Optional[Awaitable[None]]]
+
+# Called with each request which is sent, its result, a UNIX time when it is
+# sent, and its duration in seconds.
+FetchCallback = Callable[[FetchRequest, FetchResult, float, float], None]
+
+
+def build_headers(request: FetchRequest) -> Dict[str, str]:
+    """Build request headers.
+
+    Clients should support both ETag and Last-Modified headers, as some
+    servers support one but not the other.
+
+    Args:
+        request (FetchRequest): A fetch request.
+
+    Returns:
+        Dict[str, str]: Request headers.
+    """
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": decoding.ACCEPT_ENCODING,
+        "Accept": (
+            "application/atom+xml, application/rss+xml, "
+            "application/xml;q=0.9, */*;q=0.8"
+        ),
+    }
+    if request.etag:
+        headers["If-None-Match"] = request.etag
+    if request.modified:
+        headers["If-Modified-Since"] = email.utils.format_datetime(
+            request.modified.replace(tzinfo=timezone.utc), usegmt=True,
+        )
+    return headers
+
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse HTTP date into naive UTC datetime.
+
+    Args:
+        value (Optional[str]): An HTTP date header value.
+
+    Returns:
+        Optional[datetime]: A parsed datetime or None if value is invalid.
+    """
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def create_session(concurrency: int) -> aiohttp.ClientSession:
+    """Create HTTP session with a shared keep-alive connection pool.
+
+    Host addresses are resolved through the process DNS cache.
+
+    Args:
+        concurrency (int): A maximum number of open connections.
+
+    Returns:
+        aiohttp.ClientSession: An HTTP session.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        keepalive_timeout=settings.RSS_FETCH_TIMEOUT,
+        resolver=dns.CachingResolver(),
+        use_dns_cache=False,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=settings.RSS_FETCH_TIMEOUT),
+        # Responses are decoded by the fetcher to limit the decoded size.
+        auto_decompress=False,
+    )
+
+
+async def fetch(
+    session: aiohttp.ClientSession,
+    request: FetchRequest,
+) -> FetchResult:
+    """Fetch a single feed.
+
+    Network errors are not raised but returned as a part of the result, so
+    one failing feed does not affect the others fetched along with it.
+
+    The body is decoded while it is being read, and the fetch is aborted
+    once the body exceeds `RSS_FETCH_MAX_BYTES`.
+
+    Args:
+        session (aiohttp.ClientSession): An HTTP session.
+        request (FetchRequest): A fetch request.
+
+    Returns:
+        FetchResult: A fetch result.
+    """
+    try:
+        async with session.get(
+            request.url, headers=build_headers(request),
+        ) as response:
+            wire_size, body = await read_body(
+                response, max_size=settings.RSS_FETCH_MAX_BYTES,
+            )
+    except (
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+        exceptions.FetchError,
+    ) as err:
+        return _failed_result(request, err)
+
+    headers = {k.lower(): v for k, v in response.headers.items()}
+    return FetchResult(
+        url=str(response.url),
+        status=response.status,
+        headers=headers,
+        body=body,
+        etag=headers.get("etag"),
+        modified=parse_http_date(headers.get("last-modified")),
+        error=(
+            exceptions.HttpError(response.status)
+            if response.status >= 400
+            else None
+        ),
+        wire_size=wire_size,
+    )
+
+
+async def read_body(
+    response: aiohttp.ClientResponse,
+    *,
+    max_size: int,
+) -> Tuple[int, bytes]:
+    """Read and decode response body.
+
+    Args:
+        response (aiohttp.ClientResponse): A response.
+        max_size (int): A maximum decoded body size.
+
+    Returns:
+        Tuple[int, bytes]: A body size on the wire and a decoded body.
+
+    Raises:
+        ResponseTooLarge: if body exceeds `max_size`.
+    """
+    if (response.content_length or 0) > max_size:
+        raise exceptions.ResponseTooLarge(max_size)
+
+    decoder = decoding.create_decoder(
+        response.headers.get("Content-Encoding"), max_size,
+    )
+    wire_size = 0
+    chunks = []
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        wire_size += len(chunk)
+        chunks.append(decoder.decode(chunk))
+    chunks.append(decoder.flush())
+    return wire_size, b"".join(chunks)
+
+
+async def fetch_politely(
+    fetch_fn: Callable[[FetchRequest], Awaitable[FetchResult]],
+    limiter: ratelimit.HostLimiter,
+    request: FetchRequest,
+) -> FetchResult:
+    """Fetch a single feed within limits of its host.
+
+    If the host responds with 429 or 503, all fetches from the host are
+    deferred according to Retry-After, and the feed is fetched again. Once
+    `RSS_HOST_MAX_RETRIES` retries are spent, the feed is deferred too.
+
+    Args:
+        fetch_fn (Callable): A function which fetches a feed.
+        limiter (HostLimiter): A host limiter.
+        request (FetchRequest): A fetch request.
+
+    Returns:
+        FetchResult: A fetch result.
+    """
+    host = urllib.parse.urlsplit(request.url).hostname or ""
+    for _ in range(settings.RSS_HOST_MAX_RETRIES + 1):
+        try:
+            async with limiter.slot(host):
+                result = await fetch_fn(request)
+        except exceptions.HostDeferred as err:
+            return _failed_result(request, err)
+
+        if result.status not in RETRY_STATUSES:
+            return result
+        delay = (
+            ratelimit.parse_retry_after(result.headers.get("retry-after")) or
+            settings.RSS_HOST_RETRY_AFTER
+        )
+        logger.info(
+            "Host %s responded with %d, deferring its fetches for %ds",
+            host, result.status, delay,
+        )
+        await limiter.defer(host, delay)
+    # The feed is not failing, it is fetched again once the host allows.
+    return _failed_result(request, exceptions.HostDeferred(host, delay))
+
+
+def create_limiter(client: redis.asyncio.Redis) -> ratelimit.HostLimiter:
+    """Create host limiter configured by settings.
+
+    Args:
+        client (redis.asyncio.Redis): A Redis client.
+
+    Returns:
+        HostLimiter: A host limiter.
+    """
+    return ratelimit.HostLimiter(
+        client,
+        max_concurrency=settings.RSS_HOST_MAX_CONCURRENCY,
+        rate=settings.RSS_HOST_RATE,
+        burst=settings.RSS_HOST_BURST,
+        slot_ttl=settings.RSS_FETCH_TIMEOUT + 5,
+        max_wait=settings.RSS_HOST_MAX_WAIT,
+    )
+
+
+def _failed_result(request: FetchRequest, err: Exception) -> FetchResult:
+    """Build result of failed fetch."""
+    return FetchResult(
+        url=request.url,
+        status=None,
+        headers={},
+        body=b"",
+        etag=None,
+        modified=None,
+        error=err,
+    )
+
+
+async def fetch_many(
+    requests: Iterable[FetchRequest],
+    *,
+    concurrency: int,
+    limiter: Optional[ratelimit.HostLimiter] = None,
+    on_result: Optional[ResultCallback] = None,
+    on_fetched: Optional[FetchCallback] = None,
+) -> List[FetchResult]:
+    """Fetch feeds concurrently.
+
+    Args:
+        requests (Iterable[FetchRequest]): Fetch requests.
+        concurrency (int): A maximum number of simultaneous requests.
+        limiter (Optional[HostLimiter]): A host limiter; optional.
+        on_result (Optional[ResultCallback]): A function which is called on
+            the event loop with an index of each request and its result as
+            soon as the request is done, and a coroutine it returns is
+            awaited; optional.
+        on_fetched (Optional[FetchCallback]): A function which is called on
+            the event loop with each request which is sent, including
+            retries, its result and timing; optional.
+
+    Returns:
+        List[FetchResult]: Fetch results in the order of requests.
+    """
+    # The semaphore makes requests wait for their turn before the request
+    # timeout starts, otherwise the queued ones would time out in the pool.
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(request: FetchRequest) -> FetchResult:
+        async with semaphore:
+            if on_fetched is None:
+                return await fetch(session, request)
+            fetched_at = time.time()
+            started = time.perf_counter()
+            result = await fetch(session, request)
+            on_fetched(
+                request, result, fetched_at, time.perf_counter() - started,
+            )
+            return result
+
+    async def fetch_limited(request: FetchRequest) -> FetchResult:
+        # The host limits are applied out of the semaphore, so requests
+        # waiting for their hosts do not hold slots of the others.
+        return await fetch_politely(fetch_one, limiter, request)
+
+    async def fetch_reported(index: int, request: FetchRequest) -> FetchResult:
+        result = await fetch_fn(request)
+        reported = on_result(index, result)
+        if reported is not None:
+            await reported
+        return result
+
+    fetch_fn = fetch_one if limiter is None else fetch_limited
+    async with create_session(concurrency) as session:
+        if on_result is None:
+            return await asyncio.gather(*(fetch_fn(r) for r in requests))
+        return await asyncio.gather(
+            *(fetch_reported(i, r) for i, r in enumerate(requests))
+        )
+
+
+def fetch_all(
+    requests: Iterable[FetchRequest],
+    *,
+    concurrency: Optional[int] = None,
+    on_result: Optional[ResultCallback] = None,
+    on_fetched: Optional[FetchCallback] = None,
+) -> List[FetchResult]:
+    """Fetch feeds concurrently on a new event loop.
+
+    Fetches are limited per host by limits shared with other workers.
+
+    Args:
+        requests (Iterable[FetchRequest]): Fetch requests.
+        concurrency (Optional[int]): A maximum number of simultaneous
+            requests. Defaults to the `RSS_FETCH_CONCURRENCY` setting.
+        on_result (Optional[ResultCallback]): A function which is called on
+            the event loop with an index of each request and its result as
+            soon as the request is done, and a coroutine it returns is
+            awaited; optional.
+        on_fetched (Optional[FetchCallback]): A function which is called on
+            the event loop with each request which is sent, its result and
+            timing; optional.
+
+    Returns:
+        List[FetchResult]: Fetch results in the order of requests.
+    """
+    async def run() -> List[FetchResult]:
+        client = redis.asyncio.from_url(settings.RSS_HOST_LIMITS_URI)
+        try:
+            return await fetch_many(
+                requests,
+                concurrency=concurrency or settings.RSS_FETCH_CONCURRENCY,
+                limiter=create_limiter(client),
+                on_result=on_result,
+                on_fetched=on_fetched,
+            )
+        finally:
+            await client.close()
+
+    results = asyncio.run(run())
+    logger.info(
+        "DNS cache: %(hits)d hits, %(misses)d misses, %(size)d lookups",
+        dns.stats(),
+    )
+    return results
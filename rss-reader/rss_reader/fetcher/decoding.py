@@ -0,0 +1,142 @@
+"""
+Module with the streaming decoding of compressed responses.
+"""
+
+from typing import Optional
+import zlib
+
+import brotli
+
+from rss_reader.fetcher import exceptions
+
+
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+class Decoder:
+    """
+    Streaming decoder which limits a decoded body size.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+
+    def decode(self, data: bytes) -> bytes:
+        """Decode a chunk of the body.
+
+        Args:
+            data (bytes): An encoded chunk.
+
+        Returns:
+            bytes: A decoded chunk.
+
+        Raises:
+            DecodeError: if the body is corrupt.
+            ResponseTooLarge: if decoded body exceeds `max_size`.
+        """
+        return self._count(data)
+
+    def flush(self) -> bytes:
+        """Decode the rest of the body."""
+        return b""
+
+    def _count(self, decoded: bytes) -> bytes:
+        """Count decoded bytes against the size limit."""
+        self.size += len(decoded)
+        if self.size > self.max_size:
+            raise exceptions.ResponseTooLarge(self.max_size)
+        return decoded
+
+
+class ZlibDecoder(Decoder):
+    """
+    Gzip and deflate decoder.
+    """
+
+    def __init__(self, max_size: int, wbits: int):
+        super().__init__(max_size)
+        self._wbits = wbits
+        self._decompressor = zlib.decompressobj(wbits)
+        self._started = False
+
+    def decode(self, data: bytes) -> bytes:
+        if not self._started:
+            self._started = True
+            try:
+                return self._decode(data)
+            except exceptions.DecodeError:
+                if self._wbits != zlib.MAX_WBITS:
+                    raise
+                # Some servers send raw deflate stream without zlib header.
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decode(data)
+
+    def flush(self) -> bytes:
+        try:
+            decoded = self._decompressor.flush()
+        except zlib.error as err:
+            raise self._error(err) from err
+        return self._count(decoded)
+
+    def _decode(self, data: bytes) -> bytes:
+        """Decompress no more than the allowed size, so a small compressed
+        chunk can not expand to an arbitrary large one in memory."""
+        try:
+            decoded = self._decompressor.decompress(
+                data, self.max_size - self.size + 1,
+            )
+        except zlib.error as err:
+            raise self._error(err) from err
+        return self._count(decoded)
+
+    def _error(self, err: zlib.error) -> exceptions.DecodeError:
+        """Build error of a corrupt body."""
+        encoding = "deflate" if self._wbits == zlib.MAX_WBITS else "gzip"
+        return exceptions.DecodeError(encoding, str(err))
+
+
+class BrotliDecoder(Decoder):
+    """
+    Brotli decoder.
+    """
+
+    def __init__(self, max_size: int):
+        super().__init__(max_size)
+        self._decompressor = brotli.Decompressor()
+
+    def decode(self, data: bytes) -> bytes:
+        # The output is cut at the allowed size like in `ZlibDecoder`, the
+        # body is too large then and the rest of it is never decoded.
+        try:
+            decoded = self._decompressor.process(
+                data, output_buffer_limit=self.max_size - self.size + 1,
+            )
+        except brotli.error as err:
+            raise exceptions.DecodeError("br", str(err)) from err
+        return self._count(decoded)
+
+
+def create_decoder(encoding: Optional[str], max_size: int) -> Decoder:
+    """Create decoder for content encoding.
+
+    Args:
+        encoding (Optional[str]): A Content-Encoding header value.
+        max_size (int): A maximum decoded body size.
+
+    Returns:
+        Decoder: A decoder.
+
+    Raises:
+        FetchError: if content encoding is not supported.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return ZlibDecoder(max_size, wbits=16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return ZlibDecoder(max_size, wbits=zlib.MAX_WBITS)
+    if encoding == "br":
+        return BrotliDecoder(max_size)
+    if encoding == "identity":
+        return Decoder(max_size)
+    raise exceptions.FetchError(f"Unsupported content encoding: {encoding}")
@@ -0,0 +1,108 @@
+"""
+Module with the DNS resolution cache of the fetcher.
+
+Fetches share resolved addresses of hosts within the process, including
+fetches made on other event loops, e.g. by other tasks. The system resolver
+does not report TTLs of records, so addresses are cached for
+RSS_DNS_CACHE_TTL seconds, and hosts which fail to resolve for
+RSS_DNS_NEGATIVE_TTL seconds.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import socket
+
+import aiohttp
+import aiohttp.abc
+
+from rss_reader.config import settings
+from rss_reader.fetcher import cache
+
+
+_MISSING = object()
+
+dns_cache = cache.TTLCache(ttl=settings.RSS_DNS_CACHE_TTL)
+
+
+def stats() -> Dict[str, int]:
+    """Get counters of the process DNS cache.
+
+    Returns:
+        Dict[str, int]: Numbers of cache hits, misses, and cached lookups.
+    """
+    return {
+        "hits": dns_cache.hits,
+        "misses": dns_cache.misses,
+        "size": len(dns_cache),
+    }
+
+
+class CachingResolver(aiohttp.abc.AbstractResolver):
+    """
+    Resolver which caches lookups of another resolver.
+
+    Concurrent lookups of the same host wait for a single lookup.
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[aiohttp.abc.AbstractResolver] = None,
+        ttl_cache: cache.TTLCache = dns_cache,
+    ):
+        self._resolver = resolver
+        self._cache = ttl_cache
+        self._pending: Dict[Tuple[str, int, int], asyncio.Future] = {}
+
+    async def resolve(
+        self,
+        host: str,
+        port: int = 0,
+        family: int = socket.AF_INET,
+    ) -> List[Dict[str, Any]]:
+        """Resolve host addresses.
+
+        Args:
+            host (str): A host name.
+            port (int): A port.
+            family (int): An address family.
+
+        Returns:
+            List[Dict[str, Any]]: Resolved addresses.
+
+        Raises:
+            OSError: if host cannot be resolved.
+        """
+        key = (host, port, family)
+        cached = self._cache.get(key, _MISSING)
+        if isinstance(cached, OSError):
+            raise type(cached)(*cached.args)
+        if cached is not _MISSING:
+            return list(cached)
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._lookup(key))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Cancellation of one waiter does not cancel the lookup of others.
+        return list(await asyncio.shield(pending))
+
+    async def _lookup(
+        self,
+        key: Tuple[str, int, int],
+    ) -> List[Dict[str, Any]]:
+        """Look host up and cache the result."""
+        if self._resolver is None:
+            self._resolver = aiohttp.ThreadedResolver()
+        try:
+            addresses = await self._resolver.resolve(*key)
+        except OSError as err:
+            self._cache.set(key, err, ttl=settings.RSS_DNS_NEGATIVE_TTL)
+            raise
+        self._cache.set(key, addresses)
+        return addresses
+
+    async def close(self) -> None:
+        """Close the underlying resolver."""
+        if self._resolver is not None:
+            await self._resolver.close()
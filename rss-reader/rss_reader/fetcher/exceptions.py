@@ -0,0 +1,40 @@
+"""
+Module with exceptions of the feeds fetcher.
+"""
+
+
+class FetchError(Exception):
+    """Base exception for all fetch errors."""
+
+
+class HttpError(FetchError):
+    """Server responded with an error status."""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class HostDeferred(FetchError):
+    """Fetches from host are deferred for longer than allowed to wait."""
+
+    def __init__(self, host: str, delay: float):
+        super().__init__(f"Fetches from {host} are deferred for {delay:.0f}s")
+        self.host = host
+        self.delay = delay
+
+
+class DecodeError(FetchError):
+    """Response body can not be decoded with its content encoding."""
+
+    def __init__(self, encoding: str, reason: str):
+        super().__init__(f"Invalid {encoding} body: {reason}")
+        self.encoding = encoding
+
+
+class ResponseTooLarge(FetchError):
+    """Response body exceeds the size limit."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Response body is larger than {max_size} bytes")
+        self.max_size = max_size
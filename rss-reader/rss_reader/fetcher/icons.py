@@ -0,0 +1,433 @@
+"""
+Module with the resolver of feed site icons.
+
+An icon is looked up in the links of the site page head, which is parsed
+while it is being read, so the page body is never downloaded. Sites which
+do not link an icon are checked for `/favicon.ico`. Resolved icons are
+cached per host, so feeds of the same site share a single lookup.
+
+Icons are downloaded to be stored locally. Their format is detected from
+the data, and responses which are not images, e.g. error pages, are
+dropped.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import urllib.parse
+
+import aiohttp
+import lxml.etree
+
+from rss_reader.config import settings
+from rss_reader.fetcher import cache
+from rss_reader.fetcher import dns
+
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "rss-reader/0.1"
+
+CHUNK_SIZE = 16 * 1024
+
+# Pages which head does not end within PAGE_MAX_BYTES are not read further.
+PAGE_MAX_BYTES = 1024 * 1024
+
+FAVICON_PATH = "/favicon.ico"
+
+# Hosts which are not reachable are looked up again after ERROR_TTL seconds
+# rather than RSS_ICON_CACHE_TTL.
+ERROR_TTL = 10 * 60
+
+# Icons larger than ICON_MAX_BYTES are not downloaded.
+ICON_MAX_BYTES = 256 * 1024
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+# SVG icons are recognized by the root element within SVG_SNIFF_BYTES.
+SVG_SNIFF_BYTES = 1024
+
+# Missing values are cached too, so the cache is checked against a marker.
+_MISSING = object()
+
+icons_cache = cache.TTLCache(ttl=settings.RSS_ICON_CACHE_TTL)
+
+
+class IconSource(NamedTuple):
+    """Icon source, the icon is looked up on the page if URL is unknown."""
+    page_url: str
+    icon_url: Optional[str] = None
+
+
+class FetchedIcon(NamedTuple):
+    """Fetched icon."""
+    url: str
+    content_type: str
+    data: bytes
+
+    @property
+    def hash(self) -> str:
+        """Return a hash of the icon data."""
+        return hashlib.sha256(self.data).hexdigest()
+
+
+class IconFinder:
+    """
+    Streaming finder of an icon link in the page head.
+    """
+
+    def __init__(self):
+        self.href: Optional[str] = None
+        self.base_href: Optional[str] = None
+        self.done = False
+        self._parser = lxml.etree.HTMLPullParser(
+            events=("start", "end"),
+            no_network=True,
+        )
+
+    def feed(self, data: bytes) -> bool:
+        """Parse a chunk of the page.
+
+        Args:
+            data (bytes): A page chunk.
+
+        Returns:
+            bool: True if the head is parsed and the rest of the page can
+                be skipped, False otherwise.
+        """
+        self._parser.feed(data)
+        for event, element in self._parser.read_events():
+            if (event, element.tag) in (("end", "head"), ("start", "body")):
+                self.done = True
+                break
+            if event != "start":
+                continue
+            if element.tag == "base" and self.base_href is None:
+                self.base_href = element.get("href")
+            elif element.tag == "link" and self.href is None:
+                rel = (element.get("rel") or "").lower().split()
+                if "icon" in rel and element.get("href"):
+                    self.href = element.get("href").strip()
+        return self.done
+
+    def icon_url(self, page_url: str) -> Optional[str]:
+        """Get an absolute URL of the found icon.
+
+        Args:
+            page_url (str): A URL of the page.
+
+        Returns:
+            Optional[str]: An icon URL or None if page does not link one.
+        """
+        if not self.href:
+            return None
+        base_url = urllib.parse.urljoin(page_url, self.base_href or "")
+        return urllib.parse.urljoin(base_url, self.href)
+
+
+def sniff_content_type(data: bytes) -> Optional[str]:
+    """Detect an image format by the data rather than response headers.
+
+    Args:
+        data (bytes): An icon data.
+
+    Returns:
+        Optional[str]: A content type or None if data is not an image of
+            a supported format.
+    """
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if b"<svg" in data[:SVG_SNIFF_BYTES].lower():
+        return "image/svg+xml"
+    return None
+
+
+def cache_key(page_url: str) -> str:
+    """Get a cache key of page icon, i.e. the page origin.
+
+    Args:
+        page_url (str): A page URL.
+
+    Returns:
+        str: A cache key.
+    """
+    parts = urllib.parse.urlsplit(page_url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+async def find_linked_icon(
+    session: aiohttp.ClientSession,
+    page_url: str,
+) -> Optional[str]:
+    """Find an icon linked in the page head.
+
+    Args:
+        session (aiohttp.ClientSession): An HTTP session.
+        page_url (str): A page URL.
+
+    Returns:
+        Optional[str]: An icon URL or None if page does not link one.
+    """
+    finder = IconFinder()
+    size = 0
+    async with session.get(page_url) as response:
+        if response.status >= 400:
+            return None
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            size += len(chunk)
+            if finder.feed(chunk) or size >= PAGE_MAX_BYTES:
+                break
+        # Icons are linked relative to the page the redirects lead to.
+        return finder.icon_url(str(response.url))
+
+
+async def check_favicon(
+    session: aiohttp.ClientSession,
+    page_url: str,
+) -> Optional[str]:
+    """Check if the page host serves `/favicon.ico`.
+
+    Args:
+        session (aiohttp.ClientSession): An HTTP session.
+        page_url (str): A page URL.
+
+    Returns:
+        Optional[str]: An icon URL or None if host does not serve one.
+    """
+    icon_url = urllib.parse.urljoin(page_url, FAVICON_PATH)
+    async with session.head(icon_url, allow_redirects=True) as response:
+        # Missing pages are often served as HTML with the 200 status.
+        content_type = response.headers.get("Content-Type", "")
+        if response.status >= 400 or content_type.startswith("text/html"):
+            return None
+        return str(response.url)
+
+
+async def resolve(
+    session: aiohttp.ClientSession,
+    page_url: str,
+) -> Optional[str]:
+    """Resolve an icon URL of the site page.
+
+    Network errors are not raised, the icon is considered missing then.
+
+    Args:
+        session (aiohttp.ClientSession): An HTTP session.
+        page_url (str): A page URL.
+
+    Returns:
+        Optional[str]: An icon URL or None if site has no icon.
+    """
+    key = cache_key(page_url)
+    icon_url = icons_cache.get(key, _MISSING)
+    if icon_url is not _MISSING:
+        return icon_url
+
+    ttl = None
+    icon_url = None
+    try:
+        icon_url = await find_linked_icon(session, page_url)
+        if icon_url is None:
+            icon_url = await check_favicon(session, page_url)
+    except (
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+        lxml.etree.LxmlError,
+    ) as err:
+        logger.info("Failed to resolve icon of %s: %r", page_url, err)
+        ttl = ERROR_TTL
+    icons_cache.set(key, icon_url, ttl=ttl)
+    return icon_url
+
+
+def create_session(concurrency: int) -> aiohttp.ClientSession:
+    """Create HTTP session for resolving icons.
+
+    Host addresses are resolved through the process DNS cache.
+
+    Args:
+        concurrency (int): A maximum number of open connections.
+
+    Returns:
+        aiohttp.ClientSession: An HTTP session.
+    """
+    return aiohttp.ClientSession(
+        # Icons are only looked up, so certificates are not verified to
+        # support sites with misconfigured TLS.
+        connector=aiohttp.TCPConnector(
+            limit=concurrency,
+            ssl=False,
+            resolver=dns.CachingResolver(),
+            use_dns_cache=False,
+        ),
+        timeout=aiohttp.ClientTimeout(total=settings.RSS_ICON_TIMEOUT),
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+async def resolve_many(
+    page_urls: Iterable[str],
+    *,
+    concurrency: int,
+) -> List[Optional[str]]:
+    """Resolve icons of site pages concurrently.
+
+    Pages of the same host are resolved once.
+
+    Args:
+        page_urls (Iterable[str]): Page URLs.
+        concurrency (int): A maximum number of simultaneous lookups.
+
+    Returns:
+        List[Optional[str]]: Icon URLs in the order of pages.
+    """
+    page_urls = list(page_urls)
+    by_key = {}
+    for page_url in page_urls:
+        by_key.setdefault(cache_key(page_url), page_url)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve_one(page_url: str) -> Optional[str]:
+        async with semaphore:
+            return await resolve(session, page_url)
+
+    async with create_session(concurrency) as session:
+        resolved = await asyncio.gather(
+            *(resolve_one(u) for u in by_key.values())
+        )
+    icon_urls = dict(zip(by_key, resolved))
+    return [icon_urls[cache_key(u)] for u in page_urls]
+
+
+async def download(
+    session: aiohttp.ClientSession,
+    icon_url: str,
+) -> Optional[FetchedIcon]:
+    """Download and normalise an icon.
+
+    Args:
+        session (aiohttp.ClientSession): An HTTP session.
+        icon_url (str): An icon URL.
+
+    Returns:
+        Optional[FetchedIcon]: An icon or None if URL does not serve an
+            image of the supported format and size.
+    """
+    async with session.get(icon_url) as response:
+        if response.status >= 400 or (
+            response.content_length or 0
+        ) > ICON_MAX_BYTES:
+            return None
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            size += len(chunk)
+            if size > ICON_MAX_BYTES:
+                return None
+            chunks.append(chunk)
+        data = b"".join(chunks)
+        content_type = sniff_content_type(data)
+        if content_type is None:
+            return None
+        return FetchedIcon(
+            url=str(response.url), content_type=content_type, data=data,
+        )
+
+
+async def fetch(
+    session: aiohttp.ClientSession,
+    source: IconSource,
+) -> Optional[FetchedIcon]:
+    """Fetch an icon of the site page.
+
+    Network errors are not raised, the icon is considered missing then.
+
+    Args:
+        session (aiohttp.ClientSession): An HTTP session.
+        source (IconSource): An icon source.
+
+    Returns:
+        Optional[FetchedIcon]: An icon or None if site has no icon.
+    """
+    icon_url = source.icon_url or await resolve(session, source.page_url)
+    if icon_url is None:
+        return None
+    try:
+        return await download(session, icon_url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        logger.info("Failed to download icon %s: %r", icon_url, err)
+        return None
+
+
+async def fetch_many(
+    sources: Iterable[IconSource],
+    *,
+    concurrency: int,
+) -> List[Optional[FetchedIcon]]:
+    """Fetch icons of site pages concurrently.
+
+    Pages of the same host are resolved and fetched once.
+
+    Args:
+        sources (Iterable[IconSource]): Icon sources.
+        concurrency (int): A maximum number of simultaneous fetches.
+
+    Returns:
+        List[Optional[FetchedIcon]]: Icons in the order of sources.
+    """
+    def key(source: IconSource) -> Tuple[str, Optional[str]]:
+        return cache_key(source.page_url), source.icon_url
+
+    sources = list(sources)
+    by_key = {}
+    for source in sources:
+        by_key.setdefault(key(source), source)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(source: IconSource) -> Optional[FetchedIcon]:
+        async with semaphore:
+            return await fetch(session, source)
+
+    async with create_session(concurrency) as session:
+        fetched = await asyncio.gather(
+            *(fetch_one(s) for s in by_key.values())
+        )
+    icons = dict(zip(by_key, fetched))
+    return [icons[key(s)] for s in sources]
+
+
+def fetch_all(
+    sources: Iterable[IconSource],
+    *,
+    concurrency: Optional[int] = None,
+) -> List[Optional[FetchedIcon]]:
+    """Fetch icons of site pages concurrently on a new event loop.
+
+    Args:
+        sources (Iterable[IconSource]): Icon sources.
+        concurrency (Optional[int]): A maximum number of simultaneous
+            fetches. Defaults to the `RSS_FETCH_CONCURRENCY` setting.
+
+    Returns:
+        List[Optional[FetchedIcon]]: Icons in the order of sources.
+    """
+    fetched = asyncio.run(fetch_many(
+        sources,
+        concurrency=concurrency or settings.RSS_FETCH_CONCURRENCY,
+    ))
+    logger.info(
+        "DNS cache: %(hits)d hits, %(misses)d misses, %(size)d lookups",
+        dns.stats(),
+    )
+    return fetched
@@ -0,0 +1,190 @@
+"""
+Module with the per-host fetch limits shared by all workers through Redis.
+"""
+
+from typing import AsyncIterator, Optional
+from datetime import datetime
+import asyncio
+import contextlib
+import email.utils
+import uuid
+
+import redis.asyncio
+
+from rss_reader.fetcher import exceptions
+
+
+# Atomically check the host is not deferred, take a concurrency slot and a
+# token from the host bucket. Returns 0 on success or milliseconds to wait
+# before the next attempt.
+ACQUIRE_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_concurrency = tonumber(ARGV[3])
+local slot_ttl = tonumber(ARGV[4])
+local slot_id = ARGV[5]
+
+local deferred_until = tonumber(redis.call("GET", KEYS[3]) or "0")
+if deferred_until > now then
+    return deferred_until - now
+end
+
+redis.call("ZREMRANGEBYSCORE", KEYS[2], "-inf", now)
+if redis.call("ZCARD", KEYS[2]) >= max_concurrency then
+    return 50
+end
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+if tokens < 1 then
+    return math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens - 1), "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+redis.call("ZADD", KEYS[2], now + slot_ttl, slot_id)
+redis.call("PEXPIRE", KEYS[2], slot_ttl)
+return 0
+"""
+
+# Defer host fetches, an earlier deferral never shortens a later one.
+DEFER_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local until_ = now + tonumber(ARGV[1])
+local deferred_until = tonumber(redis.call("GET", KEYS[1]) or "0")
+if until_ > deferred_until then
+    redis.call("SET", KEYS[1], until_, "PX", tonumber(ARGV[1]))
+end
+return until_
+"""
+
+
+def parse_retry_after(
+    value: Optional[str],
+    *,
+    now: Optional[datetime] = None,
+) -> Optional[float]:
+    """Parse the Retry-After header.
+
+    Args:
+        value (Optional[str]): A header value, either delay seconds or
+            HTTP date.
+        now (Optional[datetime]): A current UTC time. Defaults to now.
+
+    Returns:
+        Optional[float]: Delay seconds or None if value is invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.utcnow()
+    delay = retry_at.replace(tzinfo=None) - now
+    return max(delay.total_seconds(), 0.0)
+
+
+class HostLimiter:
+    """
+    Per-host concurrency cap and token bucket rate limiter.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis,
+        *,
+        max_concurrency: int,
+        rate: float,
+        burst: int,
+        slot_ttl: float,
+        max_wait: float,
+        prefix: str = "rss:host",
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.slot_ttl = slot_ttl
+        self.max_wait = max_wait
+        self.prefix = prefix
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+        self._defer = client.register_script(DEFER_SCRIPT)
+
+    def _keys(self, host: str) -> list:
+        """Get Redis keys of host bucket, slots, and deferral."""
+        return [
+            f"{self.prefix}:{host}:bucket",
+            f"{self.prefix}:{host}:slots",
+            f"{self.prefix}:{host}:deferred",
+        ]
+
+    async def acquire(self, host: str) -> str:
+        """Wait until fetch from host is allowed and take a slot.
+
+        Args:
+            host (str): A host name.
+
+        Returns:
+            str: A slot ID to release.
+
+        Raises:
+            HostDeferred: if host can not be fetched within `max_wait`.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        slot_id = uuid.uuid4().hex
+        while True:
+            wait_ms = await self._acquire(
+                keys=self._keys(host),
+                args=[
+                    self.rate,
+                    self.burst,
+                    self.max_concurrency,
+                    int(self.slot_ttl * 1000),
+                    slot_id,
+                ],
+            )
+            if wait_ms == 0:
+                return slot_id
+            wait = wait_ms / 1000
+            if loop.time() + wait > deadline:
+                raise exceptions.HostDeferred(host, wait)
+            await asyncio.sleep(wait)
+
+    async def release(self, host: str, slot_id: str) -> None:
+        """Release host slot.
+
+        Args:
+            host (str): A host name.
+            slot_id (str): A slot ID.
+        """
+        _, slots_key, _ = self._keys(host)
+        await self.client.zrem(slots_key, slot_id)
+
+    async def defer(self, host: str, delay: float) -> None:
+        """Defer all fetches from host.
+
+        Args:
+            host (str): A host name.
+            delay (float): Delay seconds.
+        """
+        *_, deferred_key = self._keys(host)
+        await self._defer(keys=[deferred_key], args=[int(delay * 1000)])
+
+    @contextlib.asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Hold a host slot while in context."""
+        slot_id = await self.acquire(host)
+        try:
+            yield
+        finally:
+            await self.release(host, slot_id)
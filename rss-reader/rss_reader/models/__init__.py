@@ -1,13 +1,19 @@
 from .base import Base  # noqa
 from .category import Category  # noqa
+from .icon import Icon  # noqa
 from .post import Post  # noqa
+from .post_content import PostContent  # noqa
+from .post_count_bucket import PostCountBucket  # noqa
 from .rss_feed import RssFeed  # noqa
 from .user import User   # noqa
 
 
 all_models = [
     Category,
+    Icon,
     Post,
+    PostContent,
+    PostCountBucket,
     RssFeed,
     User,
 ]
@@ -0,0 +1,21 @@
+"""
+Module with the Icon model.
+"""
+
+import sqlalchemy as sa
+
+from rss_reader.models import base
+from rss_reader.models import mixins
+
+
+class Icon(mixins.WithCreatedAt, base.Base):
+    """
+    Icon model.
+
+    Icons of feed sites are stored once per content, feeds refer to them by
+    the content hash, which is also the icon ETag.
+    """
+
+    hash = sa.Column(sa.String(64), nullable=False, unique=True)
+    content_type = sa.Column(sa.String(64), nullable=False)
+    data = sa.Column(sa.LargeBinary, nullable=False)
@@ -6,7 +6,9 @@ from datetime import datetime
 from datetime import timedelta
 
 import sqlalchemy as sa
+import sqlalchemy.ext.declarative
 import sqlalchemy.ext.hybrid as sa_hybrid
+import sqlalchemy.orm
 
 from rss_reader.models import base
 from rss_reader.models import mixins
@@ -17,14 +19,50 @@ class Post(mixins.WithCreatedAt, base.Base):
     Post model.
     """
 
+    # Posts are partitioned by month of publication, see
+    # `rss_reader.db.partitions`, so unique keys include the publication
+    # datetime.
+    __table_args__ = (
+        sa.Index(
+            "ix_posts_rss_feed_id_uid",
+            "rss_feed_id",
+            "uid",
+            "published_at",
+            unique=True,
+        ),
+        sa.Index(
+            "ix_posts_rss_feed_id_published_at",
+            "rss_feed_id",
+            "published_at",
+        ),
+        {"postgresql_partition_by": "RANGE (published_at)"},
+    )
+
+    # IDs are generated like those of single column keys.
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     title = sa.Column(sa.String(255), nullable=False)
     url = sa.Column(sa.Text, nullable=False)
-    published_at = sa.Column(sa.DateTime, nullable=False)
+    published_at = sa.Column(sa.DateTime, primary_key=True, nullable=False)
     rss_feed_id = sa.Column(
         sa.Integer,
         sa.ForeignKey("rss_feeds.id", ondelete="CASCADE"),
         nullable=False,
     )
+    # A hash of the entry GUID or canonical link, see `post_uid`.
+    uid = sa.Column(sa.String(32), nullable=False)
+
+    @sa.ext.declarative.declared_attr
+    def __mapper_args__(cls) -> dict:
+        # Post IDs are unique on their own, so posts are got by ID.
+        return {"primary_key": [cls.__table__.c.id]}
+
+    # Contents are loaded on access only, listings do not need them.
+    content = sa.orm.relationship(
+        "PostContent",
+        uselist=False,
+        lazy="select",
+        passive_deletes=True,
+    )
 
     @sa_hybrid.hybrid_property
     def is_new(self) -> bool:
@@ -0,0 +1,33 @@
+"""
+Module with the PostContent model.
+"""
+
+import sqlalchemy as sa
+
+from rss_reader.models import base
+
+
+class PostContent(base.Base):
+    """
+    Post content model.
+
+    Summaries and contents of posts are kept apart from posts, so listings
+    read narrow rows of posts only. A content shares its ID and publication
+    datetime with its post, and is partitioned by month alike, and its texts
+    are compressed, see `rss_reader.db.compression`.
+    """
+
+    __table_args__ = (
+        sa.ForeignKeyConstraint(
+            ["id", "published_at"],
+            ["posts.id", "posts.published_at"],
+            name="post_contents_id_fkey",
+            ondelete="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (published_at)"},
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    published_at = sa.Column(sa.DateTime, primary_key=True, nullable=False)
+    summary = sa.Column(sa.LargeBinary, nullable=True)
+    content = sa.Column(sa.LargeBinary, nullable=True)
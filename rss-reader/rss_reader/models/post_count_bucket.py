@@ -0,0 +1,34 @@
+"""
+Module with the Post Count Bucket model.
+"""
+
+import sqlalchemy as sa
+
+from rss_reader.models import base
+
+
+class PostCountBucket(base.Base):
+    """
+    Post Count Bucket model.
+
+    A number of feed posts published within an hour, the rolling post
+    counters of feeds are maintained from these buckets.
+    """
+
+    __table_args__ = (
+        sa.Index(
+            "ix_post_count_buckets_rss_feed_id_bucket",
+            "rss_feed_id",
+            "bucket",
+            unique=True,
+        ),
+    )
+
+    rss_feed_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey("rss_feeds.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # The start of the hour.
+    bucket = sa.Column(sa.DateTime, nullable=False, index=True)
+    count = sa.Column(sa.Integer, nullable=False, default=0)
@@ -17,9 +17,33 @@ class RssFeed(mixins.WithCreatedAt, base.Base):
     name = sa.Column(sa.String(255), nullable=False)
     url = sa.Column(sa.Text, nullable=False)
     rss = sa.Column(sa.Text, nullable=False)
+    # The icon is the URL the icon is downloaded from, the downloaded icon
+    # is stored locally and served by its icon_hash.
     icon = sa.Column(sa.Text, nullable=True)
+    icon_hash = sa.Column(
+        sa.String(64),
+        sa.ForeignKey("icons.hash", ondelete="SET NULL"),
+        nullable=True,
+    )
     parsed_at = sa.Column(sa.DateTime, nullable=True)
+
+    # Rolling post counters are incremented when posts are saved and aged
+    # out periodically, see `PostCountBucket`.
+    posts_last_day = sa.Column(sa.Integer, nullable=False, default=0)
     posts_last_week = sa.Column(sa.Integer, nullable=False, default=0)
+    posts_last_month = sa.Column(sa.Integer, nullable=False, default=0)
+
+    # The next_fetch_at is calculated from the feed publishing cadence, the
+    # feed is not polled until then.
+    next_fetch_at = sa.Column(sa.DateTime, nullable=True, index=True)
+    unchanged_rate = sa.Column(sa.Float, nullable=False, default=0)
+
+    # Consecutive fetch failures open the feed's circuit breaker, the feed
+    # is backed off until backoff_until and disabled after too many ones.
+    failures_count = sa.Column(sa.Integer, nullable=False, default=0)
+    last_error = sa.Column(sa.String(255), nullable=True)
+    backoff_until = sa.Column(sa.DateTime, nullable=True)
+    disabled_at = sa.Column(sa.DateTime, nullable=True)
 
     # The modified_at and etag columns are provided by the RSS feed publisher
     # so they can have NULL values. The modified_at here is not related to the
@@ -27,6 +51,23 @@ class RssFeed(mixins.WithCreatedAt, base.Base):
     modified_at = sa.Column(sa.DateTime, nullable=True)
     etag = sa.Column(sa.Text, nullable=True)
 
+    # A hash of the last fetched feed body, used to skip parsing of feeds
+    # which do not support conditional requests.
+    content_hash = sa.Column(sa.String(32), nullable=True)
+
+    # A WebSub hub advertised by the feed. The subscription is requested with
+    # the hub_secret at hub_requested_at, which is cleared once the hub
+    # verifies it, and it is active until hub_expires_at then.
+    hub_url = sa.Column(sa.Text, nullable=True)
+    hub_topic = sa.Column(sa.Text, nullable=True)
+    hub_secret = sa.Column(sa.String(64), nullable=True)
+    hub_requested_at = sa.Column(sa.DateTime, nullable=True)
+    hub_expires_at = sa.Column(sa.DateTime, nullable=True)
+
+    # Sizes of the last fetched feed body as transferred and decoded.
+    wire_size = sa.Column(sa.Integer, nullable=True)
+    body_size = sa.Column(sa.Integer, nullable=True)
+
     category_id = sa.Column(
         sa.Integer,
         sa.ForeignKey("categories.id", ondelete="SET NULL"),
@@ -0,0 +1,286 @@
+"""
+Module with the WebSub (formerly PubSubHubbub) subscriber.
+
+Feeds which advertise a hub are subscribed to it, and the hub pushes feed
+updates to the callback endpoint, see https://www.w3.org/TR/websub/.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
+import hmac
+import re
+import urllib.parse
+
+import aiohttp
+import lxml.etree
+
+from rss_reader.config import settings
+
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+# Hub links are looked for in the feed head, i.e. before the first entry,
+# within HEAD_MAX_BYTES.
+HEAD_MAX_BYTES = 64 * 1024
+ENTRY_TAGS = frozenset((
+    "item",
+    "{http://purl.org/rss/1.0/}item",
+    f"{{{ATOM_NS}}}entry",
+))
+
+LINK_HEADER_RE = re.compile(r"<([^>]*)>([^<]*)")
+LINK_REL_RE = re.compile(r"""rel\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s;,]+))""")
+
+SIGNATURE_METHODS = {
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha384": hashlib.sha384,
+    "sha512": hashlib.sha512,
+}
+
+
+class SubscriptionError(Exception):
+    """Hub has not accepted a subscription request."""
+
+
+class Subscription(NamedTuple):
+    """Subscription request."""
+    hub_url: str
+    topic: str
+    callback: str
+    secret: str
+
+
+def callback_token(secret: str) -> str:
+    """Get a token of subscription which its callback URL carries.
+
+    The token is derived from the subscription secret, so only the hub
+    which is given the callback URL can verify the subscription.
+
+    Args:
+        secret (str): A subscription secret.
+
+    Returns:
+        str: A token.
+    """
+    return hmac.new(secret.encode(), b"callback", hashlib.sha256).hexdigest()
+
+
+def verify_callback_token(secret: Optional[str], token: Optional[str]) -> bool:
+    """Check callback URL carries the token of subscription.
+
+    Args:
+        secret (Optional[str]): A subscription secret.
+        token (Optional[str]): A token of the callback URL.
+
+    Returns:
+        bool: True if token is valid, False otherwise.
+    """
+    if secret is None or token is None:
+        return False
+    return hmac.compare_digest(callback_token(secret), token)
+
+
+def callback_url(feed_id: int, secret: str) -> str:
+    """Get a callback URL of feed subscription.
+
+    Args:
+        feed_id (int): A feed ID in DB.
+        secret (str): A subscription secret.
+
+    Returns:
+        str: A URL.
+    """
+    base_url = settings.RSS_WEBSUB_CALLBACK_URL.rstrip("/")
+    return f"{base_url}/{feed_id}?token={callback_token(secret)}"
+
+
+def parse_link_header(value: Optional[str]) -> Dict[str, str]:
+    """Parse Link header.
+
+    Args:
+        value (Optional[str]): A header value.
+
+    Returns:
+        Dict[str, str]: The first URL of each relation type.
+    """
+    links = {}
+    for match in LINK_HEADER_RE.finditer(value or ""):
+        url, params = match.groups()
+        rel = LINK_REL_RE.search(params)
+        if rel is None:
+            continue
+        for rel_type in next(filter(None, rel.groups())).split():
+            links.setdefault(rel_type.lower(), url.strip())
+    return links
+
+
+def _find_feed_links(body: bytes) -> Dict[str, str]:
+    """Find links in the feed head.
+
+    Args:
+        body (bytes): A feed body.
+
+    Returns:
+        Dict[str, str]: The first URL of each relation type.
+    """
+    links = {}
+    parser = lxml.etree.XMLPullParser(
+        events=("start",),
+        resolve_entities=False,
+        no_network=True,
+    )
+    try:
+        parser.feed(body[:HEAD_MAX_BYTES])
+        for _, element in parser.read_events():
+            if element.tag in ENTRY_TAGS:
+                break
+            if element.tag == f"{{{ATOM_NS}}}link" and element.get("href"):
+                for rel_type in element.get("rel", "alternate").split():
+                    links.setdefault(rel_type.lower(), element.get("href"))
+    except lxml.etree.XMLSyntaxError:
+        pass
+    return links
+
+
+def discover(
+    body: bytes,
+    headers: Dict[str, str],
+    url: str,
+) -> Optional[Tuple[str, str]]:
+    """Discover a hub and a topic of feed.
+
+    The Link header is preferred over links in the feed, a feed URL is the
+    topic if the self link is missing.
+
+    Args:
+        body (bytes): A feed body.
+        headers (Dict[str, str]): Response headers with lowercase names.
+        url (str): A feed URL.
+
+    Returns:
+        Optional[Tuple[str, str]]: A hub URL and a topic URL, or None if
+            feed does not advertise a hub.
+    """
+    links = parse_link_header(headers.get("link"))
+    if "hub" not in links:
+        links = _find_feed_links(body)
+    if "hub" not in links:
+        return None
+    hub_url = urllib.parse.urljoin(url, links["hub"])
+    topic = urllib.parse.urljoin(url, links.get("self", url))
+    return hub_url, topic
+
+
+def sign(secret: str, body: bytes, method: str = "sha256") -> str:
+    """Sign content the way hubs do.
+
+    Args:
+        secret (str): A subscription secret.
+        body (bytes): A content.
+        method (str): A hash method.
+
+    Returns:
+        str: An X-Hub-Signature header value.
+    """
+    digest = hmac.new(
+        secret.encode(), body, SIGNATURE_METHODS[method],
+    ).hexdigest()
+    return f"{method}={digest}"
+
+
+def verify_signature(
+    secret: str,
+    body: bytes,
+    signature: Optional[str],
+) -> bool:
+    """Check content is signed with subscription secret.
+
+    Args:
+        secret (str): A subscription secret.
+        body (bytes): A content.
+        signature (Optional[str]): An X-Hub-Signature header value.
+
+    Returns:
+        bool: True if signature is valid, False otherwise.
+    """
+    method, _, digest = (signature or "").partition("=")
+    if method not in SIGNATURE_METHODS:
+        return False
+    return hmac.compare_digest(sign(secret, body, method), f"{method}={digest}")
+
+
+async def request_subscription(
+    session: aiohttp.ClientSession,
+    subscription: Subscription,
+    *,
+    lease_seconds: int,
+) -> None:
+    """Send subscription request to hub.
+
+    The hub verifies the request asynchronously by calling the callback.
+
+    Args:
+        session (aiohttp.ClientSession): An HTTP session.
+        subscription (Subscription): A subscription request.
+        lease_seconds (int): A requested subscription lease.
+
+    Raises:
+        SubscriptionError: if hub has not accepted the request.
+    """
+    data = {
+        "hub.mode": "subscribe",
+        "hub.topic": subscription.topic,
+        "hub.callback": subscription.callback,
+        "hub.secret": subscription.secret,
+        "hub.lease_seconds": str(lease_seconds),
+    }
+    try:
+        async with session.post(subscription.hub_url, data=data) as response:
+            if not 200 <= response.status < 300:
+                text = await response.text(errors="replace")
+                raise SubscriptionError(
+                    f"Hub responded with HTTP {response.status}: {text[:200]}"
+                )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        raise SubscriptionError(f"Hub is not reachable: {err!r}") from err
+
+
+def subscribe_all(
+    subscriptions: Iterable[Subscription],
+) -> List[Optional[SubscriptionError]]:
+    """Send subscription requests concurrently on a new event loop.
+
+    Args:
+        subscriptions (Iterable[Subscription]): Subscription requests.
+
+    Returns:
+        List[Optional[SubscriptionError]]: Errors in the order of requests,
+            None for accepted ones.
+    """
+    async def run() -> List[Optional[SubscriptionError]]:
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.RSS_FETCH_CONCURRENCY,
+            ),
+            timeout=aiohttp.ClientTimeout(total=settings.RSS_FETCH_TIMEOUT),
+        ) as session:
+            results = await asyncio.gather(
+                *(
+                    request_subscription(
+                        session, s,
+                        lease_seconds=settings.RSS_WEBSUB_LEASE_SECONDS,
+                    )
+                    for s in subscriptions
+                ),
+                return_exceptions=True,
+            )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(
+                result, SubscriptionError
+            ):
+                raise result
+        return results
+
+    return asyncio.run(run())
@@ -5,8 +5,44 @@ Module with Celery app.
 import celery
 
 from rss_reader.config import settings
+from rss_reader.workers import serialization
 
 
+serialization.register()
+
+TASKS = "rss_reader.workers.tasks"
+
+# Tasks are routed to queues by the resource which bounds them, so each queue
+# is consumed by workers with a suitable pool, see scripts/worker-start.sh.
+# Saves never wait behind slow fetches this way.
+QUEUES = {
+    # Feeds fetching on event loops, which is bound by the network.
+    "fetch": [
+        f"{TASKS}.process_feeds.parse_feed",
+        f"{TASKS}.process_feeds.parse_feed_batch",
+        f"{TASKS}.process_feeds.stream_feed_batch",
+        f"{TASKS}.subscriptions.renew_websub_subscriptions",
+    ],
+    # Parsing of content which is not fetched, i.e. pushed by hubs.
+    "parse": [
+        f"{TASKS}.process_feeds.parse_pushed_feed",
+    ],
+    # Writes to DB and its maintenance.
+    "persist": [
+        f"{TASKS}.process_feeds.load_feeds_updates",
+        f"{TASKS}.process_feeds.dispatch_shards",
+        f"{TASKS}.process_feeds.save_feeds_updates",
+        f"{TASKS}.process_feeds.save_feed_batches",
+        f"{TASKS}.post_counters.age_post_counters",
+        f"{TASKS}.partitions.manage_post_partitions",
+        f"{TASKS}.retention.enforce_post_retention",
+    ],
+    "icons": [
+        f"{TASKS}.fetch_icon.fetch_feed_icon",
+        f"{TASKS}.fetch_icon.fetch_feeds_icons",
+    ],
+}
+
 app = celery.Celery(
     __name__,
     backend=settings.RSS_TASKS_RES_BACKEND_URI,
@@ -14,19 +50,52 @@ app = celery.Celery(
     include=[
         "rss_reader.workers.tasks.process_feeds",
         "rss_reader.workers.tasks.fetch_icon",
+        "rss_reader.workers.tasks.post_counters",
+        "rss_reader.workers.tasks.partitions",
+        "rss_reader.workers.tasks.retention",
+        "rss_reader.workers.tasks.subscriptions",
     ],
 )
 
 app.conf.update(
     timezone="UTC",
-    accept_content=["application/x-python-serialize"],
-    task_serializer="pickle",
-    result_accept_content=["application/x-python-serialize"],
-    result_serializer="pickle",
+    # Pickle is still accepted, so messages sent before the serializer
+    # change are processed.
+    accept_content=[
+        serialization.CONTENT_TYPE,
+        "application/x-python-serialize",
+    ],
+    task_serializer=serialization.NAME,
+    result_accept_content=[
+        serialization.CONTENT_TYPE,
+        "application/x-python-serialize",
+    ],
+    result_serializer=serialization.NAME,
+    task_routes={
+        name: {"queue": queue}
+        for queue, names in QUEUES.items()
+        for name in names
+    },
     beat_schedule={
         "parse-rss-feeds": {
-            "task": "rss_reader.workers.tasks.process_feeds.load_feeds_updates",
+            "task": f"{TASKS}.process_feeds.load_feeds_updates",
             "schedule": settings.RSS_PARSE_FEEDS_INTERVAL,
-        }
+        },
+        "age-post-counters": {
+            "task": f"{TASKS}.post_counters.age_post_counters",
+            "schedule": settings.RSS_POST_COUNTERS_AGING_INTERVAL,
+        },
+        "manage-post-partitions": {
+            "task": f"{TASKS}.partitions.manage_post_partitions",
+            "schedule": settings.RSS_POST_PARTITIONS_INTERVAL,
+        },
+        "enforce-post-retention": {
+            "task": f"{TASKS}.retention.enforce_post_retention",
+            "schedule": settings.RSS_POST_RETENTION_INTERVAL,
+        },
+        "renew-websub-subscriptions": {
+            "task": f"{TASKS}.subscriptions.renew_websub_subscriptions",
+            "schedule": settings.RSS_WEBSUB_RENEW_INTERVAL,
+        },
     }
 )
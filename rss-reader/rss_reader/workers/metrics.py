@@ -0,0 +1,204 @@
+"""
+Module with the progress metrics of feeds processing and retention runs.
+
+Metrics of a run are printed as JSON by:
+    python -m rss_reader.workers.metrics {run,retention} [RUN_ID]
+"""
+
+from typing import Dict, Optional
+from datetime import datetime
+import argparse
+import functools
+import json
+import sys
+
+import redis
+
+from rss_reader.config import settings
+
+
+PREFIX = "rss:run"
+LAST_RUN_KEY = f"{PREFIX}:last"
+# Metrics of a run are kept for a day after the run is started.
+RUN_TTL = 24 * 60 * 60
+
+RETENTION_PREFIX = "rss:retention"
+LAST_RETENTION_KEY = f"{RETENTION_PREFIX}:last"
+# Retention runs are rare, so their metrics are kept for a month.
+RETENTION_TTL = 30 * 24 * 60 * 60
+
+
+@functools.lru_cache()
+def get_client() -> redis.Redis:
+    """Get Redis client which keeps the metrics."""
+    return redis.Redis.from_url(
+        settings.RSS_TASKS_RES_BACKEND_URI, decode_responses=True,
+    )
+
+
+def _run_key(run_id: str) -> str:
+    """Get Redis key of run metrics."""
+    return f"{PREFIX}:{run_id}"
+
+
+def start_run(
+    client: redis.Redis,
+    run_id: str,
+    *,
+    feeds_total: int,
+    shards_total: int,
+) -> None:
+    """Record start of a run.
+
+    Args:
+        client (redis.Redis): A Redis client.
+        run_id (str): A run ID.
+        feeds_total (int): A number of feeds dispatched.
+        shards_total (int): A number of shards dispatched.
+    """
+    key = _run_key(run_id)
+    pipe = client.pipeline()
+    pipe.hset(key, mapping={
+        "started_at": datetime.utcnow().isoformat(),
+        "feeds_total": feeds_total,
+        "shards_total": shards_total,
+        "feeds_done": 0,
+        "shards_done": 0,
+        "posts_saved": 0,
+        "feeds_failed": 0,
+    })
+    pipe.expire(key, RUN_TTL)
+    pipe.set(LAST_RUN_KEY, run_id, ex=RUN_TTL)
+    pipe.execute()
+
+
+def record_saved(
+    client: redis.Redis,
+    run_id: str,
+    *,
+    feeds: int,
+    posts: int,
+    failed: int,
+    shards: int,
+) -> Dict[str, str]:
+    """Record saved feeds of a run.
+
+    Args:
+        client (redis.Redis): A Redis client.
+        run_id (str): A run ID.
+        feeds (int): A number of feeds saved.
+        posts (int): A number of posts saved.
+        failed (int): A number of feeds which failed.
+        shards (int): A number of shards saved.
+
+    Returns:
+        Dict[str, str]: Updated run metrics.
+    """
+    key = _run_key(run_id)
+    pipe = client.pipeline()
+    pipe.hincrby(key, "shards_done", shards)
+    pipe.hincrby(key, "feeds_done", feeds)
+    pipe.hincrby(key, "posts_saved", posts)
+    pipe.hincrby(key, "feeds_failed", failed)
+    pipe.hgetall(key)
+    *_, run = pipe.execute()
+    return run
+
+
+def get_run(
+    client: redis.Redis,
+    run_id: Optional[str] = None,
+) -> Dict[str, str]:
+    """Get metrics of a run.
+
+    Args:
+        client (redis.Redis): A Redis client.
+        run_id (Optional[str]): A run ID. Defaults to the last run.
+
+    Returns:
+        Dict[str, str]: Run metrics, empty if run is unknown.
+    """
+    run_id = run_id or client.get(LAST_RUN_KEY)
+    if run_id is None:
+        return {}
+    run = client.hgetall(_run_key(run_id))
+    return {"run_id": run_id, **run} if run else {}
+
+
+def record_retention(
+    client: redis.Redis,
+    run_id: str,
+    *,
+    started_at: datetime,
+    posts_removed: int,
+    batches: int,
+    seconds: float,
+    archive: Optional[str],
+) -> None:
+    """Record a finished retention run.
+
+    Args:
+        client (redis.Redis): A Redis client.
+        run_id (str): A run ID.
+        started_at (datetime): A datetime when run is started.
+        posts_removed (int): A number of posts removed.
+        batches (int): A number of batches posts are removed in.
+        seconds (float): A duration of run.
+        archive (Optional[str]): A path of archive of removed posts.
+    """
+    key = f"{RETENTION_PREFIX}:{run_id}"
+    pipe = client.pipeline()
+    pipe.hset(key, mapping={
+        "started_at": started_at.isoformat(),
+        "posts_removed": posts_removed,
+        "batches": batches,
+        "seconds": round(seconds, 3),
+        "archive": archive or "",
+    })
+    pipe.expire(key, RETENTION_TTL)
+    pipe.set(LAST_RETENTION_KEY, run_id, ex=RETENTION_TTL)
+    pipe.execute()
+
+
+def get_retention(
+    client: redis.Redis,
+    run_id: Optional[str] = None,
+) -> Dict[str, str]:
+    """Get metrics of a retention run.
+
+    Args:
+        client (redis.Redis): A Redis client.
+        run_id (Optional[str]): A run ID. Defaults to the last run.
+
+    Returns:
+        Dict[str, str]: Run metrics, empty if run is unknown.
+    """
+    run_id = run_id or client.get(LAST_RETENTION_KEY)
+    if run_id is None:
+        return {}
+    run = client.hgetall(f"{RETENTION_PREFIX}:{run_id}")
+    return {"run_id": run_id, **run} if run else {}
+
+
+# Readers of run metrics by kinds of runs.
+READERS = {
+    "run": get_run,
+    "retention": get_retention,
+}
+
+
+def main() -> None:
+    """Print metrics of a run, the last one by default."""
+    parser = argparse.ArgumentParser(description="Print metrics of a run.")
+    parser.add_argument("kind", choices=list(READERS))
+    parser.add_argument("run_id", nargs="?", metavar="RUN_ID")
+    args = parser.parse_args()
+
+    run = READERS[args.kind](get_client(), args.run_id)
+    if not run:
+        sys.exit(f"No {args.kind} metrics are found")
+    print(json.dumps(run, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+Module with the compact tasks serializer.
+
+Task arguments and results are packed with msgpack. Feed jobs and stubs are
+packed as msgpack extension types in the columnar layout, i.e. as a list per
+field instead of a list per feed or post, so lists of them are packed and
+unpacked by C loops mostly.
+
+Columns added later, such as texts of posts, are the last ones, so values
+packed before they were added are unpacked without them.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+import functools
+import itertools
+import os
+
+import kombu.serialization
+import msgpack
+
+
+NAME = "rss-msgpack"
+CONTENT_TYPE = "application/x-rss-msgpack"
+
+EXT_DATETIME = 1
+# Lists of feed jobs and stubs.
+EXT_FEED_JOBS = 2
+EXT_FEED_STUBS = 3
+EXT_POST_STUBS = 4
+# Single feed jobs and stubs, packed as lists of one item.
+EXT_FEED_JOB = 5
+EXT_FEED_STUB = 6
+EXT_POST_STUB = 7
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class _Columns(list):
+    """List of feed jobs or stubs to pack in the columnar layout."""
+
+    def __init__(self, code: int, items: list):
+        super().__init__(items)
+        self.code = code
+
+
+def _datetime_2_int(value: datetime) -> int:
+    """Convert naive datetime to microseconds since epoch."""
+    return (value - EPOCH) // MICROSECOND
+
+
+def _ints_2_datetimes(values: List[int]) -> List[datetime]:
+    """Convert microseconds since epoch to naive datetimes."""
+    return list(map(EPOCH.__add__, map(MICROSECOND.__mul__, values)))
+
+
+def _opt_datetime_2_int(value: Optional[datetime]) -> Optional[int]:
+    """Convert optional naive datetime to microseconds since epoch."""
+    return _datetime_2_int(value) if value is not None else None
+
+
+def _opt_ints_2_datetimes(
+    values: List[Optional[int]],
+) -> List[Optional[datetime]]:
+    """Convert optional microseconds since epoch to naive datetimes."""
+    return [EPOCH + v * MICROSECOND if v is not None else None for v in values]
+
+
+def _opt_hex_2_bytes(value: Optional[str]) -> Optional[bytes]:
+    """Convert optional hex string to bytes."""
+    return bytes.fromhex(value) if value is not None else None
+
+
+def _opt_bytes_2_hex(values: List[Optional[bytes]]) -> List[Optional[str]]:
+    """Convert optional bytes to hex strings."""
+    return [v.hex() if v is not None else None for v in values]
+
+
+def _split(items: list, counts: List[int]) -> List[tuple]:
+    """Split items into tuples of `counts` items."""
+    ends = itertools.accumulate(counts)
+    return [
+        tuple(items[end - count:end]) for count, end in zip(counts, ends)
+    ]
+
+
+def _pack_datetime(value: datetime) -> bytes:
+    """Pack datetime with its UTC offset, if any."""
+    offset = value.utcoffset()
+    if offset is None:
+        return _packb([_datetime_2_int(value), None])
+    naive = value.replace(tzinfo=None) - offset
+    return _packb([_datetime_2_int(naive), offset // MICROSECOND])
+
+
+def _unpack_datetime(data: bytes) -> datetime:
+    """Unpack datetime packed by `_pack_datetime`."""
+    value, offset = _unpackb(data)
+    naive = EPOCH + value * MICROSECOND
+    if offset is None:
+        return naive
+    tz = timezone(offset * MICROSECOND)
+    return naive.replace(tzinfo=timezone.utc).astimezone(tz)
+
+
+def _pack_feed_jobs(jobs: list) -> bytes:
+    """Pack feed jobs.
+
+    Hashes are packed as bytes instead of hex strings.
+    """
+    return _packb([
+        [j.id for j in jobs],
+        [j.url for j in jobs],
+        [_opt_datetime_2_int(j.prev_parsed_at) for j in jobs],
+        [_opt_datetime_2_int(j.modified_at) for j in jobs],
+        [j.etag for j in jobs],
+        [_opt_hex_2_bytes(j.content_hash) for j in jobs],
+    ])
+
+
+def _unpack_feed_jobs(data: bytes) -> list:
+    """Unpack feed jobs."""
+    ids, urls, prev_parsed_at, modified_at, etags, hashes = _unpackb(data)
+    return list(map(_make(_task_utils().FeedJob), zip(
+        ids,
+        urls,
+        _opt_ints_2_datetimes(prev_parsed_at),
+        _opt_ints_2_datetimes(modified_at),
+        etags,
+        _opt_bytes_2_hex(hashes),
+    )))
+
+
+def _pack_post_stubs(posts: list) -> bytes:
+    """Pack post stubs."""
+    return _packb([
+        [p.title for p in posts],
+        [p.url for p in posts],
+        [_datetime_2_int(p.published_at) for p in posts],
+        [p.feed_id for p in posts],
+        [bytes.fromhex(p.uid) for p in posts],
+        [p.summary for p in posts],
+        [p.content for p in posts],
+    ])
+
+
+def _unpack_post_stubs(data: bytes) -> list:
+    """Unpack post stubs."""
+    titles, urls, published_at, feed_ids, uids, *texts = _unpackb(data)
+    summaries, contents = texts or _no_texts(len(titles))
+    return list(map(_make(_task_utils().PostStub), zip(
+        titles,
+        urls,
+        _ints_2_datetimes(published_at),
+        feed_ids,
+        map(bytes.hex, uids),
+        summaries,
+        contents,
+    )))
+
+
+def _pack_feed_stubs(feeds: list) -> bytes:
+    """Pack feed stubs with posts of all feeds together.
+
+    Posts of a feed belong to it, so their feed ID is not packed, and their
+    URLs are packed without the common prefix (usually the blog address).
+    """
+    posts = [p for f in feeds for p in f.posts]
+    prefixes = [
+        os.path.commonprefix([p.url for p in f.posts])
+        if len(f.posts) > 1 else ""
+        for f in feeds
+    ]
+    prefix_sizes = itertools.chain.from_iterable(
+        itertools.repeat(len(prefix), len(f.posts))
+        for f, prefix in zip(feeds, prefixes)
+    )
+    return _packb([
+        [f.id for f in feeds],
+        [f.url for f in feeds],
+        [_datetime_2_int(f.parsed_at) for f in feeds],
+        [_opt_datetime_2_int(f.modified) for f in feeds],
+        [f.etag for f in feeds],
+        [_opt_hex_2_bytes(f.content_hash) for f in feeds],
+        [f.wire_size for f in feeds],
+        [f.body_size for f in feeds],
+        [f.error for f in feeds],
+        [f.hub_url for f in feeds],
+        [f.hub_topic for f in feeds],
+        [len(f.posts) for f in feeds],
+        prefixes,
+        [p.title for p in posts],
+        [p.url[size:] for p, size in zip(posts, prefix_sizes)],
+        [_datetime_2_int(p.published_at) for p in posts],
+        [bytes.fromhex(p.uid) for p in posts],
+        [p.summary for p in posts],
+        [p.content for p in posts],
+        [_opt_datetime_2_int(f.deferred_until) for f in feeds],
+        [f.pushed for f in feeds],
+    ])
+
+
+def _unpack_feed_stubs(data: bytes) -> list:
+    """Unpack feed stubs."""
+    task_utils = _task_utils()
+    (
+        ids, urls, parsed_at, modified, etags, hashes, wire_sizes,
+        body_sizes, errors, hub_urls, hub_topics, counts, prefixes, titles,
+        post_urls, published_at, uids, *added,
+    ) = _unpackb(data)
+    summaries, contents = added[:2] or _no_texts(len(titles))
+    deferred_until = added[2] if len(added) > 2 else [None] * len(ids)
+    pushed = added[3] if len(added) > 3 else [False] * len(ids)
+
+    def per_post(values: list) -> Iterator:
+        """Repeat feed values for each post of the feed."""
+        return itertools.chain.from_iterable(
+            map(itertools.repeat, values, counts)
+        )
+
+    posts = list(map(_make(task_utils.PostStub), zip(
+        titles,
+        map(str.__add__, per_post(prefixes), post_urls),
+        _ints_2_datetimes(published_at),
+        per_post(ids),
+        map(bytes.hex, uids),
+        summaries,
+        contents,
+    )))
+    return list(map(_make(task_utils.FeedStub), zip(
+        ids,
+        urls,
+        _ints_2_datetimes(parsed_at),
+        _opt_ints_2_datetimes(modified),
+        etags,
+        _split(posts, counts),
+        _opt_bytes_2_hex(hashes),
+        wire_sizes,
+        body_sizes,
+        errors,
+        hub_urls,
+        hub_topics,
+        _opt_ints_2_datetimes(deferred_until),
+        pushed,
+    )))
+
+
+def _no_texts(count: int) -> List[list]:
+    """Get empty summaries and contents of `count` posts."""
+    return [[None] * count, [None] * count]
+
+
+@functools.lru_cache()
+def _task_utils():
+    """Get the module with feed jobs and stubs.
+
+    It is imported on the first use, since the tasks package imports the
+    Celery app which registers this serializer.
+    """
+    from rss_reader.workers.tasks import utils as task_utils
+    return task_utils
+
+
+@functools.lru_cache()
+def _make(cls: type) -> Callable[[tuple], tuple]:
+    """Get a function which makes named tuple from a tuple of fields.
+
+    It is much faster than calling named tuple with keyword arguments.
+    """
+    return functools.partial(tuple.__new__, cls)
+
+
+@functools.lru_cache()
+def _column_codes() -> Dict[type, int]:
+    """Get extension type codes of lists by type of their items."""
+    task_utils = _task_utils()
+    return {
+        task_utils.FeedJob: EXT_FEED_JOBS,
+        task_utils.FeedStub: EXT_FEED_STUBS,
+        task_utils.PostStub: EXT_POST_STUBS,
+    }
+
+
+COLUMN_PACKERS: Dict[int, Callable[[list], bytes]] = {
+    EXT_FEED_JOBS: _pack_feed_jobs,
+    EXT_FEED_STUBS: _pack_feed_stubs,
+    EXT_POST_STUBS: _pack_post_stubs,
+}
+
+# Extension type codes of single items by codes of their lists.
+SINGLE_CODES: Dict[int, int] = {
+    EXT_FEED_JOBS: EXT_FEED_JOB,
+    EXT_FEED_STUBS: EXT_FEED_STUB,
+    EXT_POST_STUBS: EXT_POST_STUB,
+}
+
+EXT_UNPACKERS: Dict[int, Callable[[bytes], Any]] = {
+    EXT_DATETIME: _unpack_datetime,
+    EXT_FEED_JOBS: _unpack_feed_jobs,
+    EXT_FEED_STUBS: _unpack_feed_stubs,
+    EXT_POST_STUBS: _unpack_post_stubs,
+    EXT_FEED_JOB: lambda data: _unpack_feed_jobs(data)[0],
+    EXT_FEED_STUB: lambda data: _unpack_feed_stubs(data)[0],
+    EXT_POST_STUB: lambda data: _unpack_post_stubs(data)[0],
+}
+
+
+def _to_columns(obj: Any) -> Any:
+    """Mark lists of feed jobs and stubs to pack in the columnar layout.
+
+    Lists, tuples, and dicts are walked recursively, so the lists are found
+    in task arguments and results wherever they are.
+    """
+    obj_type = type(obj)
+    if obj_type is list:
+        if obj:
+            item_type = type(obj[0])
+            code = _column_codes().get(item_type)
+            if code is not None and all(type(i) is item_type for i in obj):
+                return _Columns(code, obj)
+        return [_to_columns(i) for i in obj]
+    if obj_type is tuple:
+        return tuple(_to_columns(i) for i in obj)
+    if isinstance(obj, dict):
+        return {k: _to_columns(v) for k, v in obj.items()}
+    return obj
+
+
+def _default(obj: Any) -> Any:
+    """Pack objects which msgpack does not support natively.
+
+    Msgpack is used with strict types, so it does not pack tuples and dict
+    subclasses (e.g. Celery signatures) on its own.
+    """
+    if isinstance(obj, _Columns):
+        return msgpack.ExtType(obj.code, COLUMN_PACKERS[obj.code](obj))
+    code = _column_codes().get(type(obj))
+    if code is not None:
+        return msgpack.ExtType(SINGLE_CODES[code], COLUMN_PACKERS[code]([obj]))
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(EXT_DATETIME, _pack_datetime(obj))
+    if isinstance(obj, tuple):
+        return list(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    raise TypeError(f"Can not serialize {type(obj).__name__!r} object")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    """Unpack msgpack extension types."""
+    unpack = EXT_UNPACKERS.get(code)
+    if unpack is None:
+        return msgpack.ExtType(code, data)
+    return unpack(data)
+
+
+def _packb(obj: Any) -> bytes:
+    """Pack object with msgpack."""
+    return msgpack.packb(
+        obj, default=_default, strict_types=True, use_bin_type=True,
+    )
+
+
+def _unpackb(data: bytes) -> Any:
+    """Unpack object packed with `_packb`."""
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize object.
+
+    Args:
+        obj (Any): An object to serialize.
+
+    Returns:
+        bytes: A serialized object.
+
+    Raises:
+        TypeError: if object (or its item) is not supported.
+    """
+    return _packb(_to_columns(obj))
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize object.
+
+    Args:
+        data (bytes): A serialized object.
+
+    Returns:
+        Any: A deserialized object.
+    """
+    return _unpackb(data)
+
+
+def register() -> None:
+    """Register the serializer with Celery."""
+    kombu.serialization.register(
+        NAME,
+        dumps,
+        loads,
+        content_type=CONTENT_TYPE,
+        content_encoding="binary",
+    )
@@ -1,5 +1,15 @@
 
 from rss_reader.workers.tasks.fetch_icon import fetch_feed_icon  # noqa
+from rss_reader.workers.tasks.fetch_icon import fetch_feeds_icons  # noqa
+from rss_reader.workers.tasks.partitions import manage_post_partitions  # noqa
+from rss_reader.workers.tasks.post_counters import age_post_counters  # noqa
+from rss_reader.workers.tasks.process_feeds import dispatch_shards  # noqa
 from rss_reader.workers.tasks.process_feeds import load_feeds_updates  # noqa
 from rss_reader.workers.tasks.process_feeds import parse_feed  # noqa
+from rss_reader.workers.tasks.process_feeds import parse_feed_batch  # noqa
+from rss_reader.workers.tasks.process_feeds import parse_pushed_feed  # noqa
+from rss_reader.workers.tasks.process_feeds import save_feed_batches  # noqa
 from rss_reader.workers.tasks.process_feeds import save_feeds_updates  # noqa
+from rss_reader.workers.tasks.process_feeds import stream_feed_batch  # noqa
+from rss_reader.workers.tasks.retention import enforce_post_retention  # noqa
+from rss_reader.workers.tasks.subscriptions import renew_websub_subscriptions  # noqa
@@ -2,6 +2,8 @@
 Module with the base tasks definition.
 """
 
+import threading
+
 import celery
 import sqlalchemy as sa
 import sqlalchemy.orm
@@ -10,12 +12,18 @@ from rss_reader.db import session as db_session
 
 
 class DatabaseTask(celery.Task):  # noqa
-    """Base Task class which caches DB connection."""
-    _db = None
+    """Base Task class which caches DB connection.
+
+    Each task has its own session in each thread, so tasks can run in the
+    threads pool.
+    """
+    _sessions = threading.local()
 
     @property
     def db(self) -> sa.orm.Session:
         """Get DB session."""
-        if self._db is None:
-            self._db = db_session.SessionLocal()
-        return self._db
+        db = getattr(self._sessions, self.name, None)
+        if db is None:
+            db = db_session.SessionLocal()
+            setattr(self._sessions, self.name, db)
+        return db
@@ -2,12 +2,16 @@
 Module with the task for fetching feed icon.
 """
 
+from typing import List
+from datetime import datetime
+
 import celery.utils
 import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as sa_pg
 import sqlalchemy.orm
 
 from rss_reader import models
-from rss_reader import utils
+from rss_reader.fetcher import icons
 from rss_reader.workers.app import app
 from rss_reader.workers.tasks import base
 
@@ -19,6 +23,9 @@ logger = celery.utils.log.get_logger(__name__)
 def fetch_feed_icon(feed_id: int) -> None:
     """Fetch feed icon.
 
+    Icons are cached per host by the worker process, so feeds of the same
+    site do not look it up again.
+
     Args:
         feed_id (int): A feed ID in DB.
     """
@@ -28,8 +35,89 @@ def fetch_feed_icon(feed_id: int) -> None:
         logger.info("Feed %s has been deleted, cancel icon fetching.", feed_id)
         return
 
-    fetched_icon = utils.extract_icon_url(feed_obj.url)
-    feed_obj.icon = fetched_icon
-    db.add(feed_obj)
+    save_icons(db, [feed_obj], [icons.IconSource(page_url=feed_obj.url)])
+    db.commit()
 
+
+@app.task(base=base.DatabaseTask)
+def fetch_feeds_icons(feed_ids: List[int]) -> None:
+    """Fetch icons of feeds concurrently.
+
+    Icons are fetched from the current icon URLs of feeds if they are set,
+    e.g. by initial data, and are looked up on the feed sites otherwise.
+
+    Args:
+        feed_ids (List[int]): Feed IDs in DB.
+    """
+    db: sa.orm.Session = fetch_feeds_icons.db
+    feeds = db.query(models.RssFeed).filter(
+        models.RssFeed.id.in_(feed_ids),
+    ).all()
+    saved = save_icons(
+        db,
+        feeds,
+        [icons.IconSource(page_url=f.url, icon_url=f.icon) for f in feeds],
+    )
     db.commit()
+    logger.info("Icons of %d out of %d feeds are saved", saved, len(feeds))
+
+
+def save_icons(
+    db: sa.orm.Session,
+    feeds: List[models.RssFeed],
+    sources: List[icons.IconSource],
+) -> int:
+    """Fetch icons of feeds and store them.
+
+    Icons are stored once per content. Feeds keep their current icons if
+    new ones cannot be fetched, and icons which are not used by any feed
+    anymore are deleted.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        feeds (List[models.RssFeed]): Feeds.
+        sources (List[icons.IconSource]): Icon sources in the order of
+            feeds.
+
+    Returns:
+        int: A number of feeds which icons are fetched.
+    """
+    fetched = icons.fetch_all(sources)
+    new_icons = {i.hash: i for i in fetched if i is not None}
+    if new_icons:
+        now = datetime.utcnow().replace(microsecond=0)
+        db.execute(
+            sa_pg.insert(models.Icon)
+            .values([
+                {
+                    "hash": icon_hash,
+                    "content_type": icon.content_type,
+                    "data": icon.data,
+                    "created_at": now,
+                }
+                for icon_hash, icon in new_icons.items()
+            ])
+            .on_conflict_do_nothing(index_elements=["hash"])
+        )
+
+    old_hashes = set()
+    for feed_obj, icon in zip(feeds, fetched):
+        if icon is None:
+            continue
+        if feed_obj.icon_hash not in (None, icon.hash):
+            old_hashes.add(feed_obj.icon_hash)
+        feed_obj.icon = icon.url
+        feed_obj.icon_hash = icon.hash
+
+    if old_hashes:
+        db.flush()
+        db.execute(
+            sa.delete(models.Icon).where(
+                models.Icon.hash.in_(old_hashes),
+                ~sa.exists().where(
+                    models.RssFeed.icon_hash == models.Icon.hash,
+                ),
+            ),
+            execution_options={"synchronize_session": False},
+        )
+    return sum(icon is not None for icon in fetched)
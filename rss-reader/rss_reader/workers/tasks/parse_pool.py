@@ -0,0 +1,193 @@
+"""
+Module with the process pool which parses fetched feeds.
+"""
+
+from typing import Any, Callable, Optional
+import asyncio
+import concurrent.futures
+import concurrent.futures.process
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+
+from rss_reader.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional["ParsePool"] = None
+_pool_lock = threading.Lock()
+
+
+class ParsePool:
+    """
+    Process pool which parses fetched feeds off the fetching threads.
+
+    Threads of a fetch worker only wait on sockets, and share a single pool
+    of processes which run CPU-bound parsing. No more than `max_pending`
+    feeds are submitted and not parsed yet, submitters wait for a slot
+    beyond that, so fetching does not run ahead of parsing. Without
+    processes feeds are parsed by the submitting thread.
+    """
+
+    def __init__(self, processes: int, max_pending: int):
+        self.processes = processes
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+    ) -> concurrent.futures.Future:
+        """Submit function to run on the pool.
+
+        Blocks until a slot of the pool is free.
+
+        Args:
+            fn (Callable[..., Any]): A module level function.
+            *args (Any): Picklable arguments of the function.
+
+        Returns:
+            concurrent.futures.Future: A future of the function result.
+        """
+        if not self.processes:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as err:
+                future.set_exception(err)
+            return future
+
+        self._slots.acquire()
+        try:
+            future = self._submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run function on the pool without blocking the event loop.
+
+        Args:
+            fn (Callable[..., Any]): A module level function.
+            *args (Any): Picklable arguments of the function.
+
+        Returns:
+            Any: The function result.
+        """
+        if not self.processes:
+            return fn(*args)
+        # A slot is waited for in a thread, so the loop keeps reading
+        # responses which are in flight.
+        future = await asyncio.get_running_loop().run_in_executor(
+            None, self.submit, fn, *args,
+        )
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Stop pool processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+    ) -> concurrent.futures.Future:
+        """Submit function to the executor, replacing a broken one."""
+        with self._lock:
+            executor = self._executor
+            if executor is not None:
+                try:
+                    future = executor.submit(fn, *args)
+                except concurrent.futures.process.BrokenProcessPool:
+                    self._discard(executor)
+                    executor = None
+            if executor is None:
+                executor = self._executor = (
+                    concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.processes,
+                        # Processes are not forked from a threaded worker.
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_process,
+                        initargs=(logging.getLogger().level,),
+                    )
+                )
+                future = executor.submit(fn, *args)
+        future.add_done_callback(
+            functools.partial(self._check_executor, executor),
+        )
+        return future
+
+    def _check_executor(
+        self,
+        executor: concurrent.futures.ProcessPoolExecutor,
+        future: concurrent.futures.Future,
+    ) -> None:
+        """Discard executor if the future has failed since it is broken."""
+        if future.cancelled() or not isinstance(
+            future.exception(), concurrent.futures.process.BrokenProcessPool,
+        ):
+            return
+        with self._lock:
+            self._discard(executor)
+
+    def _discard(
+        self,
+        executor: concurrent.futures.ProcessPoolExecutor,
+    ) -> None:
+        """Discard broken executor, so the next submit starts a new one.
+
+        A process has died, e.g. killed for memory, and every future of the
+        executor fails, so the pool is started anew. The lock is held.
+        """
+        if self._executor is executor:
+            logger.error("Parse pool is broken, restarting it")
+            executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _init_process(log_level: int) -> None:
+    """Set up logging of pool process like the worker one."""
+    logging.basicConfig(
+        level=log_level,
+        format="[%(asctime)s: %(levelname)s/%(processName)s] %(message)s",
+    )
+
+
+def get_pool() -> ParsePool:
+    """Get the parse pool of the process.
+
+    The pool has `RSS_PARSE_PROCESSES` processes, a process per CPU core
+    by default. Daemonic processes, e.g. children of a prefork worker,
+    cannot start processes, so they parse feeds on their own.
+
+    Returns:
+        ParsePool: A parse pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            processes = settings.RSS_PARSE_PROCESSES
+            if processes is None:
+                processes = os.cpu_count() or 1
+            if multiprocessing.current_process().daemon:
+                processes = 0
+            _pool = ParsePool(
+                processes,
+                max_pending=settings.RSS_PARSE_BACKLOG or 2 * processes or 1,
+            )
+            logger.info(
+                "Parse pool: %d processes, %d feeds backlog",
+                _pool.processes, _pool.max_pending,
+            )
+        return _pool
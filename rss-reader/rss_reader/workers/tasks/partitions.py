@@ -0,0 +1,191 @@
+"""
+Module with the maintenance of monthly partitions of posts.
+
+Partitions are created ahead of the months they are for, so new posts do
+not pile up in the default partition, and partitions of old months are
+detached or dropped, see `rss_reader.db.partitions`. Like the retention of
+posts, partitions of old months are kept while they hold any of the newest
+`RSS_POST_RETENTION_MIN_POSTS` posts of a feed, see
+`rss_reader.workers.tasks.retention`.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+from datetime import datetime
+
+import celery.utils
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.config import settings
+from rss_reader.db import partitions
+from rss_reader.workers.app import app
+from rss_reader.workers.tasks import base
+
+
+logger = celery.utils.log.get_logger(__name__)
+
+# Partitions are changed under locks of the posts tables, so changes give up
+# rather than block saves and listings of posts for long.
+LOCK_TIMEOUT = "10s"
+
+
+def plan(
+    months: List[datetime],
+    now: datetime,
+    ahead: int,
+    retention: Optional[int],
+) -> Tuple[List[datetime], List[datetime]]:
+    """Plan changes of monthly partitions.
+
+    Args:
+        months (List[datetime]): Months which partitions exist for.
+        now (datetime): The current datetime.
+        ahead (int): A number of months to create partitions ahead.
+        retention (Optional[int]): A number of months to keep partitions
+            for, all partitions are kept if None.
+
+    Returns:
+        Tuple[List[datetime], List[datetime]]: Months to create partitions
+            for, and months to remove partitions of.
+    """
+    current = partitions.month_start(now)
+    existing = set(months)
+    create = [
+        month
+        for month in (
+            partitions.add_months(current, i) for i in range(ahead + 1)
+        )
+        if month not in existing
+    ]
+    if retention is None:
+        return create, []
+    oldest = partitions.add_months(current, -retention)
+    return create, [month for month in sorted(existing) if month < oldest]
+
+
+def holds_kept_posts(
+    db: sa.orm.Session,
+    month: datetime,
+    min_posts: int,
+) -> bool:
+    """Check if partitions of month hold the newest posts of any feed.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        month (datetime): A month start.
+        min_posts (int): A number of the newest posts of each feed to keep.
+
+    Returns:
+        bool: True if any of the newest `min_posts` posts of a feed is
+            published within the month.
+    """
+    if min_posts <= 0:
+        return False
+    # The newest posts of each feed are read from the index on feeds and
+    # publication datetimes.
+    newer = sa.orm.aliased(models.Post)
+    oldest_kept = (
+        sa.select(newer.published_at)
+        .where(newer.rss_feed_id == models.Post.rss_feed_id)
+        .order_by(newer.published_at.desc())
+        .offset(min_posts - 1)
+        .limit(1)
+        .scalar_subquery()
+    )
+    kept = (
+        sa.select(models.Post.id)
+        .where(
+            models.Post.published_at >= month,
+            models.Post.published_at < partitions.add_months(month, 1),
+            sa.or_(
+                oldest_kept.is_(None),
+                models.Post.published_at >= oldest_kept,
+            ),
+        )
+        .exists()
+    )
+    return db.execute(sa.select(kept)).scalar()
+
+
+def maintain(
+    db: sa.orm.Session,
+    now: Optional[datetime] = None,
+) -> Tuple[List[datetime], List[datetime]]:
+    """Create upcoming partitions of posts and remove expired ones.
+
+    Each month is changed in its own transaction, a month which partitions
+    are locked by others is skipped until the next run. Expired partitions
+    which hold any of the newest posts of a feed are kept.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        now (Optional[datetime]): The current datetime, defaults to now.
+
+    Returns:
+        Tuple[List[datetime], List[datetime]]: Months which partitions are
+            created for, and months which partitions are removed of.
+    """
+    create, remove = plan(
+        partitions.list_months(db, partitions.POST_TABLES[0]),
+        now or datetime.utcnow(),
+        settings.RSS_POST_PARTITIONS_AHEAD,
+        settings.RSS_POST_PARTITIONS_RETENTION,
+    )
+    db.rollback()
+    drop = settings.RSS_POST_PARTITIONS_EXPIRED == "drop"
+    created = [
+        month for month in create
+        if _change(db, month, partitions.create_partitions)
+    ]
+    removed = [
+        month for month in remove
+        if not _keep(db, month)
+        and _change(db, month, partitions.remove_partitions, drop=drop)
+    ]
+    return created, removed
+
+
+def _keep(db: sa.orm.Session, month: datetime) -> bool:
+    """Check if expired partitions of month are to be kept."""
+    if holds_kept_posts(db, month, settings.RSS_POST_RETENTION_MIN_POSTS):
+        db.rollback()
+        logger.info(
+            "Partitions of %s hold the newest posts of feeds, keep them",
+            f"{month:%Y-%m}",
+        )
+        return True
+    return False
+
+
+def _change(
+    db: sa.orm.Session,
+    month: datetime,
+    change: Callable[..., None],
+    **kwargs: Any,
+) -> bool:
+    """Change partitions of month in a transaction, True if changed."""
+    try:
+        db.execute(sa.text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        change(db, month, **kwargs)
+        db.commit()
+    except sa.exc.OperationalError as err:
+        db.rollback()
+        logger.warning(
+            "Partitions of %s are not changed: %s", f"{month:%Y-%m}", err,
+        )
+        return False
+    return True
+
+
+@app.task(base=base.DatabaseTask)
+def manage_post_partitions() -> None:
+    """Create upcoming partitions of posts and remove expired ones."""
+    created, removed = maintain(manage_post_partitions.db)
+    logger.info(
+        "Post partitions are created for %d months, and %s for %d months",
+        len(created),
+        "dropped" if settings.RSS_POST_PARTITIONS_EXPIRED == "drop"
+        else "detached",
+        len(removed),
+    )
@@ -0,0 +1,221 @@
+"""
+Module with the rolling post counters of feeds.
+
+Posts are counted in hourly buckets per feed. Feed counters are incremented
+when posts are saved, and posts which leave the counters windows are aged
+out by a periodic task, so counters are correct for feeds which are not
+polled too.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from datetime import timedelta
+import collections
+
+import celery.utils
+import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as sa_pg
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.db import utils as db_utils
+from rss_reader.workers.app import app
+from rss_reader.workers.tasks import base
+
+
+logger = celery.utils.log.get_logger(__name__)
+
+BUCKET = timedelta(hours=1)
+
+# Feed counter columns by their windows.
+WINDOWS = {
+    "posts_last_day": timedelta(days=1),
+    "posts_last_week": timedelta(days=7),
+    "posts_last_month": timedelta(days=30),
+}
+
+
+def bucket_start(value: datetime) -> datetime:
+    """Get the start of bucket which datetime belongs to.
+
+    Args:
+        value (datetime): A datetime.
+
+    Returns:
+        datetime: A bucket start.
+    """
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def window_starts(now: datetime) -> Dict[str, datetime]:
+    """Get the first bucket of each counter window.
+
+    Args:
+        now (datetime): The current datetime.
+
+    Returns:
+        Dict[str, datetime]: Bucket starts by counter columns.
+    """
+    return {
+        name: bucket_start(now - window) for name, window in WINDOWS.items()
+    }
+
+
+def count_posts(
+    posts: Iterable[Tuple[int, datetime]],
+    now: datetime,
+) -> Tuple[Dict[Tuple[int, datetime], int], Dict[int, Dict[str, int]]]:
+    """Count posts in buckets and counter windows.
+
+    Posts which are older than the longest window are not counted.
+
+    Args:
+        posts (Iterable[Tuple[int, datetime]]): Feed IDs and publish dates
+            of posts.
+        now (datetime): The current datetime.
+
+    Returns:
+        Tuple[Dict[Tuple[int, datetime], int], Dict[int, Dict[str, int]]]:
+            Post counts by feed IDs and buckets, and counter increments by
+            feed IDs.
+    """
+    starts = window_starts(now)
+    oldest = min(starts.values())
+    buckets = collections.Counter()
+    for feed_id, published_at in posts:
+        bucket = bucket_start(published_at)
+        if bucket >= oldest:
+            buckets[feed_id, bucket] += 1
+
+    increments = {}
+    for (feed_id, bucket), count in buckets.items():
+        feed_increments = increments.setdefault(
+            feed_id, dict.fromkeys(WINDOWS, 0),
+        )
+        for name, start in starts.items():
+            if bucket >= start:
+                feed_increments[name] += count
+    return dict(buckets), increments
+
+
+def add_posts(
+    db: sa.orm.Session,
+    posts: List[Tuple[int, datetime]],
+    now: Optional[datetime] = None,
+) -> None:
+    """Count saved posts in buckets and feed counters.
+
+    Buckets are upserted and counters are incremented with one statement
+    each, changes are not committed.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        posts (List[Tuple[int, datetime]]): Feed IDs and publish dates of
+            saved posts.
+        now (Optional[datetime]): The current datetime, defaults to now.
+    """
+    buckets, increments = count_posts(posts, now or datetime.utcnow())
+    if not buckets:
+        return
+
+    new_buckets = db_utils.unnest(
+        models.PostCountBucket.__table__,
+        ["rss_feed_id", "bucket", "count"],
+        [
+            {"rss_feed_id": feed_id, "bucket": bucket, "count": count}
+            for (feed_id, bucket), count in buckets.items()
+        ],
+        "new_buckets",
+    )
+    insert_stmt = sa_pg.insert(models.PostCountBucket).from_select(
+        ["rss_feed_id", "bucket", "count"],
+        sa.select(new_buckets),
+    )
+    db.execute(insert_stmt.on_conflict_do_update(
+        index_elements=["rss_feed_id", "bucket"],
+        set_={
+            "count": models.PostCountBucket.count + insert_stmt.excluded.count,
+        },
+    ))
+
+    names = ["id", *WINDOWS]
+    feed_increments = db_utils.unnest(
+        models.RssFeed.__table__,
+        names,
+        [{"id": feed_id, **counts} for feed_id, counts in increments.items()],
+        "feed_increments",
+    )
+    db.execute(
+        sa.update(models.RssFeed)
+        .where(models.RssFeed.id == feed_increments.c.id)
+        .values({
+            name: models.RssFeed.__table__.c[name] + feed_increments.c[name]
+            for name in WINDOWS
+        }),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def age(db: sa.orm.Session, now: Optional[datetime] = None) -> int:
+    """Age out posts which left the counters windows.
+
+    Buckets older than the longest window are deleted, and feed counters
+    are recounted from the rest, only changed feeds are updated.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        now (Optional[datetime]): The current datetime, defaults to now.
+
+    Returns:
+        int: A number of updated feeds.
+    """
+    starts = window_starts(now or datetime.utcnow())
+    db.execute(
+        sa.delete(models.PostCountBucket)
+        .where(models.PostCountBucket.bucket < min(starts.values())),
+        execution_options={"synchronize_session": False},
+    )
+
+    sums = (
+        sa.select(
+            models.PostCountBucket.rss_feed_id,
+            *(
+                sa.func.sum(models.PostCountBucket.count)
+                .filter(models.PostCountBucket.bucket >= start)
+                .label(name)
+                for name, start in starts.items()
+            ),
+        )
+        .group_by(models.PostCountBucket.rss_feed_id)
+        .subquery()
+    )
+    counters = (
+        sa.select(
+            models.RssFeed.id,
+            *(
+                sa.func.coalesce(sums.c[name], 0).label(name)
+                for name in WINDOWS
+            ),
+        )
+        .outerjoin(sums, sums.c.rss_feed_id == models.RssFeed.id)
+        .subquery()
+    )
+    columns = models.RssFeed.__table__.c
+    result = db.execute(
+        sa.update(models.RssFeed)
+        .where(
+            models.RssFeed.id == counters.c.id,
+            sa.or_(*(columns[name] != counters.c[name] for name in WINDOWS)),
+        )
+        .values({name: counters.c[name] for name in WINDOWS}),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return result.rowcount
+
+
+@app.task(base=base.DatabaseTask)
+def age_post_counters() -> None:
+    """Age out posts which left the rolling post counters windows."""
+    updated = age(age_post_counters.db)
+    logger.info("Post counters of %d feeds are aged out", updated)
@@ -2,47 +2,115 @@
 Module with the task for loading feeds updates.
 """
 
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from datetime import timedelta
-import functools
+import itertools
+import uuid
 
 import celery.utils
 import feedparser
+import lxml.etree
 import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as sa_pg
 import sqlalchemy.orm
 
+from rss_reader import fetcher
 from rss_reader import models
 from rss_reader import utils
+from rss_reader import websub
+from rss_reader.config import settings
+from rss_reader.db import compression
+from rss_reader.db import utils as db_utils
+from rss_reader.fetcher import archive as fetch_archive
+from rss_reader.fetcher import exceptions as fetcher_exceptions
+from rss_reader.workers import metrics
 from rss_reader.workers.app import app
 from rss_reader.workers.tasks import base
 from rss_reader.workers.tasks import exceptions
+from rss_reader.workers.tasks import parse_pool
+from rss_reader.workers.tasks import post_counters
+from rss_reader.workers.tasks import scheduling
+from rss_reader.workers.tasks import stream_parser
 from rss_reader.workers.tasks import utils as task_utils
+from rss_reader.workers.tasks import writer as feeds_writer
 
 
 logger = celery.utils.log.get_logger(__name__)
 
+# Posts and feeds are saved in chunks, so statements stay of a reasonable
+# size.
+SAVE_CHUNK_SIZE = 5000
+
+# Feed columns which are loaded and updated when feeds are saved.
+FEED_STATE_COLUMNS = (
+    "id",
+    "modified_at",
+    "etag",
+    "content_hash",
+    "wire_size",
+    "body_size",
+    "parsed_at",
+    "unchanged_rate",
+    "next_fetch_at",
+    "failures_count",
+    "last_error",
+    "backoff_until",
+    "disabled_at",
+    "hub_url",
+    "hub_topic",
+)
+
 
 @app.task(base=base.DatabaseTask)
 def load_feeds_updates() -> None:
-    """Load updates from feeds in DB."""
-    db: sa.orm.Session = load_feeds_updates.db
-
-    parse_feed_jobs = [
-        parse_feed.s(
-            feed_id=f.id,
-            url=f.rss,
-            prev_parsed_at=f.parsed_at,
-            modified_at=f.modified_at,
-            etag=f.etag,
-        )
-        for f in db.query(models.RssFeed).all()
-    ]
+    """Load updates from feeds in DB which are due to be fetched."""
+    feed_jobs = _lease_due_feeds(load_feeds_updates.db, datetime.utcnow())
+    if not feed_jobs:
+        logger.info("No feeds are due to be fetched")
+        return
+
+    run_id = uuid.uuid4().hex
+    if settings.RSS_PERSIST_MODE == "stream":
+        # Batches save their feeds on their own, so there are no shards.
+        lanes = [celery.group(
+            stream_feed_batch.s(batch, run_id=run_id)
+            for batch in utils.chunks(feed_jobs, settings.RSS_FETCH_BATCH_SIZE)
+        )]
+        shards_total = 0
+    else:
+        lanes_shards = _shard_jobs(feed_jobs)
+        lanes = [
+            dispatch_shards.si(shards, run_id) for shards in lanes_shards
+        ]
+        shards_total = sum(map(len, lanes_shards))
 
-    parse_jobs_group = celery.group(parse_feed_jobs)
-    celery.chord(parse_jobs_group)(
-        save_feeds_updates.signature(),
+    metrics.start_run(
+        metrics.get_client(),
+        run_id,
+        feeds_total=len(feed_jobs),
+        shards_total=shards_total,
     )
+    logger.info(
+        "Run %s: %d feeds are due to be fetched in %d shards (%s mode)",
+        run_id, len(feed_jobs), shards_total, settings.RSS_PERSIST_MODE,
+    )
+    for lane in lanes:
+        lane.apply_async()
+
+
+@app.task(ignore_result=True)
+def dispatch_shards(
+    shards: List[List[task_utils.FeedJob]],
+    run_id: str,
+) -> None:
+    """Dispatch the first shard of a lane, and the rest of it after that.
+
+    Args:
+        shards (List[List[FeedJob]]): Shards of the lane.
+        run_id (str): An ID of run to record progress of.
+    """
+    _shard_chord(shards[0], shards[1:], run_id).apply_async()
 
 
 @app.task
@@ -65,67 +133,700 @@ def parse_feed(
     Returns:
         FeedStub: An object representing parsed feed.
     """
+    job = task_utils.FeedJob(
+        id=feed_id,
+        url=url,
+        prev_parsed_at=prev_parsed_at,
+        modified_at=modified_at,
+        etag=etag,
+    )
+    feed, = _fetch_and_parse([job], concurrency=1)
+    return feed
+
+
+@app.task
+def parse_feed_batch(
+    jobs: List[task_utils.FeedJob],
+) -> List[task_utils.FeedStub]:
+    """Parse a batch of feeds.
+
+    All feeds of the batch are fetched concurrently on a single event loop
+    which shares a keep-alive connection pool, so waiting on sockets does not
+    hold a worker process per feed.
+
+    Args:
+        jobs (List[FeedJob]): Feeds to parse.
+
+    Returns:
+        List[FeedStub]: Objects representing parsed feeds.
+    """
+    return _fetch_and_parse(jobs, concurrency=settings.RSS_FETCH_CONCURRENCY)
+
+
+@app.task(ignore_result=True)
+def stream_feed_batch(
+    jobs: List[task_utils.FeedJob],
+    run_id: Optional[str] = None,
+) -> None:
+    """Parse a batch of feeds and save them as soon as they are parsed.
+
+    Each feed is parsed as soon as it is fetched, and parsed feeds are sent
+    to be saved in micro-batches, so new posts are saved within seconds and
+    do not wait for the slowest feed of the batch.
+
+    Args:
+        jobs (List[FeedJob]): Feeds to parse.
+        run_id (Optional[str]): An ID of run to record progress of.
+    """
+    def send(feeds: List[task_utils.FeedStub]) -> None:
+        save_feeds_updates.apply_async((feeds,), {"run_id": run_id})
+
+    writer = feeds_writer.BatchingWriter(
+        send,
+        batch_size=settings.RSS_PERSIST_BATCH_SIZE,
+        max_delay=settings.RSS_PERSIST_MAX_DELAY,
+    )
+
+    try:
+        _fetch_and_parse(
+            jobs,
+            concurrency=settings.RSS_FETCH_CONCURRENCY,
+            on_parsed=writer.add,
+        )
+    finally:
+        writer.flush()
+
+
+@app.task(base=base.DatabaseTask)
+def save_feeds_updates(
+    feeds: List[task_utils.FeedStub],
+    run_id: Optional[str] = None,
+) -> None:
+    """Save updates from feeds in DB.
+
+    Save posts parsed from feeds and update the feeds data in DB (i.e. update
+    ETag, Last Modified, and parsed timestamp).
+
+    Args:
+        feeds (List[FeedStub]): A list of parsed feeds.
+        run_id (Optional[str]): An ID of run to record progress of.
+    """
+    feeds = _save_feeds(save_feeds_updates.db, feeds)
+    if run_id is not None:
+        _record_progress(run_id, feeds, shards=0)
+
+
+@app.task(base=base.DatabaseTask)
+def parse_pushed_feed(
+    feed_id: int,
+    body: bytes,
+    headers: Dict[str, str],
+) -> None:
+    """Parse feed content pushed by WebSub hub and send it to be saved.
+
+    Args:
+        feed_id (int): A feed ID in DB.
+        body (bytes): A pushed content.
+        headers (Dict[str, str]): Push request headers with lowercase names.
+    """
+    db: sa.orm.Session = parse_pushed_feed.db
+    feed_obj = db.query(models.RssFeed).get(feed_id)
+    if feed_obj is None:
+        logger.info("Feed %s has been deleted, skip pushed content.", feed_id)
+        return
+    job = _feed_job(feed_obj)
+    # The session is only read, so it does not stay in a transaction.
+    db.rollback()
+    save_feeds_updates.delay([_process_push(job, body, headers)])
+
+
+def _lease_due_feeds(
+    db: sa.orm.Session,
+    now: datetime,
+) -> List[task_utils.FeedJob]:
+    """Lease feeds which are due to be fetched.
+
+    The next fetch of due feeds is moved to the end of their lease in the
+    same transaction which selects them, so they are not due on the next
+    beat tick while they wait in a lane. Saving a feed schedules its next
+    fetch as usual.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        now (datetime): The current datetime.
+
+    Returns:
+        List[FeedJob]: Jobs of leased feeds.
+    """
+    # Feeds which failed are not due until their backoff ends, since the
+    # next_fetch_at is set to the end of backoff.
+    due_feeds = db.query(models.RssFeed).filter(
+        models.RssFeed.disabled_at.is_(None),
+        sa.or_(
+            models.RssFeed.next_fetch_at.is_(None),
+            models.RssFeed.next_fetch_at <= now,
+        ),
+    ).with_for_update(skip_locked=True, of=models.RssFeed)
+
+    feed_jobs = [_feed_job(f) for f in due_feeds.all()]
+    if feed_jobs:
+        db.execute(
+            sa.update(models.RssFeed)
+            .where(models.RssFeed.id.in_([j.id for j in feed_jobs]))
+            .values(next_fetch_at=now + timedelta(
+                seconds=settings.RSS_DISPATCH_LEASE,
+            )),
+            execution_options={"synchronize_session": False},
+        )
+    db.commit()
+    return feed_jobs
+
+
+def _feed_job(feed_obj: models.RssFeed) -> task_utils.FeedJob:
+    """Build feed job for feed.
+
+    Args:
+        feed_obj (models.RssFeed): A feed.
+
+    Returns:
+        FeedJob: A feed job.
+    """
+    return task_utils.FeedJob(
+        id=feed_obj.id,
+        url=feed_obj.rss,
+        prev_parsed_at=feed_obj.parsed_at,
+        modified_at=feed_obj.modified_at,
+        etag=feed_obj.etag,
+        content_hash=feed_obj.content_hash,
+    )
+
+
+def _save_feeds(
+    db: sa.orm.Session,
+    feeds: List[task_utils.FeedStub],
+) -> List[task_utils.FeedStub]:
+    """Save posts and update feeds in DB.
+
+    The number of queries does not depend on the number of feeds, except
+    that rows are written in chunks of `SAVE_CHUNK_SIZE`.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        feeds (List[FeedStub]): A list of parsed feeds.
+
+    Returns:
+        List[FeedStub]: Saved feeds with inserted posts only.
+    """
+    _lock_feeds(db, [f.id for f in feeds])
+    feeds = _save_posts(db, feeds)
+    feeds = _update_feeds(db, feeds)
+    db.commit()
+    return feeds
+
+
+def _lock_feeds(db: sa.orm.Session, feed_ids: List[int]) -> None:
+    """Lock rows of feeds until the end of the transaction.
+
+    Feeds are updated from their current state, so concurrent updates of
+    them, e.g. by the API or by other saves, wait for the transaction to end
+    instead of being overwritten. Rows are locked in the order of their IDs,
+    so concurrent saves of the same feeds do not deadlock. The lock still
+    lets others insert posts of the feeds.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        feed_ids (List[int]): Feed IDs.
+    """
+    for chunk in utils.chunks(sorted(set(feed_ids)), SAVE_CHUNK_SIZE):
+        db.execute(
+            sa.select(models.RssFeed.id)
+            .where(models.RssFeed.id.in_(chunk))
+            .order_by(models.RssFeed.id)
+            .with_for_update(key_share=True)
+        )
+
+
+@app.task(base=base.DatabaseTask)
+def save_feed_batches(
+    batches: List[List[task_utils.FeedStub]],
+    run_id: Optional[str] = None,
+) -> None:
+    """Save updates from batches of feeds in DB.
+
+    Args:
+        batches (List[List[FeedStub]]): Lists of parsed feeds.
+        run_id (Optional[str]): An ID of run to record progress of.
+    """
+    feeds = _save_feeds(
+        save_feed_batches.db,
+        list(itertools.chain.from_iterable(batches)),
+    )
+    if run_id is not None:
+        _record_progress(run_id, feeds, shards=1)
+
+
+def _record_progress(
+    run_id: str,
+    feeds: List[task_utils.FeedStub],
+    *,
+    shards: int,
+) -> None:
+    """Record and log progress of run.
+
+    Args:
+        run_id (str): A run ID.
+        feeds (List[FeedStub]): Saved feeds.
+        shards (int): A number of saved shards.
+    """
+    run = metrics.record_saved(
+        metrics.get_client(),
+        run_id,
+        feeds=len(feeds),
+        posts=sum(len(f.posts) for f in feeds),
+        failed=sum(f.error is not None for f in feeds),
+        shards=shards,
+    )
+    logger.info(
+        "Run %s: %s/%s shards, %s/%s feeds saved, %s posts, %s failed",
+        run_id, run.get("shards_done"), run.get("shards_total"),
+        run.get("feeds_done"), run.get("feeds_total"),
+        run.get("posts_saved"), run.get("feeds_failed"),
+    )
+
+
+def _shard_jobs(
+    jobs: List[task_utils.FeedJob],
+) -> List[List[List[task_utils.FeedJob]]]:
+    """Split feed jobs into shards spread over lanes.
+
+    Shards are spread over `RSS_DISPATCH_SHARDS_IN_FLIGHT` lanes, where each
+    lane starts the next shard once the previous one is saved or failed, see
+    `dispatch_shards`.
+
+    Args:
+        jobs (List[FeedJob]): Feeds to parse.
+
+    Returns:
+        List[List[List[FeedJob]]]: Shards of each lane.
+    """
+    shards = list(utils.chunks(jobs, settings.RSS_DISPATCH_SHARD_SIZE))
+    lanes = [[] for _ in range(
+        min(settings.RSS_DISPATCH_SHARDS_IN_FLIGHT, len(shards))
+    )]
+    for num, shard in enumerate(shards):
+        lanes[num % len(lanes)].append(shard)
+    return lanes
+
+
+def _shard_chord(
+    shard: List[task_utils.FeedJob],
+    next_shards: List[List[task_utils.FeedJob]],
+    run_id: str,
+) -> celery.canvas.Signature:
+    """Build chord of a shard which dispatches the next shards of its lane.
+
+    A shard is a chord of feed batches with its own save callback, so a slow
+    feed delays saving of its shard only. The next shards are dispatched
+    both when the shard is saved and when its batches or its save fail, so
+    a failed shard does not cancel the rest of its lane.
+
+    Args:
+        shard (List[FeedJob]): Feeds of the shard.
+        next_shards (List[List[FeedJob]]): The next shards of the lane.
+        run_id (str): A run ID.
+
+    Returns:
+        celery.canvas.Signature: A chord to apply.
+    """
+    save = save_feed_batches.s(run_id=run_id)
+    if next_shards:
+        # The signature is immutable, so it ignores both the result of the
+        # save and the failure which is passed to error callbacks.
+        dispatch_next = dispatch_shards.si(next_shards, run_id)
+        save.link(dispatch_next)
+        save.link_error(dispatch_next)
+    return celery.chord(
+        [
+            parse_feed_batch.si(batch)
+            for batch in utils.chunks(shard, settings.RSS_FETCH_BATCH_SIZE)
+        ],
+        save,
+    )
+
+
+def _fetch_and_parse(
+    jobs: List[task_utils.FeedJob],
+    *,
+    concurrency: int,
+    on_parsed: Optional[Callable[[task_utils.FeedStub], None]] = None,
+) -> List[task_utils.FeedStub]:
+    """Fetch feeds and parse each one as soon as it is fetched.
+
+    Fetching only waits on sockets, while fetched feeds are parsed on the
+    parse pool, so parsing neither blocks the event loop nor holds the GIL
+    of the fetching threads. Fetches wait for a slot of the pool once its
+    backlog is full. Raw responses are archived if `RSS_FETCH_ARCHIVE_DIR`
+    is set.
+
+    Args:
+        jobs (List[FeedJob]): Feeds to parse.
+        concurrency (int): A maximum number of simultaneous fetches.
+        on_parsed (Optional[Callable[[FeedStub], None]]): A function which
+            is called on the event loop with each parsed feed; optional.
+
+    Returns:
+        List[FeedStub]: Objects representing parsed feeds.
+    """
+    pool = parse_pool.get_pool()
+    feeds: List[Optional[task_utils.FeedStub]] = [None] * len(jobs)
+
+    async def on_result(index: int, result: fetcher.FetchResult) -> None:
+        job = jobs[index]
+        feed = _skip_response(job, result)
+        if feed is None:
+            try:
+                feed = await pool.run(_parse_response, job, result)
+            except Exception as err:
+                # E.g. a pool process has died, or the feed can not be
+                # passed to it, which fails this feed only.
+                logger.exception("Feed %d: failed to parse", job.id)
+                feed = _failed_feed(job, err)
+        feeds[index] = feed
+        if on_parsed is not None:
+            on_parsed(feed)
 
-    # Clients should support both ETag and Last-Modified headers, as some
-    # servers support one but not the other. These are needed to avoid
-    # download feeds that have not changed, save bandwidth, and prevent
-    # possible bans from feed publishers.
-    parsed_feed = feedparser.parse(url, modified=modified_at, etag=etag)
+    archive = fetch_archive.get_writer()
+    fetcher.fetch_all(
+        [_fetch_request(j) for j in jobs],
+        concurrency=concurrency,
+        on_result=on_result,
+        on_fetched=archive.write if archive is not None else None,
+    )
+    return feeds
+
+
+def _fetch_request(job: task_utils.FeedJob) -> fetcher.FetchRequest:
+    """Build fetch request for feed job.
+
+    Clients should support both ETag and Last-Modified headers, as some
+    servers support one but not the other. These are needed to avoid
+    download feeds that have not changed, save bandwidth, and prevent
+    possible bans from feed publishers.
+
+    Args:
+        job (FeedJob): A feed job.
+
+    Returns:
+        FetchRequest: A fetch request.
+    """
+    return fetcher.FetchRequest(
+        url=job.url,
+        modified=job.modified_at,
+        etag=job.etag,
+    )
+
+
+def _skip_response(
+    job: task_utils.FeedJob,
+    result: fetcher.FetchResult,
+) -> Optional[task_utils.FeedStub]:
+    """Convert fetched feed which is not to be parsed to FeedStub.
+
+    Feeds which failed, have not been modified, or have the same content as
+    the last time are not parsed.
+
+    Args:
+        job (FeedJob): A feed job.
+        result (FetchResult): A fetch result.
+
+    Returns:
+        Optional[FeedStub]: An object representing skipped feed, or None if
+            feed is to be parsed.
+    """
     parsed_at = datetime.utcnow().replace(microsecond=0)
 
+    if not result.ok:
+        error = deferred_until = None
+        if isinstance(result.error, fetcher_exceptions.HostDeferred):
+            # The feed is fine, it is its host which asks to slow down, so
+            # the feed is neither failed nor polled successfully.
+            logger.info("Feed %d: %s", job.id, result.error)
+            deferred_until = parsed_at + timedelta(seconds=result.error.delay)
+        elif result.error is not None:
+            logger.error(
+                "Feed %d: failed to fetch %s: %s", job.id, job.url, result.error
+            )
+            error = _error_name(result.error)
+        else:
+            logger.info("Feed %d: not modified", job.id)
+        # Keep validators from the previous fetch, so the next one is still
+        # a conditional request.
+        return task_utils.FeedStub(
+            id=job.id,
+            url=job.url,
+            parsed_at=parsed_at,
+            modified=job.modified_at,
+            etag=job.etag,
+            content_hash=job.content_hash,
+            posts=(),
+            error=error,
+            deferred_until=deferred_until,
+        )
+
+    logger.info(
+        "Feed %d: fetched %d bytes, %d bytes on the wire",
+        job.id, result.body_size, result.wire_size,
+    )
+
+    # About half of publishers send neither ETag nor Last-Modified, so the
+    # feed body is compared with the previous one to skip parsing.
+    content_hash = result.content_hash
+    if content_hash == job.content_hash:
+        logger.info("Feed %d: content has not changed", job.id)
+        return task_utils.FeedStub(
+            id=job.id,
+            url=job.url,
+            parsed_at=parsed_at,
+            modified=result.modified,
+            etag=result.etag,
+            content_hash=content_hash,
+            posts=(),
+            wire_size=result.wire_size,
+            body_size=result.body_size,
+        )
+    return None
+
+
+def _failed_feed(
+    job: task_utils.FeedJob,
+    err: Exception,
+) -> task_utils.FeedStub:
+    """Convert feed which failed to be parsed to FeedStub.
+
+    Validators and the content hash of the previous fetch are kept, so the
+    feed is parsed again on the next fetch, and the feed is backed off.
+
+    Args:
+        job (FeedJob): A feed job.
+        err (Exception): A parse error.
+
+    Returns:
+        FeedStub: An object representing failed feed.
+    """
+    return task_utils.FeedStub(
+        id=job.id,
+        url=job.url,
+        parsed_at=datetime.utcnow().replace(microsecond=0),
+        modified=job.modified_at,
+        etag=job.etag,
+        content_hash=job.content_hash,
+        posts=(),
+        error=_error_name(err),
+    )
+
+
+def _parse_response(
+    job: task_utils.FeedJob,
+    result: fetcher.FetchResult,
+) -> task_utils.FeedStub:
+    """Parse fetched feed into FeedStub.
+
+    This is CPU-bound, and it runs on the parse pool, so job and result are
+    pickled.
+
+    Args:
+        job (FeedJob): A feed job.
+        result (FetchResult): A successful fetch result.
+
+    Returns:
+        FeedStub: An object representing parsed feed.
+    """
+    hub = None
+    if settings.RSS_WEBSUB_CALLBACK_URL is not None:
+        hub = websub.discover(result.body, result.headers, result.url)
+
+    error = None
+    modified, etag, content_hash = (
+        result.modified, result.etag, result.content_hash,
+    )
     try:
-        new_posts = []
-        for entry in parsed_feed["entries"]:
-            post_stub = _entry_2_post(entry, feed_id)
-            if _is_post_new(post_stub, prev_parsed_at):
-                new_posts.append(post_stub)
+        entries_count, new_posts = _parse_posts(job, result)
     except exceptions.FeedProcessError as err:
-        logger.error("Skipping feed %s due to error: %s", feed_id, err)
+        logger.error("Skipping feed %s due to error: %s", job.id, err)
         new_posts = []
+        error = _error_name(err)
+        # Validators and the hash of the broken body are not saved, so the
+        # next fetch is parsed again instead of being skipped as unchanged.
+        modified, etag, content_hash = (
+            job.modified_at, job.etag, job.content_hash,
+        )
     else:
         logger.info(
             "Feed %d: fetched %d entries, %d new entries to be saved",
-            feed_id, len(parsed_feed["entries"]), len(new_posts)
+            job.id, entries_count, len(new_posts)
         )
 
     # Some feeds does not publish Last-Modified or ETag at all, which leads
-    # to missing corresponding attributes, which is why `.get()` is used.
-    modified = parsed_feed.get("modified_parsed")
-    etag = parsed_feed.get("etag")
-
+    # to missing corresponding values.
     return task_utils.FeedStub(
-        id=feed_id,
-        url=url,
-        parsed_at=parsed_at,
-        modified=task_utils.time_struct_2_datetime(modified),
+        id=job.id,
+        url=job.url,
+        parsed_at=datetime.utcnow().replace(microsecond=0),
+        modified=modified,
         etag=etag,
+        content_hash=content_hash,
         posts=tuple(new_posts),
+        wire_size=result.wire_size,
+        body_size=result.body_size,
+        error=error,
+        hub_url=hub[0] if hub is not None else None,
+        hub_topic=hub[1] if hub is not None else None,
     )
 
 
-@app.task(base=base.DatabaseTask)
-def save_feeds_updates(feeds: List[task_utils.FeedStub]) -> None:
-    """Save updates from feeds in DB.
+def _process_push(
+    job: task_utils.FeedJob,
+    body: bytes,
+    headers: Dict[str, str],
+) -> task_utils.FeedStub:
+    """Convert content pushed by WebSub hub to FeedStub.
 
-    Save posts parsed from feeds and update the feeds data in DB (i.e. update
-    ETag, Last Modified, and parsed timestamp).
+    Pushed content is parsed the same way as fetched one. It is not the
+    whole feed usually, so validators and the content hash are left as the
+    last fetch saves them, and parse errors do not back the feed off.
 
     Args:
-        feeds (List[FeedStub]): A list of parsed feeds.
+        job (FeedJob): A feed job.
+        body (bytes): A pushed content.
+        headers (Dict[str, str]): Push request headers with lowercase names.
+
+    Returns:
+        FeedStub: An object representing parsed feed.
     """
-    db: sa.orm.Session = save_feeds_updates.db
+    result = fetcher.FetchResult(
+        url=job.url,
+        status=200,
+        headers=headers,
+        body=body,
+        etag=None,
+        modified=None,
+    )
+    try:
+        entries_count, new_posts = _parse_posts(job, result)
+    except exceptions.FeedProcessError as err:
+        logger.error("Skipping pushed feed %s due to error: %s", job.id, err)
+        new_posts = []
+    else:
+        logger.info(
+            "Feed %d: pushed %d entries, %d new entries to be saved",
+            job.id, entries_count, len(new_posts)
+        )
+    return task_utils.FeedStub(
+        id=job.id,
+        url=job.url,
+        parsed_at=datetime.utcnow().replace(microsecond=0),
+        modified=job.modified_at,
+        etag=job.etag,
+        content_hash=job.content_hash,
+        posts=tuple(new_posts),
+        pushed=True,
+    )
 
-    save_posts = functools.partial(_save_posts, db)
-    upd_feed = functools.partial(_update_feed, db)
 
-    utils.pipeline_each(
-        feeds,
-        [
-            save_posts,
-            upd_feed,
-        ])
+def _parse_posts(
+    job: task_utils.FeedJob,
+    result: fetcher.FetchResult,
+) -> Tuple[int, List[task_utils.PostStub]]:
+    """Parse new posts from fetched feed.
 
-    db.commit()
+    Args:
+        job (FeedJob): A feed job.
+        result (FetchResult): A fetch result.
+
+    Returns:
+        Tuple[int, List[PostStub]]: A number of parsed entries and new posts.
+
+    Raises:
+        FeedProcessError: if feed contains entries in unexpected format.
+    """
+    if settings.RSS_STREAM_PARSING:
+        try:
+            return _stream_posts(job, result)
+        except lxml.etree.XMLSyntaxError as err:
+            logger.info(
+                "Feed %d: falling back to feedparser due to error: %s",
+                job.id, err,
+            )
+    return _feedparse_posts(job, result)
+
+
+def _feedparse_posts(
+    job: task_utils.FeedJob,
+    result: fetcher.FetchResult,
+) -> Tuple[int, List[task_utils.PostStub]]:
+    """Parse new posts from the whole feed with feedparser.
+
+    Args:
+        job (FeedJob): A feed job.
+        result (FetchResult): A fetch result.
+
+    Returns:
+        Tuple[int, List[PostStub]]: A number of parsed entries and new posts.
+    """
+    # Pass the response headers, so feedparser can detect the encoding
+    # and resolve relative links.
+    headers = {"content-location": result.url, **result.headers}
+    parsed_feed = feedparser.parse(result.body, response_headers=headers)
+
+    new_posts = []
+    for entry in parsed_feed["entries"]:
+        post_stub = _entry_2_post(entry, job.id)
+        if _is_post_new(post_stub, job.prev_parsed_at):
+            new_posts.append(_add_texts(post_stub, entry))
+    return len(parsed_feed["entries"]), new_posts
+
+
+def _stream_posts(
+    job: task_utils.FeedJob,
+    result: fetcher.FetchResult,
+) -> Tuple[int, List[task_utils.PostStub]]:
+    """Parse new posts from feed one entry at a time.
+
+    Feeds publish entries newest first, so parsing stops at the first entry
+    which is not new, or once the entries or bytes budget is exhausted.
+
+    Args:
+        job (FeedJob): A feed job.
+        result (FetchResult): A fetch result.
+
+    Returns:
+        Tuple[int, List[PostStub]]: A number of parsed entries and new posts.
+    """
+    entries_count = 0
+    new_posts = []
+    entries = stream_parser.iter_entries(
+        result.body,
+        base_url=result.url,
+        max_bytes=settings.RSS_STREAM_MAX_BYTES,
+    )
+    try:
+        for entry in entries:
+            entries_count += 1
+            post_stub = _entry_2_post(entry, job.id)
+            if not _is_post_new(post_stub, job.prev_parsed_at):
+                break
+            new_posts.append(_add_texts(post_stub, entry))
+            if len(new_posts) >= settings.RSS_STREAM_MAX_ENTRIES:
+                logger.warning(
+                    "Feed %d: stop parsing after %d new entries",
+                    job.id, len(new_posts),
+                )
+                break
+    except stream_parser.ByteBudgetExceeded as err:
+        logger.warning("Feed %d: stop parsing: %s", job.id, err)
+    finally:
+        entries.close()
+    return entries_count, new_posts
 
 
 def _entry_2_post(entry: dict, feed_id: int) -> task_utils.PostStub:
@@ -156,6 +857,31 @@ def _entry_2_post(entry: dict, feed_id: int) -> task_utils.PostStub:
         url=post_url,
         published_at=task_utils.time_struct_2_datetime(post_published_at),
         feed_id=feed_id,
+        uid=task_utils.post_uid(entry.get("id"), post_url),
+    )
+
+
+def _add_texts(
+    post: task_utils.PostStub,
+    entry: dict,
+) -> task_utils.PostStub:
+    """Add compressed summary and content of entry to its post.
+
+    It is done for new posts only, so old entries are not compressed.
+
+    Args:
+        post (PostStub): A post of entry.
+        entry (dict): An entry fetched from feed.
+
+    Returns:
+        PostStub: A post with summary and content.
+    """
+    summary = entry.get("summary")
+    content = entry["content"][0]["value"] if entry.get("content") else None
+    return post._replace(
+        summary=compression.compress(summary),
+        # Summaries of entries without one are copied from their contents.
+        content=compression.compress(content) if content != summary else None,
     )
 
 
@@ -163,9 +889,11 @@ def _is_post_new(
     post: task_utils.PostStub,
     prev_parsed_at: Optional[datetime],
 ) -> bool:
-    """Check if post is new.
+    """Check if post may be new.
 
-    Check if `post` was published after `prev_parsed_at`.
+    Check if `post` was published after `prev_parsed_at` minus
+    `RSS_POST_LOOKBACK`, so backdated posts are not lost. Posts which are
+    already saved are skipped by the DB when posts are saved.
 
     Args:
         post (PostStub): A post to check.
@@ -173,67 +901,312 @@ def _is_post_new(
             was published.
 
     Returns:
-        bool: True if post is new, False otherwise.
+        bool: True if post may be new, False otherwise.
     """
-    return (
-        post.published_at > prev_parsed_at
-        if prev_parsed_at is not None
-        else True
-    )
+    if prev_parsed_at is None:
+        return True
+    lookback = timedelta(seconds=settings.RSS_POST_LOOKBACK)
+    return post.published_at > prev_parsed_at - lookback
 
 
 def _save_posts(
     db: sa.orm.Session,
-    feed: task_utils.FeedStub,
-) -> task_utils.FeedStub:
-    """Save posts from feed in DB.
+    feeds: List[task_utils.FeedStub],
+) -> List[task_utils.FeedStub]:
+    """Save posts from feeds in DB.
+
+    Posts of all feeds are inserted with a single statement per chunk, and
+    posts which are already saved are skipped. Posts are partitioned by
+    publication month, so the unique index on the feed and post identity
+    includes the publication datetime, and posts which are saved with other
+    publication datetimes are skipped by the statement itself. Posts saved
+    before entry GUIDs identified posts have uids of their links, so posts
+    with the uid of their link saved are skipped too. Inserted posts are
+    added to the feeds rolling post counters, and their contents are saved
+    to the side table.
 
     Args:
         db (sa.orm.Session): A DB session.
-        feed (_RssFeedStub): An object representing parsed feed.
+        feeds (List[FeedStub]): Objects representing parsed feeds.
 
     Returns:
-        FeedStub: An object representing parsed feed.
+        List[FeedStub]: Objects representing parsed feeds with inserted posts
+            only.
     """
-    db.bulk_save_objects([
-        models.Post(
-            title=p.title,
-            url=p.url,
-            published_at=p.published_at,
-            rss_feed_id=p.feed_id,
-        ) for p in feed.posts
-    ])
-    return feed
+    posts = [p for f in feeds for p in f.posts]
+    inserted = set()
+    inserted_ids = []
+    created_at = datetime.utcnow().replace(microsecond=0)
+    names = ["title", "url", "published_at", "rss_feed_id", "uid"]
+    new_posts_table = sa.table(
+        "new_posts",
+        *(sa.column(name, models.Post.__table__.c[name].type)
+          for name in names),
+        sa.column("link_uid", models.Post.__table__.c.uid.type),
+    )
+    for chunk in utils.chunks(posts, SAVE_CHUNK_SIZE):
+        new_posts = db_utils.unnest(
+            new_posts_table,
+            names + ["link_uid"],
+            [
+                {
+                    "title": p.title,
+                    "url": p.url,
+                    "published_at": p.published_at,
+                    "rss_feed_id": p.feed_id,
+                    "uid": p.uid,
+                    "link_uid": task_utils.post_uid(None, p.url),
+                } for p in chunk
+            ],
+            "new_posts",
+        )
+        # Uids of posts saved before the uid migration are the ones of their
+        # links, see migration 7c3e5f92d1b8, so the first polls of feeds
+        # with entry GUIDs after it do not save the same posts again.
+        saved = sa.select(sa.literal(1)).where(
+            models.Post.rss_feed_id == new_posts.c.rss_feed_id,
+            models.Post.uid.in_([new_posts.c.uid, new_posts.c.link_uid]),
+        )
+        stmt = (
+            sa_pg.insert(models.Post)
+            .from_select(
+                names + ["created_at"],
+                sa.select(
+                    *(new_posts.c[name] for name in names),
+                    sa.literal(created_at, sa.DateTime),
+                )
+                .distinct(new_posts.c.rss_feed_id, new_posts.c.uid)
+                .where(~saved.exists()),
+            )
+            # Concurrent saves of a post with the same publication datetime
+            # are skipped by the unique index.
+            .on_conflict_do_nothing(
+                index_elements=["rss_feed_id", "uid", "published_at"],
+            )
+            .returning(
+                models.Post.id,
+                models.Post.rss_feed_id,
+                models.Post.uid,
+                models.Post.published_at,
+            )
+        )
+        for id, feed_id, uid, published_at in db.execute(stmt):
+            inserted.add((feed_id, uid, published_at))
+            inserted_ids.append((feed_id, uid, id, published_at))
+    _save_post_contents(db, posts, inserted_ids)
+    post_counters.add_posts(
+        db, [(feed_id, published_at) for feed_id, _, published_at in inserted],
+    )
+    inserted = {(feed_id, uid) for feed_id, uid, _ in inserted}
 
+    return [
+        f._replace(posts=tuple(
+            p for p in f.posts if (p.feed_id, p.uid) in inserted
+        )) if f.posts else f
+        for f in feeds
+    ]
 
-def _update_feed(
+
+def _save_post_contents(
     db: sa.orm.Session,
-    feed: task_utils.FeedStub,
-) -> task_utils.FeedStub:
-    """Update parsed feed.
+    posts: List[task_utils.PostStub],
+    inserted_ids: List[Tuple[int, str, int, datetime]],
+) -> None:
+    """Save summaries and contents of inserted posts.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        posts (List[PostStub]): Posts to save.
+        inserted_ids (List[Tuple[int, str, int, datetime]]): Feed IDs, UIDs,
+            IDs, and publication datetimes of inserted posts.
+    """
+    posts_by_key = {(p.feed_id, p.uid): p for p in posts}
+    rows = []
+    for feed_id, uid, id, published_at in inserted_ids:
+        post = posts_by_key[feed_id, uid]
+        if post.summary is not None or post.content is not None:
+            rows.append({
+                "id": id,
+                "published_at": published_at,
+                "summary": post.summary,
+                "content": post.content,
+            })
+    names = ["id", "published_at", "summary", "content"]
+    for chunk in utils.chunks(rows, SAVE_CHUNK_SIZE):
+        new_contents = db_utils.unnest(
+            models.PostContent.__table__, names, chunk, "new_contents",
+        )
+        db.execute(
+            sa.insert(models.PostContent).from_select(
+                names, sa.select(*(new_contents.c[name] for name in names)),
+            )
+        )
+
+
+def _update_feeds(
+    db: sa.orm.Session,
+    feeds: List[task_utils.FeedStub],
+) -> List[task_utils.FeedStub]:
+    """Update parsed feeds.
+
+    Update feeds' ETag, Last Modified, and parsed timestamp with actual
+    values, and schedule the next feeds fetch. Failed feeds are backed off
+    instead, and feeds of deferred hosts are rescheduled only. Feeds are
+    loaded and updated with one statement each per chunk.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        feeds (List[FeedStub]): Objects representing parsed feeds.
+
+    Returns:
+        List[FeedStub]: Objects representing parsed feeds.
+    """
+    for chunk in utils.chunks(feeds, SAVE_CHUNK_SIZE):
+        states = _load_feed_states(db, [f.id for f in chunk])
+        rows = [_feed_row(states[f.id], f) for f in chunk if f.id in states]
+        if rows:
+            db.execute(
+                _bulk_update_feeds_stmt(rows),
+                execution_options={"synchronize_session": False},
+            )
+    return feeds
+
+
+def _load_feed_states(
+    db: sa.orm.Session,
+    feed_ids: List[int],
+) -> Dict[int, dict]:
+    """Load current state of feeds locked by `_lock_feeds`.
 
-    Update feed's ETag, Last Modified, and parsed timestamp with actual values.
+    Along with the updated columns, the number of posts published last week
+    is loaded, it already counts posts which have just been saved, and the
+    WebSub subscription expiration.
 
     Args:
         db (sa.orm.Session): A DB session.
+        feed_ids (List[int]): Feed IDs.
+
+    Returns:
+        Dict[int, dict]: Feed columns by feed IDs.
+    """
+    stmt = (
+        sa.select(
+            *(models.RssFeed.__table__.c[name] for name in FEED_STATE_COLUMNS),
+            models.RssFeed.posts_last_week,
+            models.RssFeed.hub_expires_at,
+        )
+        .where(models.RssFeed.id.in_(feed_ids))
+    )
+    return {row.id: row._asdict() for row in db.execute(stmt)}
+
+
+def _feed_row(state: dict, feed: task_utils.FeedStub) -> dict:
+    """Get updated columns of parsed feed.
+
+    Args:
+        state (dict): Current feed columns.
         feed (FeedStub): An object representing parsed feed.
 
     Returns:
-        FeedStub: An object representing parsed feed.
+        dict: Updated feed columns.
     """
-    feed_obj = db.query(models.RssFeed).get(feed.id)
+    row = {name: state[name] for name in FEED_STATE_COLUMNS}
+    if feed.deferred_until is not None:
+        # The feed has not been fetched, so only its next fetch is moved.
+        row["next_fetch_at"] = feed.deferred_until
+        return row
 
-    feed_obj.modified_at = feed.modified
-    feed_obj.etag = feed.etag
-    feed_obj.parsed_at = feed.parsed_at
-    feed_obj.posts_last_week = (
-        db.query(models.Post)
-        .filter(
-            models.Post.rss_feed_id == feed.id,
-            models.Post.published_at >= datetime.utcnow() - timedelta(days=7),
+    # Validators loaded when pushed content is parsed may be older than the
+    # ones a poll has saved since, so the locked ones are kept.
+    if not feed.pushed:
+        row["modified_at"] = feed.modified
+        row["etag"] = feed.etag
+        row["content_hash"] = feed.content_hash
+    if feed.body_size is not None:
+        row["wire_size"] = feed.wire_size
+        row["body_size"] = feed.body_size
+    if feed.hub_url is not None:
+        row["hub_url"] = feed.hub_url
+        row["hub_topic"] = feed.hub_topic
+
+    if feed.error is not None:
+        _back_off_feed(row, feed)
+        return row
+
+    row["failures_count"] = 0
+    row["last_error"] = None
+    row["backoff_until"] = None
+    row["parsed_at"] = feed.parsed_at
+    row["unchanged_rate"] = scheduling.update_unchanged_rate(
+        row["unchanged_rate"] or 0,
+        unchanged=not feed.posts,
+    )
+    row["next_fetch_at"] = feed.parsed_at + scheduling.fetch_interval(
+        posts_last_week=state["posts_last_week"],
+        published_at=[p.published_at for p in feed.posts],
+        unchanged_rate=row["unchanged_rate"],
+        min_interval=timedelta(seconds=settings.RSS_PARSE_FEEDS_INTERVAL),
+        max_interval=timedelta(seconds=settings.RSS_PARSE_FEEDS_MAX_INTERVAL),
+        jitter=settings.RSS_PARSE_FEEDS_JITTER,
+    )
+    hub_expires_at = state["hub_expires_at"]
+    if hub_expires_at is not None and hub_expires_at > feed.parsed_at:
+        # Updates are pushed by the hub, so polling is a fallback only.
+        row["next_fetch_at"] = feed.parsed_at + timedelta(
+            seconds=settings.RSS_WEBSUB_FALLBACK_INTERVAL,
         )
-        .count()
+    return row
+
+
+def _back_off_feed(row: dict, feed: task_utils.FeedStub) -> None:
+    """Back off failed feed.
+
+    The feed is not fetched again until its backoff ends, and it is disabled
+    after `RSS_FEED_DISABLE_AFTER` consecutive failures. The parsed timestamp
+    is not updated, so posts published meanwhile are not missed.
+
+    Args:
+        row (dict): Feed columns to update.
+        feed (FeedStub): An object representing failed feed.
+    """
+    row["failures_count"] = (row["failures_count"] or 0) + 1
+    row["last_error"] = feed.error
+    row["backoff_until"] = feed.parsed_at + scheduling.backoff_interval(
+        failures_count=row["failures_count"],
+        base_interval=timedelta(seconds=settings.RSS_PARSE_FEEDS_INTERVAL),
+        max_interval=timedelta(seconds=settings.RSS_FEED_BACKOFF_MAX_INTERVAL),
+        jitter=settings.RSS_PARSE_FEEDS_JITTER,
     )
+    row["next_fetch_at"] = row["backoff_until"]
 
-    db.add(feed_obj)
-    return feed
+    if row["failures_count"] >= settings.RSS_FEED_DISABLE_AFTER:
+        row["disabled_at"] = feed.parsed_at
+        logger.warning(
+            "Feed %d: disabled after %d consecutive failures, last one: %s",
+            feed.id, row["failures_count"], feed.error,
+        )
+
+
+def _bulk_update_feeds_stmt(rows: List[dict]) -> sa.sql.Update:
+    """Build UPDATE ... FROM unnest(...) statement for feeds.
+
+    Args:
+        rows (List[dict]): Feed columns to update, the same for all rows.
+
+    Returns:
+        sa.sql.Update: A statement.
+    """
+    names = list(rows[0])
+    updates = db_utils.unnest(
+        models.RssFeed.__table__, names, rows, "feed_updates",
+    )
+    return (
+        sa.update(models.RssFeed)
+        .where(models.RssFeed.id == updates.c.id)
+        .values({name: updates.c[name] for name in names if name != "id"})
+    )
+
+
+def _error_name(err: Exception) -> str:
+    """Get error name to store along with the feed."""
+    return f"{type(err).__name__}: {err}"[:255]
@@ -0,0 +1,257 @@
+"""
+Module with the retention of posts.
+
+Posts older than `RSS_POST_RETENTION_DAYS` days are deleted, but the newest
+`RSS_POST_RETENTION_MIN_POSTS` posts of each feed are kept however old they
+are, so feeds which publish rarely still show their latest posts. Contents
+of posts are deleted along with them.
+
+Posts are deleted in small batches, each in its own transaction, so locks
+are short and WAL is written gradually. Whole months of posts are removed
+cheaper by detaching or dropping their partitions, see
+`rss_reader.workers.tasks.partitions`.
+"""
+
+from typing import Dict, IO, List, NamedTuple, Optional
+from datetime import datetime
+from datetime import timedelta
+import json
+import os
+import time
+import uuid
+
+import celery.utils
+import sqlalchemy as sa
+import sqlalchemy.orm
+import zstandard
+
+from rss_reader import models
+from rss_reader.config import settings
+from rss_reader.db import compression
+from rss_reader.db import utils as db_utils
+from rss_reader.workers import metrics
+from rss_reader.workers.app import app
+from rss_reader.workers.tasks import base
+
+
+logger = celery.utils.log.get_logger(__name__)
+
+
+class RetentionRun(NamedTuple):
+    """
+    Class which represents a run of posts retention.
+    """
+    posts_removed: int
+    batches: int
+    archive: Optional[str]
+
+
+def removal_bounds(
+    db: sa.orm.Session,
+    cutoff: datetime,
+    min_posts: int,
+) -> Dict[int, datetime]:
+    """Get datetimes which posts of feeds are removed before.
+
+    A bound of a feed is the cutoff, or the publication datetime of its
+    `min_posts`-th newest post if it is earlier. Feeds which have fewer
+    posts than `min_posts` have no bounds.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        cutoff (datetime): A datetime which posts are removed before.
+        min_posts (int): A number of the newest posts of each feed to keep.
+
+    Returns:
+        Dict[int, datetime]: Bounds by feed IDs.
+    """
+    if min_posts <= 0:
+        feed_ids = db.execute(sa.select(models.RssFeed.id)).scalars()
+        return dict.fromkeys(feed_ids, cutoff)
+
+    # The newest posts of each feed are read from the index on feeds and
+    # publication datetimes.
+    kept = (
+        sa.select(models.Post.published_at)
+        .where(models.Post.rss_feed_id == models.RssFeed.id)
+        .order_by(models.Post.published_at.desc())
+        .offset(min_posts - 1)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return {
+        feed_id: min(cutoff, oldest_kept)
+        for feed_id, oldest_kept in db.execute(
+            sa.select(models.RssFeed.id, kept.label("oldest_kept"))
+        )
+        if oldest_kept is not None
+    }
+
+
+def remove_posts(
+    db: sa.orm.Session,
+    now: Optional[datetime] = None,
+    archive: Optional[IO[bytes]] = None,
+) -> RetentionRun:
+    """Remove posts which are out of retention.
+
+    Posts of each batch are written to the archive before they are deleted,
+    so a batch which fails to be deleted may be archived twice.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        now (Optional[datetime]): The current datetime, defaults to now.
+        archive (Optional[IO[bytes]]): A file to write removed posts to.
+
+    Returns:
+        RetentionRun: Numbers of removed posts and batches, and a path of
+            the archive if posts are written to it.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(
+        days=settings.RSS_POST_RETENTION_DAYS,
+    )
+    bounds = removal_bounds(db, cutoff, settings.RSS_POST_RETENTION_MIN_POSTS)
+    db.rollback()
+    if not bounds:
+        return RetentionRun(posts_removed=0, batches=0, archive=None)
+
+    bounds_rows = db_utils.unnest(
+        sa.table(
+            "bounds",
+            sa.column("rss_feed_id", sa.Integer),
+            sa.column("before", sa.DateTime),
+        ),
+        ["rss_feed_id", "before"],
+        [
+            {"rss_feed_id": feed_id, "before": before}
+            for feed_id, before in bounds.items()
+        ],
+        "bounds",
+    )
+    writer = None
+    if archive is not None:
+        writer = zstandard.ZstdCompressor(
+            level=compression.LEVEL,
+        ).stream_writer(archive, closefd=False)
+    removed = batches = 0
+    while True:
+        posts = _select_batch(db, bounds_rows, cutoff, with_texts=bool(writer))
+        if not posts:
+            break
+        if writer is not None:
+            _write_posts(writer, posts)
+        _delete_posts(db, posts)
+        db.commit()
+        removed += len(posts)
+        batches += 1
+        if len(posts) < settings.RSS_POST_RETENTION_BATCH_SIZE:
+            break
+        time.sleep(settings.RSS_POST_RETENTION_BATCH_PAUSE)
+    if writer is not None:
+        writer.close()
+    return RetentionRun(
+        posts_removed=removed,
+        batches=batches,
+        archive=getattr(archive, "name", None) if removed else None,
+    )
+
+
+def _select_batch(
+    db: sa.orm.Session,
+    bounds_rows: sa.sql.FromClause,
+    cutoff: datetime,
+    with_texts: bool,
+) -> List[sa.engine.Row]:
+    """Select a batch of posts to remove."""
+    columns = [c for c in models.Post.__table__.c]
+    if with_texts:
+        columns += [models.PostContent.summary, models.PostContent.content]
+    stmt = (
+        sa.select(*columns)
+        .join(
+            bounds_rows,
+            bounds_rows.c.rss_feed_id == models.Post.rss_feed_id,
+        )
+        .where(
+            models.Post.published_at < bounds_rows.c.before,
+            # The cutoff parameter prunes partitions of newer posts.
+            models.Post.published_at < cutoff,
+        )
+        .limit(settings.RSS_POST_RETENTION_BATCH_SIZE)
+    )
+    if with_texts:
+        stmt = stmt.outerjoin(models.PostContent, models.Post.content)
+    return db.execute(stmt).all()
+
+
+def _write_posts(
+    writer: zstandard.ZstdCompressionWriter,
+    posts: List[sa.engine.Row],
+) -> None:
+    """Write posts to archive as JSON lines."""
+    for post in posts:
+        row = dict(post._mapping)
+        for name in ("summary", "content"):
+            row[name] = compression.decompress(row.get(name))
+        writer.write(json.dumps(row, default=datetime.isoformat).encode())
+        writer.write(b"\n")
+    # Each batch is a complete frame on disk before its posts are deleted.
+    writer.flush(zstandard.FLUSH_FRAME)
+
+
+def _delete_posts(db: sa.orm.Session, posts: List[sa.engine.Row]) -> None:
+    """Delete posts, their contents are deleted by cascade."""
+    keys = db_utils.unnest(
+        models.Post.__table__,
+        ["id", "published_at"],
+        [{"id": p.id, "published_at": p.published_at} for p in posts],
+        "removed_posts",
+    )
+    db.execute(
+        sa.delete(models.Post).where(
+            models.Post.id == keys.c.id,
+            models.Post.published_at == keys.c.published_at,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+@app.task(base=base.DatabaseTask)
+def enforce_post_retention() -> None:
+    """Remove posts which are out of retention and record run metrics."""
+    if settings.RSS_POST_RETENTION_DAYS is None:
+        logger.info("Post retention is not set, no posts are removed")
+        return
+
+    run_id = uuid.uuid4().hex
+    started_at = datetime.utcnow()
+    start = time.monotonic()
+    archive_dir = settings.RSS_POST_RETENTION_ARCHIVE_DIR
+    if archive_dir is None:
+        run = remove_posts(enforce_post_retention.db, now=started_at)
+    else:
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(
+            archive_dir, f"posts-{started_at:%Y%m%dT%H%M%S}.jsonl.zst",
+        )
+        with open(path, "xb") as archive:
+            run = remove_posts(
+                enforce_post_retention.db, now=started_at, archive=archive,
+            )
+        if not run.posts_removed:
+            os.remove(path)
+    seconds = time.monotonic() - start
+
+    metrics.record_retention(
+        metrics.get_client(),
+        run_id,
+        started_at=started_at,
+        posts_removed=run.posts_removed,
+        batches=run.batches,
+        seconds=seconds,
+        archive=run.archive,
+    )
+    logger.info(
+        "Retention run %s: %d posts are removed in %d batches in %.1fs",
+        run_id, run.posts_removed, run.batches, seconds,
+    )
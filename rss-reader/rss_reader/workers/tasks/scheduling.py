@@ -0,0 +1,125 @@
+"""
+Module with the feeds polling schedule calculation.
+"""
+
+from typing import Optional, Sequence
+from datetime import datetime
+from datetime import timedelta
+import random
+import statistics
+
+
+WEEK = timedelta(days=7)
+
+# Weight of the latest fetch in the unchanged fetches rate.
+UNCHANGED_RATE_WEIGHT = 0.2
+
+
+def update_unchanged_rate(rate: float, *, unchanged: bool) -> float:
+    """Update the rate of fetches which brought nothing new.
+
+    The rate is an exponential moving average, so it reflects recent
+    fetches (i.e. 304 responses and responses without new posts) only.
+
+    Args:
+        rate (float): A current rate between 0 and 1.
+        unchanged (bool): True if the latest fetch brought nothing new.
+
+    Returns:
+        float: An updated rate.
+    """
+    return (
+        (1 - UNCHANGED_RATE_WEIGHT) * rate +
+        UNCHANGED_RATE_WEIGHT * float(unchanged)
+    )
+
+
+def expected_post_gap(
+    posts_last_week: int,
+    published_at: Sequence[datetime],
+) -> Optional[timedelta]:
+    """Estimate a gap between feed posts.
+
+    Args:
+        posts_last_week (int): A number of posts published last week.
+        published_at (Sequence[datetime]): Publish dates of the latest posts.
+
+    Returns:
+        Optional[timedelta]: An expected gap or None if the feed is silent.
+    """
+    gaps = []
+    if posts_last_week > 0:
+        gaps.append(WEEK / posts_last_week)
+
+    ordered = sorted(published_at)
+    if len(ordered) >= 2:
+        gaps.append(statistics.median(
+            b - a for a, b in zip(ordered, ordered[1:])
+        ))
+
+    return min(gaps) if gaps else None
+
+
+def fetch_interval(
+    *,
+    posts_last_week: int,
+    published_at: Sequence[datetime],
+    unchanged_rate: float,
+    min_interval: timedelta,
+    max_interval: timedelta,
+    jitter: float,
+    rng: random.Random = random,
+) -> timedelta:
+    """Calculate an interval until the next feed fetch.
+
+    A feed is polled twice per its expected post gap, and less often when
+    recent fetches mostly brought nothing new. The interval is randomized by
+    `jitter` to spread fetches of different feeds in time.
+
+    Args:
+        posts_last_week (int): A number of posts published last week.
+        published_at (Sequence[datetime]): Publish dates of the latest posts.
+        unchanged_rate (float): A rate of fetches which brought nothing new.
+        min_interval (timedelta): A minimum interval.
+        max_interval (timedelta): A maximum interval.
+        jitter (float): A relative interval deviation, e.g. 0.2 for 20%.
+        rng (random.Random): A random numbers generator.
+
+    Returns:
+        timedelta: An interval.
+    """
+    gap = expected_post_gap(posts_last_week, published_at)
+    interval = gap / 2 if gap is not None else max_interval
+    interval *= 1 + unchanged_rate
+    interval = min(max(interval, min_interval), max_interval)
+    interval *= rng.uniform(1 - jitter, 1 + jitter)
+    return max(interval, min_interval)
+
+
+def backoff_interval(
+    *,
+    failures_count: int,
+    base_interval: timedelta,
+    max_interval: timedelta,
+    jitter: float,
+    rng: random.Random = random,
+) -> timedelta:
+    """Calculate an interval until the next fetch of a failing feed.
+
+    The interval grows exponentially with the number of consecutive
+    failures, so dead feeds are probed less and less often.
+
+    Args:
+        failures_count (int): A number of consecutive failures.
+        base_interval (timedelta): An interval after the first failure.
+        max_interval (timedelta): A maximum interval.
+        jitter (float): A relative interval deviation, e.g. 0.2 for 20%.
+        rng (random.Random): A random numbers generator.
+
+    Returns:
+        timedelta: An interval.
+    """
+    # Limit the exponent, so the multiplier does not overflow.
+    exponent = min(max(failures_count - 1, 0), 32)
+    interval = min(base_interval * 2 ** exponent, max_interval)
+    return interval * rng.uniform(1 - jitter, 1 + jitter)
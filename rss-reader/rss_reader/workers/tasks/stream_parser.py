@@ -0,0 +1,210 @@
+"""
+Module with the streaming feed parser.
+"""
+
+from typing import Iterator, List, Optional
+import html
+import time
+import urllib.parse
+
+import feedparser.datetimes
+import feedparser.sanitizer
+import feedparser.urls
+import lxml.etree
+
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+RSS1_NS = "http://purl.org/rss/1.0/"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+
+ENTRY_TAGS = (
+    "item",
+    f"{{{RSS1_NS}}}item",
+    f"{{{ATOM_NS}}}entry",
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ByteBudgetExceeded(Exception):
+    """Feed body is larger than the parser is allowed to read."""
+
+
+def iter_entries(
+    body: bytes,
+    *,
+    base_url: str,
+    max_bytes: int,
+) -> Iterator[dict]:
+    """Parse feed entries one at a time.
+
+    The body is fed to the parser in chunks and each entry is yielded as
+    soon as its element is closed, and then dropped from the tree, so
+    memory does not grow with the feed size. A consumer may stop iteration
+    at any entry to stop parsing the rest of the feed.
+
+    Entries are represented with the same keys as feedparser uses, i.e.
+    `title`, `link`, `id`, `published_parsed`, `summary`, and `content`.
+
+    Args:
+        body (bytes): A feed body.
+        base_url (str): A URL to resolve relative links against.
+        max_bytes (int): A maximum number of bytes to read.
+
+    Yields:
+        dict: A parsed entry.
+
+    Raises:
+        lxml.etree.XMLSyntaxError: if feed is not a well-formed XML.
+        ByteBudgetExceeded: if feed is larger than `max_bytes`.
+    """
+    parser = lxml.etree.XMLPullParser(
+        events=("end",),
+        tag=ENTRY_TAGS,
+        resolve_entities=False,
+        no_network=True,
+    )
+    for offset in range(0, len(body), CHUNK_SIZE):
+        if offset >= max_bytes:
+            raise ByteBudgetExceeded(f"Feed is larger than {max_bytes} bytes")
+        parser.feed(body[offset:offset + CHUNK_SIZE])
+        for _, element in parser.read_events():
+            yield _element_2_entry(element, base_url)
+            _drop_element(element)
+    parser.close()
+    for _, element in parser.read_events():
+        yield _element_2_entry(element, base_url)
+
+
+def _element_2_entry(element: lxml.etree._Element, base_url: str) -> dict:
+    """Convert entry element to dict.
+
+    Args:
+        element (lxml.etree._Element): An RSS item or Atom entry element.
+        base_url (str): A URL to resolve relative links against.
+
+    Returns:
+        dict: An entry with keys which are present in the element.
+    """
+    entry = {}
+    is_atom = element.tag == f"{{{ATOM_NS}}}entry"
+    ns = ATOM_NS if is_atom else element.nsmap.get(None, "")
+    ns_prefix = f"{{{ns}}}" if ns else ""
+
+    title = element.findtext(f"{ns_prefix}title")
+    if title is not None:
+        entry["title"] = title.strip()
+
+    link = _find_atom_link(element) if is_atom else (
+        element.findtext(f"{ns_prefix}link") or
+        element.findtext("guid[@isPermaLink='true']")
+    )
+    if link:
+        entry["link"] = urllib.parse.urljoin(base_url, link.strip())
+
+    entry_id = element.findtext(f"{ns_prefix}id" if is_atom else "guid")
+    if entry_id:
+        entry["id"] = entry_id.strip()
+
+    published_parsed = _find_date(element, [
+        f"{ns_prefix}published",
+        f"{ns_prefix}updated",
+        "pubDate",
+        f"{{{DC_NS}}}date",
+    ])
+    if published_parsed is not None:
+        entry["published_parsed"] = published_parsed
+
+    summary = _find_html(
+        element,
+        [f"{ns_prefix}summary" if is_atom else f"{ns_prefix}description"],
+        base_url,
+    )
+    if summary is not None:
+        entry["summary"] = summary
+
+    content = _find_html(
+        element,
+        [f"{ns_prefix}content" if is_atom else f"{{{CONTENT_NS}}}encoded"],
+        base_url,
+    )
+    if content is not None:
+        entry["content"] = [{"value": content}]
+
+    return entry
+
+
+def _find_atom_link(element: lxml.etree._Element) -> Optional[str]:
+    """Find alternate link of Atom entry."""
+    for link in element.iterfind(f"{{{ATOM_NS}}}link"):
+        if link.get("rel", "alternate") == "alternate":
+            return link.get("href")
+    return None
+
+
+def _find_date(
+    element: lxml.etree._Element,
+    paths: list,
+) -> Optional[time.struct_time]:
+    """Find and parse the first date from `paths` in element."""
+    for path in paths:
+        value = element.findtext(path)
+        if value:
+            # Use the feedparser date handlers, so dates are parsed the same
+            # way regardless of the parsing mode.
+            parsed = feedparser.datetimes._parse_date(value.strip())
+            if parsed is not None:
+                return parsed
+    return None
+
+
+def _find_html(
+    element: lxml.etree._Element,
+    paths: List[str],
+    base_url: str,
+) -> Optional[str]:
+    """Find the first HTML text from `paths` in element.
+
+    Texts are sanitized and their relative links are resolved the same way
+    feedparser does it.
+    """
+    for path in paths:
+        child = element.find(path)
+        if child is None:
+            continue
+        content_type = child.get("type", "html")
+        if content_type == "xhtml":
+            value = "".join(
+                _xhtml_2_html(c) for c in child.iterchildren("*")
+            )
+        elif content_type == "text":
+            value = html.escape(child.text or "")
+        else:
+            value = child.text or ""
+        value = value.strip()
+        if value:
+            value = feedparser.urls.resolve_relative_uris(
+                value, base_url, "utf-8", "text/html",
+            )
+            return feedparser.sanitizer._sanitize_html(
+                value, "utf-8", "text/html",
+            )
+    return None
+
+
+def _xhtml_2_html(element: lxml.etree._Element) -> str:
+    """Serialize XHTML element of Atom text as HTML."""
+    for child in element.iter("*"):
+        child.tag = lxml.etree.QName(child).localname
+    lxml.etree.cleanup_namespaces(element)
+    return lxml.etree.tostring(element, encoding="unicode", method="html")
+
+
+def _drop_element(element: lxml.etree._Element) -> None:
+    """Drop processed element and its preceding siblings from tree."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
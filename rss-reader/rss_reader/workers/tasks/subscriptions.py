@@ -0,0 +1,109 @@
+"""
+Module with the task for renewing WebSub subscriptions.
+"""
+
+from typing import List, Optional
+from datetime import datetime
+from datetime import timedelta
+import secrets
+
+import celery.utils
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader import websub
+from rss_reader.config import settings
+from rss_reader.workers.app import app
+from rss_reader.workers.tasks import base
+
+
+logger = celery.utils.log.get_logger(__name__)
+
+
+@app.task(base=base.DatabaseTask)
+def renew_websub_subscriptions() -> None:
+    """Subscribe feeds to their hubs and renew expiring subscriptions."""
+    if settings.RSS_WEBSUB_CALLBACK_URL is None:
+        return
+    requested = renew(renew_websub_subscriptions.db)
+    logger.info("WebSub subscriptions of %d feeds are requested", requested)
+
+
+def due_feeds(
+    db: sa.orm.Session,
+    now: Optional[datetime] = None,
+) -> List[models.RssFeed]:
+    """Get feeds which subscriptions are due to be requested.
+
+    A subscription is due if the feed is not subscribed yet or the
+    subscription expires soon, unless it has been requested recently and
+    the hub has not verified it yet.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        now (Optional[datetime]): The current datetime, defaults to now.
+
+    Returns:
+        List[models.RssFeed]: Feeds.
+    """
+    now = now or datetime.utcnow()
+    renew_before = timedelta(seconds=settings.RSS_WEBSUB_RENEW_BEFORE)
+    retry_after = timedelta(seconds=settings.RSS_WEBSUB_RETRY_AFTER)
+    return db.query(models.RssFeed).filter(
+        models.RssFeed.hub_url.isnot(None),
+        models.RssFeed.disabled_at.is_(None),
+        sa.or_(
+            models.RssFeed.hub_expires_at.is_(None),
+            models.RssFeed.hub_expires_at < now + renew_before,
+        ),
+        sa.or_(
+            models.RssFeed.hub_requested_at.is_(None),
+            models.RssFeed.hub_requested_at < now - retry_after,
+        ),
+    ).all()
+
+
+def renew(db: sa.orm.Session, now: Optional[datetime] = None) -> int:
+    """Request subscriptions of due feeds.
+
+    The secret of a subscription is kept on renewal, so content pushed
+    before the hub verifies the renewal is still accepted.
+
+    Args:
+        db (sa.orm.Session): A DB session.
+        now (Optional[datetime]): The current datetime, defaults to now.
+
+    Returns:
+        int: A number of requested subscriptions.
+    """
+    now = now or datetime.utcnow()
+    feeds = due_feeds(db, now)
+    if not feeds:
+        return 0
+    subscriptions = []
+    for f in feeds:
+        secret = f.hub_secret or secrets.token_hex(32)
+        subscriptions.append(websub.Subscription(
+            hub_url=f.hub_url,
+            topic=f.hub_topic,
+            callback=websub.callback_url(f.id, secret),
+            secret=secret,
+        ))
+    # Hubs may verify subscriptions and push content before they respond,
+    # so subscriptions are saved before they are requested. Failed requests
+    # are retried after RSS_WEBSUB_RETRY_AFTER too.
+    feed_ids = [f.id for f in feeds]
+    for feed_obj, subscription in zip(feeds, subscriptions):
+        feed_obj.hub_secret = subscription.secret
+        feed_obj.hub_requested_at = now
+    db.commit()
+
+    errors = websub.subscribe_all(subscriptions)
+    for feed_id, subscription, error in zip(feed_ids, subscriptions, errors):
+        if error is not None:
+            logger.warning(
+                "Feed %d: failed to subscribe to %s: %s",
+                feed_id, subscription.hub_url, error,
+            )
+    return sum(error is None for error in errors)
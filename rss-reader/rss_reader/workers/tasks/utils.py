@@ -4,7 +4,9 @@ Module with tasks utils.
 
 from typing import NamedTuple, Optional, Tuple
 from datetime import datetime
+import hashlib
 import time
+import urllib.parse
 
 
 def time_struct_2_datetime(
@@ -25,12 +27,79 @@ def time_struct_2_datetime(
     )
 
 
+def canonical_url(url: str) -> str:
+    """Canonicalize URL of a post.
+
+    Lowercase the scheme and host, and drop the default port, the fragment,
+    and the tracking (`utm_*`) query parameters, so the same post linked
+    differently gets the same URL.
+
+    Args:
+        url (str): A URL to canonicalize.
+
+    Returns:
+        str: A canonical URL.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = {"http": ":80", "https": ":443"}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    query = urllib.parse.urlencode([
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(
+            parts.query, keep_blank_values=True,
+        )
+        if not key.startswith("utm_")
+    ])
+    return urllib.parse.urlunsplit(
+        (scheme, netloc, parts.path or "/", query, "")
+    )
+
+
+def post_uid(entry_id: Optional[str], url: str) -> str:
+    """Get post identity within its feed.
+
+    A post is identified by the entry GUID if the feed provides one, and by
+    the canonical link otherwise.
+
+    Args:
+        entry_id (Optional[str]): An entry GUID.
+        url (str): A post URL.
+
+    Returns:
+        str: A hash of the post identity.
+    """
+    entry_id = (entry_id or "").strip()
+    if entry_id.startswith(("http://", "https://")):
+        # Permalink GUIDs often differ from the link by tracking parameters
+        # only.
+        entry_id = canonical_url(entry_id)
+    key = entry_id or canonical_url(url)
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+class FeedJob(NamedTuple):
+    """Feed job."""
+    id: int
+    url: str
+    prev_parsed_at: Optional[datetime]
+    modified_at: Optional[datetime]
+    etag: Optional[str]
+    content_hash: Optional[str] = None
+
+
 class PostStub(NamedTuple):
     """Post stub."""
     title: str
     url: str
     published_at: datetime
     feed_id: int
+    uid: str
+    # Compressed summary and content, see `rss_reader.db.compression`.
+    summary: Optional[bytes] = None
+    content: Optional[bytes] = None
 
 
 class FeedStub(NamedTuple):
@@ -41,3 +110,15 @@ class FeedStub(NamedTuple):
     modified: Optional[datetime]
     etag: Optional[str]
     posts: Tuple[PostStub]
+    content_hash: Optional[str] = None
+    wire_size: Optional[int] = None
+    body_size: Optional[int] = None
+    error: Optional[str] = None
+    hub_url: Optional[str] = None
+    hub_topic: Optional[str] = None
+    # Set if fetches from the feed host are deferred, the feed is not
+    # fetched then and it is due again at this datetime.
+    deferred_until: Optional[datetime] = None
+    # Set if the feed content is pushed by its WebSub hub, the feed has not
+    # been fetched then and its validators are not saved.
+    pushed: bool = False
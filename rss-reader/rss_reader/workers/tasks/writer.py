@@ -0,0 +1,55 @@
+"""
+Module with the batching writer of parsed feeds.
+"""
+
+from typing import Callable, List, Optional
+import asyncio
+
+from rss_reader.workers.tasks import utils as task_utils
+
+
+class BatchingWriter:
+    """
+    Writer which collects parsed feeds into micro-batches.
+
+    A micro-batch is flushed once it has `batch_size` feeds, or `max_delay`
+    seconds after its first feed is added, whichever comes first. The writer
+    is used on an event loop which runs feeds fetching, so the delay is
+    measured by the loop too.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[task_utils.FeedStub]], None],
+        *,
+        batch_size: int,
+        max_delay: float,
+    ):
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._batch: List[task_utils.FeedStub] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, feed: task_utils.FeedStub) -> None:
+        """Add parsed feed to the current micro-batch.
+
+        Args:
+            feed (FeedStub): An object representing parsed feed.
+        """
+        self._batch.append(feed)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_delay, self.flush,
+            )
+
+    def flush(self) -> None:
+        """Flush the current micro-batch, if any."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self.flush_fn(batch)
@@ -1,25 +1,49 @@
-"""Script which loads initial data."""
+"""Script which loads initial data.
 
-from typing import Set, Type, Union
+Categories and feeds are upserted in bulk by their slugs and URLs, and the
+ones missing from the data file are deleted. Icons of feeds are fetched by
+background tasks afterwards.
 
+With --dry-run the changes are only reported.
+"""
+
+from typing import Dict, List, NamedTuple, Set, Tuple, Union
+import argparse
 import logging
 import os
 import yaml
 
+import kombu.exceptions
 import sqlalchemy as sa
 import sqlalchemy.orm
 
 from rss_reader import models
 from rss_reader import utils
+from rss_reader.config import settings
 from rss_reader.db import session
+from rss_reader.db import utils as db_utils
+from rss_reader.workers import tasks
 
 
 BASE_DIR = os.path.join(os.path.dirname(__file__), "..")
 
+CATEGORY_FIELDS = ("name",)
+FEED_FIELDS = ("name", "rss", "icon", "category")
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("init_data")
 
 
+class Changes(NamedTuple):
+    """Changes of objects of a model."""
+    # Rows of new objects.
+    created: List[dict]
+    # Rows of changed objects with their IDs and previous rows.
+    updated: List[Tuple[int, dict, dict]]
+    # Keys of deleted objects.
+    deleted: List[str]
+
+
 def _load_data() -> Union[dict, list, None]:
     """Load initial data from file."""
     data_file_path = os.path.join(BASE_DIR, "feeds.yaml")
@@ -32,86 +56,256 @@ def _load_data() -> Union[dict, list, None]:
     return data
 
 
-def _get_or_create_category(
-    db: sa.orm.Session, category_data: dict
-) -> models.Category:
-    """Get existing Category object from DB or create one."""
-    category_obj = (
-        db.query(models.Category)
-        .filter(models.Category.slug == category_data["slug"])
-        .first()
-    )
-    if category_obj is None:
-        category_obj = models.Category()
-        logger.info("Creating category '%s'", category_data["slug"])
+def _read_rows(data: dict) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """Read category rows by slugs and feed rows by URLs from data."""
+    categories = {}
+    feeds = {}
+    for category_data in (data.get("categories") or []):
+        slug = category_data["slug"]
+        if slug in categories:
+            logger.warning("Duplicate category '%s', using the last one", slug)
+        categories[slug] = {"slug": slug, "name": category_data["name"]}
+        for feed_data in (category_data.get("feeds") or []):
+            url = feed_data["url"]
+            if url in feeds:
+                logger.warning("Duplicate feed '%s', using the last one", url)
+            feeds[url] = {
+                "url": url,
+                "name": feed_data["name"],
+                "rss": feed_data["rss"],
+                "icon": feed_data.get("icon") or None,
+                "category": slug,
+            }
+    return categories, feeds
+
+
+def _load_categories(
+    db: sa.orm.Session, slugs: Set[str]
+) -> Dict[str, dict]:
+    """Load existing categories rows by slugs."""
+    query = db.query(
+        models.Category.id, models.Category.slug, models.Category.name,
+    ).filter(models.Category.slug.in_(list(slugs)))
+    return {row.slug: dict(row._mapping) for row in query}
+
+
+def _load_feeds(db: sa.orm.Session, urls: Set[str]) -> Dict[str, dict]:
+    """Load existing feeds rows by URLs, with slugs of their categories."""
+    query = db.query(
+        models.RssFeed.id,
+        models.RssFeed.url,
+        models.RssFeed.name,
+        models.RssFeed.rss,
+        models.RssFeed.icon,
+        models.RssFeed.icon_hash,
+        models.Category.slug.label("category"),
+    ).outerjoin(models.Category).filter(models.RssFeed.url.in_(list(urls)))
+    return {row.url: dict(row._mapping) for row in query}
+
+
+def _diff(
+    rows: Dict[str, dict],
+    existing: Dict[str, dict],
+    fields: Tuple[str, ...],
+) -> Tuple[List[dict], List[Tuple[int, dict, dict]]]:
+    """Split rows into new and changed ones."""
+    created = []
+    updated = []
+    for key, row in rows.items():
+        old_row = existing.get(key)
+        if old_row is None:
+            created.append(row)
+        elif any(row[f] != old_row[f] for f in fields):
+            updated.append((old_row["id"], row, old_row))
+    return created, updated
 
-    category_obj.slug = category_data["slug"]
-    category_obj.name = category_data["name"]
 
-    db.add(category_obj)
-    return category_obj
+def _find_stale(
+    db: sa.orm.Session, column: sa.Column, keys: Set[str]
+) -> List[str]:
+    """Find keys of objects which are missing from data."""
+    return [key for key, in db.query(column).filter(column.not_in(list(keys)))]
 
 
-def _get_or_create_feed(
-    db: sa.orm.Session, feed_data: dict, category: models.Category
-) -> models.RssFeed:
-    """Get existing RssFeed object from DB or create one."""
-    feed_obj = (
-        db.query(models.RssFeed)
-        .filter(models.RssFeed.url == feed_data["url"])
-        .first()
+def _delete_stale(
+    db: sa.orm.Session, column: sa.Column, keys: Set[str]
+) -> List[str]:
+    """Delete objects which are missing from data."""
+    result = db.execute(
+        sa.delete(column.class_)
+        .where(column.not_in(list(keys)))
+        .returning(column),
+        execution_options={"synchronize_session": False},
     )
-    if feed_obj is None:
-        feed_obj = models.RssFeed()
-        logger.info("Creating feed '%s'", feed_data["url"])
+    return [key for key, in result]
 
-    feed_obj.name = feed_data["name"]
-    feed_obj.url = feed_data["url"]
-    feed_obj.rss = feed_data["rss"]
-    if not feed_obj.icon and not feed_data.get("icon", ""):
-        feed_obj.icon = utils.extract_icon_url(feed_obj.url)
-    if feed_data.get("icon", ""):
-        feed_obj.icon = feed_data["icon"]
 
-    feed_obj.category = category
+def _save_categories(
+    db: sa.orm.Session, changes: Changes, slugs: Set[str]
+) -> Dict[str, int]:
+    """Save categories changes and get category IDs by slugs."""
+    table = models.Category.__table__
+    if changes.created:
+        db.execute(sa.insert(table), changes.created)
+    if changes.updated:
+        values = db_utils.unnest(
+            table,
+            ["id", *CATEGORY_FIELDS],
+            [{"id": id, **row} for id, row, _ in changes.updated],
+            alias="data",
+        )
+        db.execute(
+            sa.update(table)
+            .where(table.c.id == values.c.id)
+            .values(name=values.c.name)
+        )
+    query = db.query(models.Category.id, models.Category.slug).filter(
+        models.Category.slug.in_(list(slugs)),
+    )
+    return {row.slug: row.id for row in query}
+
+
+def _save_feeds(
+    db: sa.orm.Session, changes: Changes, category_ids: Dict[str, int]
+) -> List[int]:
+    """Save feeds changes and get IDs of feeds which icons have changed."""
+    table = models.RssFeed.__table__
+
+    def to_values(row: dict) -> dict:
+        values = {k: v for k, v in row.items() if k != "category"}
+        values["category_id"] = category_ids[row["category"]]
+        return values
 
-    db.add(feed_obj)
-    return feed_obj
+    icon_feed_ids = []
+    if changes.created:
+        result = db.execute(
+            sa.insert(table).returning(table.c.id),
+            [to_values(row) for row in changes.created],
+        )
+        icon_feed_ids.extend(id for id, in result)
+    if changes.updated:
+        values = db_utils.unnest(
+            table,
+            ["id", "name", "rss", "icon", "category_id"],
+            [{"id": id, **to_values(row)} for id, row, _ in changes.updated],
+            alias="data",
+        )
+        db.execute(
+            sa.update(table)
+            .where(table.c.id == values.c.id)
+            .values(
+                name=values.c.name,
+                rss=values.c.rss,
+                icon=values.c.icon,
+                category_id=values.c.category_id,
+                # The stored icon is dropped if the icon URL has changed.
+                icon_hash=sa.case(
+                    (
+                        table.c.icon.is_distinct_from(values.c.icon),
+                        sa.null(),
+                    ),
+                    else_=table.c.icon_hash,
+                ),
+            )
+        )
+        icon_feed_ids.extend(
+            id for id, row, old_row in changes.updated
+            if row["icon"] != old_row["icon"]
+        )
+    return icon_feed_ids
 
 
-def _delete_objects(
-    db: sa.orm.Session, model: Type[models.Base], exclude_ids: Set[int]
-) -> None:
-    """Delete objects except ones which IDs provided."""
-    objs_to_remove = db.query(model).filter(model.id.not_in(exclude_ids)).all()
-    if objs_to_remove:
-        ids = [o.id for o in objs_to_remove]
-        logger.info("Removing %s objects with IDs: %s", model.__name__, ids)
-        db.query(model).filter(model.id.in_(ids)).delete()
+def _queue_icons(feed_ids: List[int]) -> None:
+    """Queue fetching of feed icons in batches."""
+    try:
+        for batch in utils.chunks(feed_ids, settings.RSS_FETCH_BATCH_SIZE):
+            tasks.fetch_feeds_icons.delay(batch)
+    except kombu.exceptions.OperationalError as err:
+        logger.error("Failed to queue fetching of feed icons: %s", err)
+        return
+    logger.info("Fetching of icons of %d feeds is queued", len(feed_ids))
+
+
+def _report(name: str, changes: Changes, dry_run: bool) -> None:
+    """Log changes of objects of a model."""
+    prefix = "Would be " if dry_run else ""
+    for row in changes.created:
+        logger.info("%screated %s: %s", prefix, name, row)
+    for id, row, old_row in changes.updated:
+        diff = ", ".join(
+            f"{f}: {old_row[f]!r} -> {row[f]!r}"
+            for f in row if f in old_row and row[f] != old_row[f]
+        )
+        logger.info("%supdated %s %d: %s", prefix, name, id, diff)
+    for key in changes.deleted:
+        logger.info("%sdeleted %s: %s", prefix, name, key)
+    logger.info(
+        "%s: %d created, %d updated, %d deleted%s",
+        name.capitalize(),
+        len(changes.created),
+        len(changes.updated),
+        len(changes.deleted),
+        " (dry run)" if dry_run else "",
+    )
 
 
-def init_data():
+def init_data(dry_run: bool = False):
 
     logger.info("Init data")
 
-    data = _load_data()
+    categories, feeds = _read_rows(_load_data() or {})
     db = session.SessionLocal()
 
-    category_ids = set()
-    feed_ids = set()
-    for category_data in (data.get("categories") or []):
-        category_obj = _get_or_create_category(db, category_data)
-        category_ids.add(category_obj.id)
-        for feed_data in (category_data.get("feeds") or []):
-            feed_obj = _get_or_create_feed(db, feed_data, category_obj)
-            feed_ids.add(feed_obj.id)
-        db.flush()
+    existing_categories = _load_categories(db, set(categories))
+    existing_feeds = _load_feeds(db, set(feeds))
+    # Feeds keep their icons unless the data provides ones.
+    for url, row in feeds.items():
+        if row["icon"] is None and url in existing_feeds:
+            row["icon"] = existing_feeds[url]["icon"]
+
+    category_changes = Changes(
+        *_diff(categories, existing_categories, CATEGORY_FIELDS), deleted=[],
+    )
+    feed_changes = Changes(
+        *_diff(feeds, existing_feeds, FEED_FIELDS), deleted=[],
+    )
 
-    _delete_objects(db, models.RssFeed, exclude_ids=feed_ids)
-    _delete_objects(db, models.Category, exclude_ids=category_ids)
+    if dry_run:
+        feed_changes.deleted.extend(
+            _find_stale(db, models.RssFeed.url, set(feeds))
+        )
+        category_changes.deleted.extend(
+            _find_stale(db, models.Category.slug, set(categories))
+        )
+        db.rollback()
+    else:
+        category_ids = _save_categories(db, category_changes, set(categories))
+        icon_feed_ids = _save_feeds(db, feed_changes, category_ids)
+        # Existing feeds which icons have not been stored yet.
+        icon_feed_ids.extend(
+            row["id"] for row in existing_feeds.values()
+            if row["icon_hash"] is None and row["id"] not in icon_feed_ids
+        )
+        feed_changes.deleted.extend(
+            _delete_stale(db, models.RssFeed.url, set(feeds))
+        )
+        category_changes.deleted.extend(
+            _delete_stale(db, models.Category.slug, set(categories))
+        )
+        db.commit()
+        if icon_feed_ids:
+            _queue_icons(icon_feed_ids)
 
-    db.commit()
+    _report("category", category_changes, dry_run)
+    _report("feed", feed_changes, dry_run)
+    db.close()
 
 
 if __name__ == "__main__":
-    init_data()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="report changes without saving them",
+    )
+    init_data(dry_run=parser.parse_args().dry_run)
@@ -1,6 +1,52 @@
 #! /usr/bin/env bash
 set -e
 
-celery --app=rss_reader.workers.app worker \
-    --beat \
-    --loglevel=INFO
+# Workers are started with a launch profile, given as the first argument or
+# WORKER_PROFILE, see the queues in rss_reader/workers/app.py:
+#   fetch    fetches feeds, threads which run an event loop each, and
+#            parses them on a shared pool of a process per CPU core
+#   parse    parses pushed feeds, a process per CPU core
+#   persist  writes to DB, a few processes which take one task at a time
+#   icons    fetches icons, threads
+#   beat     schedules periodic tasks, run exactly one
+#   all      consumes all queues in one worker, e.g. for development
+# The number of threads or processes is overridden by WORKER_CONCURRENCY.
+PROFILE=${1:-${WORKER_PROFILE:-all}}
+
+worker() {
+    exec celery --app=rss_reader.workers.app worker \
+        --hostname="$PROFILE@%h" \
+        --loglevel=INFO \
+        "$@"
+}
+
+case "$PROFILE" in
+    fetch)
+        worker --queues=fetch --pool=threads \
+            --concurrency="${WORKER_CONCURRENCY:-16}"
+        ;;
+    parse)
+        worker --queues=parse --pool=prefork \
+            ${WORKER_CONCURRENCY:+--concurrency="$WORKER_CONCURRENCY"}
+        ;;
+    persist)
+        worker --queues=persist --pool=prefork \
+            --concurrency="${WORKER_CONCURRENCY:-4}" \
+            --prefetch-multiplier=1 -O fair
+        ;;
+    icons)
+        worker --queues=icons --pool=threads \
+            --concurrency="${WORKER_CONCURRENCY:-4}"
+        ;;
+    beat)
+        exec celery --app=rss_reader.workers.app beat --loglevel=INFO
+        ;;
+    all)
+        worker --queues=celery,fetch,parse,persist,icons \
+            ${WORKER_CONCURRENCY:+--concurrency="$WORKER_CONCURRENCY"}
+        ;;
+    *)
+        echo "Unknown worker profile: $PROFILE" >&2
+        exit 1
+        ;;
+esac
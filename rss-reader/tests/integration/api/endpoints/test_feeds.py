@@ -2,6 +2,7 @@
 Tests for /feeds endpoints.
 """
 
+from datetime import datetime
 from unittest import mock
 
 from fastapi import testclient
@@ -154,6 +155,33 @@ def test_update_feed(
         ))
 
 
+@FETCH_ICON_TASK_MOCK
+def test_update_feed_resets_breaker(
+    _: mock.Mock,
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+    feed_payload: dict,
+):
+    """
+    Test update re-enables feed disabled due to failures.
+    """
+    feed = factories.RssFeedFactory(
+        failures_count=10,
+        last_error="HttpError: HTTP 404",
+        backoff_until=datetime(2021, 10, 5),
+        disabled_at=datetime(2021, 10, 4),
+    )
+
+    response = client.put(f"/api/feeds/{feed.id}", json=feed_payload)
+
+    assert response.status_code == 200
+    db_session.refresh(feed)
+    assert feed.failures_count == 0
+    assert feed.backoff_until is None
+    assert feed.disabled_at is None
+    assert feed.last_error == "HttpError: HTTP 404"
+
+
 @FETCH_ICON_TASK_MOCK
 def test_update_feed_change_category(
     _: mock.Mock,
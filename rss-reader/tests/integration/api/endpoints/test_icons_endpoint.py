@@ -0,0 +1,75 @@
+"""
+Tests for /icons endpoints.
+"""
+
+from fastapi import testclient
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from tests.integration import factories
+
+
+def test_read_icon(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test icon is served with a strong ETag and long caching.
+    """
+    icon = factories.IconFactory()
+
+    response = client.get(f"/api/icons/{icon.hash}")
+
+    assert response.status_code == 200
+    assert response.content == icon.data
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{icon.hash}"'
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_read_svg_icon(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test SVG icon is served with a restrictive content security policy.
+    """
+    icon = factories.IconFactory(
+        content_type="image/svg+xml",
+        data=b'<svg xmlns="http://www.w3.org/2000/svg"></svg>',
+    )
+
+    response = client.get(f"/api/icons/{icon.hash}")
+
+    assert response.status_code == 200
+    assert "default-src 'none'" in response.headers["content-security-policy"]
+
+
+def test_read_icon_not_modified(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test cached icon is not sent again.
+    """
+    icon = factories.IconFactory()
+
+    response = client.get(
+        f"/api/icons/{icon.hash}",
+        headers={"If-None-Match": f'"other", W/"{icon.hash}"'},
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_read_icon_not_found(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test missing icon.
+    """
+    response = client.get(f"/api/icons/{'0' * 64}")
+
+    assert response.status_code == 404
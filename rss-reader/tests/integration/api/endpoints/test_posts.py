@@ -2,10 +2,16 @@
 Tests for /posts endpoints.
 """
 
+from datetime import datetime
+from datetime import timedelta
+
 from fastapi import testclient
 import sqlalchemy as sa
 import sqlalchemy.orm
 
+from rss_reader import models
+from rss_reader.config import settings
+from rss_reader.db import compression
 from tests.integration import factories
 from tests.integration import utils
 
@@ -67,6 +73,33 @@ def test_list_posts(
     assert len(content) == 2
 
 
+def test_list_posts_within_window(
+    client: testclient.TestClient, db_session: sa.orm.Session, monkeypatch,
+):
+    """
+    Test newest posts are listed from the window unless it holds too few.
+    """
+    window = timedelta(days=30)
+    monkeypatch.setattr(
+        settings, "RSS_POST_LISTING_WINDOW", int(window.total_seconds()),
+    )
+    with factories.single_commit(db_session):
+        post = factories.PostFactory()
+        old_post = factories.PostFactory(
+            rss_feed=post.rss_feed,
+            published_at=datetime.utcnow() - window - timedelta(days=1),
+        )
+    url = f"/api/feeds/{post.rss_feed_id}/posts/?order_by=published_at.desc"
+
+    response = client.get(url, params={"limit": 1})
+    assert [p["id"] for p in response.json()] == [post.id]
+    response = client.get(url)
+    assert [p["id"] for p in response.json()] == [post.id, old_post.id]
+    response = client.get(url, params={"skip": 1})
+    assert [p["id"] for p in response.json()] == [old_post.id]
+    assert len(client.get("/api/posts/").json()) == 2
+
+
 def test_list_posts_of_feed(
     client: testclient.TestClient, db_session: sa.orm.Session,
 ):
@@ -82,3 +115,39 @@ def test_list_posts_of_feed(
     assert response.status_code == 200
     content = response.json()
     assert len(content) == 1
+
+
+def test_read_post_content(
+    client: testclient.TestClient, db_session: sa.orm.Session
+):
+    """
+    Test read post content decompresses its texts.
+    """
+    post = factories.PostFactory(content=models.PostContent(
+        summary=compression.compress("Summary"),
+        content=compression.compress("<p>Content</p>"),
+    ))
+
+    response = client.get(f"/api/posts/{post.id}/content")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": post.id,
+        "summary": "Summary",
+        "content": "<p>Content</p>",
+    }
+
+
+def test_read_post_content_without_content(
+    client: testclient.TestClient, db_session: sa.orm.Session
+):
+    """
+    Test read content of post which has none.
+    """
+    post = factories.PostFactory()
+
+    response = client.get(f"/api/posts/{post.id}/content")
+
+    assert response.status_code == 200
+    assert response.json() == {"id": post.id, "summary": None, "content": None}
+    assert client.get(f"/api/posts/{post.id + 1}/content").status_code == 404
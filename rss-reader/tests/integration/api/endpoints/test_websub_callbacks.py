@@ -0,0 +1,310 @@
+"""
+Tests for /websub endpoints.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+from typing import Generator, Tuple
+from unittest import mock
+import http.server
+import threading
+import urllib.parse
+
+from fastapi import testclient
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader import websub
+from rss_reader.config import settings
+from rss_reader.workers.tasks import process_feeds
+from rss_reader.workers.tasks import subscriptions
+from tests.integration import factories
+
+
+TOPIC = "http://example.com/feed"
+PUSHED_BODY = b"""<?xml version="1.0"?>
+<rss version="2.0">
+  <channel>
+    <title>Feed</title>
+    <item>
+      <title>Pushed</title>
+      <link>http://example.com/pushed</link>
+      <pubDate>Mon, 04 Oct 2021 10:00:00 GMT</pubDate>
+    </item>
+  </channel>
+</rss>
+"""
+
+
+@pytest.fixture(scope="function")
+def stand_in_hub() -> Generator[Tuple[str, list], None, None]:
+    """Run a local hub which accepts subscription requests."""
+    requests = []
+
+    class HubHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            requests.append(dict(urllib.parse.parse_qsl(
+                self.rfile.read(length).decode(),
+            )))
+            self.send_response(202)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), HubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/", requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="function")
+def callback_url(monkeypatch) -> str:
+    """Enable WebSub with the test client callback URL."""
+    url = f"http://testserver{settings.API_V1_STR}/websub"
+    monkeypatch.setattr(settings, "RSS_WEBSUB_CALLBACK_URL", url)
+    return url
+
+
+def test_subscribe_and_receive_content(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+    stand_in_hub: Tuple[str, list],
+    callback_url: str,
+):
+    """
+    Test feed is subscribed and pushed content is saved.
+    """
+    hub_url, hub_requests = stand_in_hub
+    feed = factories.RssFeedFactory(hub_url=hub_url, hub_topic=TOPIC)
+
+    assert subscriptions.renew(db_session) == 1
+    subscription, = hub_requests
+    assert subscription["hub.callback"] == (
+        f"{callback_url}/{feed.id}"
+        f"?token={websub.callback_token(subscription['hub.secret'])}"
+    )
+    assert subscription["hub.topic"] == TOPIC
+
+    response = client.get(subscription["hub.callback"], params={
+        "hub.mode": "subscribe",
+        "hub.topic": TOPIC,
+        "hub.challenge": "challenge",
+        "hub.lease_seconds": str(10 * 24 * 60 * 60),
+    })
+    assert response.status_code == 200
+    assert response.text == "challenge"
+    db_session.expire_all()
+    assert feed.hub_expires_at > datetime.utcnow() + timedelta(days=9)
+
+    def parse_pushed_feed(feed_id, body, headers):
+        feed_obj = db_session.query(models.RssFeed).get(feed_id)
+        process_feeds._save_feeds(db_session, [
+            process_feeds._process_push(
+                process_feeds._feed_job(feed_obj), body, headers,
+            ),
+        ])
+
+    with mock.patch(
+        "rss_reader.workers.tasks.parse_pushed_feed.delay",
+        side_effect=parse_pushed_feed,
+    ) as save_mock:
+        response = client.post(
+            subscription["hub.callback"],
+            content=PUSHED_BODY,
+            headers={
+                "Content-Type": "application/rss+xml",
+                "X-Hub-Signature": websub.sign(
+                    subscription["hub.secret"], PUSHED_BODY,
+                ),
+            },
+        )
+
+    assert response.status_code == 202
+    save_mock.assert_called_once()
+    db_session.expire_all()
+    assert [p.title for p in feed.posts] == ["Pushed"]
+    # Subscribed feeds are polled as a fallback only.
+    assert feed.next_fetch_at >= feed.parsed_at + timedelta(
+        seconds=settings.RSS_WEBSUB_FALLBACK_INTERVAL,
+    )
+    # The subscription does not expire soon, so it is not renewed.
+    assert subscriptions.due_feeds(
+        db_session, now=datetime.utcnow() + timedelta(hours=2),
+    ) == []
+
+
+def test_verify_subscription_before_hub_responds(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+    callback_url: str,
+    monkeypatch,
+):
+    """
+    Test subscription is verified by hub before it responds to the request.
+    """
+    factories.RssFeedFactory(hub_url="http://hub.example.com/", hub_topic=TOPIC)
+    responses = []
+
+    def subscribe_all(subscriptions_):
+        subscription, = subscriptions_
+        responses.append(client.get(subscription.callback, params={
+            "hub.mode": "subscribe",
+            "hub.topic": TOPIC,
+            "hub.challenge": "challenge",
+            "hub.lease_seconds": "60",
+        }))
+        return [None]
+
+    monkeypatch.setattr(websub, "subscribe_all", subscribe_all)
+
+    assert subscriptions.renew(db_session) == 1
+    response, = responses
+    assert response.status_code == 200
+    assert response.text == "challenge"
+
+
+@mock.patch("rss_reader.workers.tasks.parse_pushed_feed.delay")
+def test_receive_content_invalid_signature(
+    save_mock: mock.Mock,
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test content with invalid signature is ignored.
+    """
+    feed = factories.RssFeedFactory(hub_topic=TOPIC, hub_secret="secret")
+
+    response = client.post(
+        f"{settings.API_V1_STR}/websub/{feed.id}",
+        content=PUSHED_BODY,
+        headers={"X-Hub-Signature": websub.sign("other", PUSHED_BODY)},
+    )
+
+    assert response.status_code == 202
+    save_mock.assert_not_called()
+
+
+def test_verify_subscription_not_requested(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test subscription which has not been requested is not confirmed.
+    """
+    feed = factories.RssFeedFactory(hub_topic=TOPIC)
+
+    response = client.get(f"{settings.API_V1_STR}/websub/{feed.id}", params={
+        "hub.mode": "subscribe",
+        "hub.topic": TOPIC,
+        "hub.challenge": "challenge",
+    })
+
+    assert response.status_code == 404
+
+
+def _pending_feed(**kwargs) -> models.RssFeed:
+    """Create feed which subscription is requested."""
+    kwargs.setdefault("hub_requested_at", datetime.utcnow())
+    return factories.RssFeedFactory(
+        hub_topic=TOPIC, hub_secret="secret", **kwargs,
+    )
+
+
+def _verify(client: testclient.TestClient, feed_id: int, **params):
+    """Call verification callback of feed subscription."""
+    params = {
+        "hub.mode": "subscribe",
+        "hub.topic": TOPIC,
+        "hub.challenge": "challenge",
+        "token": websub.callback_token("secret"),
+        **params,
+    }
+    return client.get(
+        f"{settings.API_V1_STR}/websub/{feed_id}", params=params,
+    )
+
+
+@pytest.mark.parametrize(
+    "feed_kwargs,params,status",
+    [
+        ({}, {"token": websub.callback_token("other")}, 404),
+        ({}, {"token": None}, 404),
+        (
+            {"hub_requested_at": datetime.utcnow() - timedelta(days=1)},
+            {},
+            404,
+        ),
+        ({}, {"hub.lease_seconds": str(10 ** 12)}, 422),
+        ({}, {"hub.lease_seconds": "0"}, 422),
+    ]
+)
+def test_verify_subscription_rejected(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+    feed_kwargs: dict,
+    params: dict,
+    status: int,
+):
+    """
+    Test subscription is not verified without its token, after its request
+    is retried, or with a lease out of bounds.
+    """
+    feed = _pending_feed(**feed_kwargs)
+
+    response = _verify(client, feed.id, **params)
+
+    assert response.status_code == status
+    db_session.expire_all()
+    assert feed.hub_expires_at is None
+
+
+def test_verify_subscription_once(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test confirmed subscription can not be verified or denied again.
+    """
+    feed = _pending_feed()
+
+    assert _verify(client, feed.id, **{
+        "hub.lease_seconds": "3600",
+    }).status_code == 200
+    db_session.expire_all()
+    expires_at = feed.hub_expires_at
+    assert feed.hub_requested_at is None
+
+    assert _verify(client, feed.id, **{
+        "hub.lease_seconds": "7200",
+    }).status_code == 404
+    assert _verify(client, feed.id, **{
+        "hub.mode": "denied",
+    }).status_code == 404
+    db_session.expire_all()
+    assert feed.hub_expires_at == expires_at
+
+
+def test_deny_subscription(
+    client: testclient.TestClient,
+    db_session: sa.orm.Session,
+):
+    """
+    Test pending subscription denied by hub is cancelled.
+    """
+    feed = _pending_feed(hub_expires_at=datetime.utcnow() + timedelta(days=1))
+
+    response = _verify(client, feed.id, **{
+        "hub.mode": "denied", "hub.reason": "Not allowed",
+    })
+
+    assert response.status_code == 200
+    db_session.expire_all()
+    assert feed.hub_expires_at is None
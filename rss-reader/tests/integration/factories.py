@@ -66,6 +66,18 @@ class CategoryFactory(BaseModelFactory):
     slug = factory.LazyAttribute(lambda x: fake.pystr())
 
 
+class IconFactory(BaseModelFactory):
+    """
+    Icon factory.
+    """
+    class Meta:
+        model = models.Icon
+
+    hash = factory.LazyAttribute(lambda x: fake.sha256())
+    content_type = "image/png"
+    data = factory.LazyAttribute(lambda x: fake.binary(length=64))
+
+
 class RssFeedFactory(BaseModelFactory):
     """
     RSS Feed factory.
@@ -77,10 +89,27 @@ class RssFeedFactory(BaseModelFactory):
     url = factory.LazyAttribute(lambda x: fake.url())
     rss = factory.LazyAttribute(lambda x: fake.url())
     icon = None
+    icon_hash = None
     parsed_at = None
+    posts_last_day = 0
     posts_last_week = 0
+    posts_last_month = 0
+    next_fetch_at = None
+    unchanged_rate = 0
+    failures_count = 0
+    last_error = None
+    backoff_until = None
+    disabled_at = None
     modified_at = None
     etag = None
+    content_hash = None
+    hub_url = None
+    hub_topic = None
+    hub_secret = None
+    hub_requested_at = None
+    hub_expires_at = None
+    wire_size = None
+    body_size = None
 
 
 class PostFactory(BaseModelFactory):
@@ -92,12 +121,16 @@ class PostFactory(BaseModelFactory):
 
     title = factory.LazyAttribute(lambda x: fake.pystr())
     url = factory.LazyAttribute(lambda x: fake.url())
-    published_at = factory.LazyAttribute(lambda x: fake.date_time())
+    published_at = factory.LazyAttribute(
+        lambda x: fake.date_time_between(start_date="-30d")
+    )
+    uid = factory.LazyAttribute(lambda x: fake.md5())
     rss_feed = factory.SubFactory(RssFeedFactory)
 
 
 def register_factories(db_session: sa.orm.Session) -> None:
     """Register all factories"""
     CategoryFactory.register(db_session)
+    IconFactory.register(db_session)
     PostFactory.register(db_session)
     RssFeedFactory.register(db_session)
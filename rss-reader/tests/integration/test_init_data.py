@@ -0,0 +1,94 @@
+"""
+Tests for the initial data loader.
+"""
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from scripts import init_data
+from tests.integration import factories
+
+
+DATA = {
+    "categories": [
+        {
+            "name": "Technology",
+            "slug": "tech",
+            "feeds": [
+                {
+                    "name": "Kept",
+                    "url": "https://kept.example.com",
+                    "rss": "https://kept.example.com/rss",
+                },
+                {
+                    "name": "New",
+                    "url": "https://new.example.com",
+                    "rss": "https://new.example.com/rss",
+                    "icon": "https://new.example.com/icon.png",
+                },
+            ],
+        },
+        {"name": "Blogs", "slug": "blogs"},
+    ],
+}
+
+
+def _load(monkeypatch, dry_run=False):
+    """Load test data and get IDs of feeds which icons are queued."""
+    queued = []
+    monkeypatch.setattr(init_data, "_load_data", lambda: DATA)
+    monkeypatch.setattr(init_data, "_queue_icons", queued.extend)
+    init_data.init_data(dry_run=dry_run)
+    return queued
+
+
+def test_init_data(db_session: sa.orm.Session, monkeypatch):
+    """
+    Test categories and feeds are upserted and stale ones are deleted.
+    """
+    category = factories.CategoryFactory(slug="tech", name="Tech")
+    icon = factories.IconFactory()
+    kept = factories.RssFeedFactory(
+        url="https://kept.example.com",
+        name="Old name",
+        icon="https://kept.example.com/icon.png",
+        icon_hash=icon.hash,
+        category=category,
+    )
+    factories.RssFeedFactory(url="https://stale.example.com")
+    factories.CategoryFactory(slug="stale")
+
+    queued = _load(monkeypatch)
+
+    db_session.expire_all()
+    assert sorted(
+        (c.slug, c.name) for c in db_session.query(models.Category)
+    ) == [("blogs", "Blogs"), ("tech", "Technology")]
+    feeds = {f.url: f for f in db_session.query(models.RssFeed)}
+    assert set(feeds) == {"https://kept.example.com", "https://new.example.com"}
+    assert feeds["https://kept.example.com"].id == kept.id
+    assert feeds["https://kept.example.com"].name == "Kept"
+    # Icons are kept unless the data provides ones.
+    assert feeds["https://kept.example.com"].icon_hash == icon.hash
+    new = feeds["https://new.example.com"]
+    assert new.icon == "https://new.example.com/icon.png"
+    assert new.category.slug == "tech"
+    assert new.posts_last_week == 0
+    assert queued == [new.id]
+
+
+def test_init_data_dry_run(db_session: sa.orm.Session, monkeypatch):
+    """
+    Test changes are not saved in the dry run mode.
+    """
+    factories.RssFeedFactory(url="https://stale.example.com")
+
+    queued = _load(monkeypatch, dry_run=True)
+
+    db_session.expire_all()
+    assert [f.url for f in db_session.query(models.RssFeed)] == [
+        "https://stale.example.com",
+    ]
+    assert db_session.query(models.Category).count() == 0
+    assert queued == []
@@ -0,0 +1,59 @@
+"""
+Tests for rolling post counters.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.workers.tasks import post_counters
+from tests.integration import factories
+
+
+def test_add_posts(db_session: sa.orm.Session):
+    """
+    Test saved posts are added to buckets and feed counters.
+    """
+    feed = factories.RssFeedFactory()
+    now = datetime.utcnow()
+
+    for _ in range(2):
+        post_counters.add_posts(db_session, [
+            (feed.id, now),
+            (feed.id, now - timedelta(days=3)),
+        ])
+    db_session.commit()
+
+    db_session.expire_all()
+    assert (
+        feed.posts_last_day, feed.posts_last_week, feed.posts_last_month,
+    ) == (2, 4, 4)
+    assert sorted(
+        b.count for b in db_session.query(models.PostCountBucket)
+    ) == [2, 2]
+
+
+def test_age(db_session: sa.orm.Session):
+    """
+    Test posts which left windows are aged out of counters.
+    """
+    feed = factories.RssFeedFactory()
+    silent_feed = factories.RssFeedFactory(posts_last_day=1)
+    now = datetime.utcnow()
+    post_counters.add_posts(db_session, [
+        (feed.id, now - timedelta(hours=12)),
+        (feed.id, now - timedelta(days=35)),
+    ], now=now - timedelta(days=10))
+
+    updated = post_counters.age(db_session, now=now)
+
+    db_session.expire_all()
+    assert updated == 2
+    assert (
+        feed.posts_last_day, feed.posts_last_week, feed.posts_last_month,
+    ) == (1, 1, 1)
+    assert silent_feed.posts_last_day == 0
+    assert db_session.query(models.PostCountBucket).count() == 1
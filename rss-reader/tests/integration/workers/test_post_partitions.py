@@ -0,0 +1,78 @@
+"""
+Tests for monthly partitions of posts.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.db import partitions
+from rss_reader.workers.tasks import partitions as partitions_tasks
+from tests.integration import factories
+
+
+def _partition_of(db: sa.orm.Session, table: str, id: int) -> str:
+    return db.execute(sa.text(
+        f"SELECT tableoid::regclass::text FROM {table} WHERE id = :id"
+    ), {"id": id}).scalar()
+
+
+def test_create_and_remove_partitions(db_session: sa.orm.Session):
+    """
+    Test rows are moved out of the default partitions and back.
+    """
+    month = datetime(2100, 1, 1)
+    with factories.single_commit(db_session):
+        post = factories.PostFactory(
+            published_at=datetime(2100, 1, 15),
+            content=models.PostContent(summary=b"summary"),
+        )
+    post_id = post.id
+    assert _partition_of(db_session, "posts", post_id) == "posts_default"
+
+    partitions.create_partitions(db_session, month)
+    db_session.commit()
+    try:
+        assert month in partitions.list_months(db_session, "posts")
+        assert _partition_of(db_session, "posts", post_id) == "posts_p2100_01"
+        assert (
+            _partition_of(db_session, "post_contents", post_id)
+            == "post_contents_p2100_01"
+        )
+        assert db_session.query(models.Post).get(post_id).content is not None
+    finally:
+        partitions.remove_partitions(db_session, month, drop=True)
+        db_session.commit()
+
+    assert month not in partitions.list_months(db_session, "posts")
+    assert db_session.query(models.Post).filter_by(id=post_id).count() == 0
+
+
+def test_holds_kept_posts(db_session: sa.orm.Session):
+    """
+    Test months which hold the newest posts of feeds are found.
+    """
+    now = datetime.utcnow()
+    with factories.single_commit(db_session):
+        rare_feed, busy_feed = factories.RssFeedFactory.create_batch(2)
+        factories.PostFactory(
+            rss_feed=rare_feed, published_at=datetime(2000, 1, 15),
+        )
+        factories.PostFactory(
+            rss_feed=busy_feed, published_at=datetime(2000, 2, 15),
+        )
+        for days in range(3):
+            factories.PostFactory(
+                rss_feed=busy_feed, published_at=now - timedelta(days=days),
+            )
+
+    def holds(month: datetime, min_posts: int = 3) -> bool:
+        return partitions_tasks.holds_kept_posts(db_session, month, min_posts)
+
+    assert holds(datetime(2000, 1, 1))
+    assert not holds(datetime(2000, 2, 1))
+    assert holds(datetime(2000, 2, 1), min_posts=4)
+    assert not holds(datetime(2000, 1, 1), min_posts=0)
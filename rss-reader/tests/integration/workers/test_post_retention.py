@@ -0,0 +1,96 @@
+"""
+Tests for retention of posts.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+import io
+import json
+
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm
+import zstandard
+
+from rss_reader import models
+from rss_reader.config import settings
+from rss_reader.db import compression
+from rss_reader.workers.tasks import retention
+from tests.integration import factories
+
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.fixture
+def retention_settings(monkeypatch):
+    monkeypatch.setattr(settings, "RSS_POST_RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "RSS_POST_RETENTION_MIN_POSTS", 3)
+    monkeypatch.setattr(settings, "RSS_POST_RETENTION_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "RSS_POST_RETENTION_BATCH_PAUSE", 0)
+
+
+def _create_posts(feed: models.RssFeed, days_ago: list) -> list:
+    return [
+        factories.PostFactory(
+            rss_feed=feed, published_at=NOW - timedelta(days=days),
+        )
+        for days in days_ago
+    ]
+
+
+def test_remove_posts(db_session: sa.orm.Session, retention_settings):
+    """
+    Test old posts are removed unless they are the newest ones of feeds.
+    """
+    with factories.single_commit(db_session):
+        busy_feed, quiet_feed, rare_feed = (
+            factories.RssFeedFactory.create_batch(3)
+        )
+        busy = _create_posts(busy_feed, [1, 2, 3, 4, 40, 50, 60])
+        quiet = _create_posts(quiet_feed, [1, 40, 50, 60])
+        rare = _create_posts(rare_feed, [100, 200])
+    kept_ids = {p.id for p in [*busy[:4], *quiet[:3], *rare]}
+
+    run = retention.remove_posts(db_session, now=NOW)
+
+    assert run == retention.RetentionRun(
+        posts_removed=4, batches=2, archive=None,
+    )
+    assert {
+        id for id, in db_session.query(models.Post.id)
+    } == kept_ids
+
+
+def test_remove_posts_archives_them(
+    db_session: sa.orm.Session, retention_settings,
+):
+    """
+    Test removed posts and their texts are written to archive.
+    """
+    with factories.single_commit(db_session):
+        feed = factories.RssFeedFactory()
+        posts = _create_posts(feed, [1, 2, 3])
+        old_post = factories.PostFactory(
+            rss_feed=feed,
+            published_at=NOW - timedelta(days=40),
+            content=models.PostContent(
+                summary=compression.compress("Summary"),
+            ),
+        )
+    old_id = old_post.id
+    archive = io.BytesIO()
+
+    run = retention.remove_posts(db_session, now=NOW, archive=archive)
+
+    assert run.posts_removed == 1
+    assert db_session.query(models.PostContent).count() == 0
+    with zstandard.ZstdDecompressor().stream_reader(
+        io.BytesIO(archive.getvalue()),
+    ) as reader:
+        rows = [json.loads(line) for line in reader.read().splitlines()]
+    assert [(r["id"], r["summary"], r["content"]) for r in rows] == [
+        (old_id, "Summary", None),
+    ]
+    assert rows[0]["published_at"] == (NOW - timedelta(days=40)).isoformat()
+    assert db_session.query(models.Post).count() == len(posts)
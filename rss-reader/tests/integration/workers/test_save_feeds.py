@@ -0,0 +1,237 @@
+"""
+Tests for saving parsed feeds.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.config import settings
+from rss_reader.db import compression
+from rss_reader.workers.tasks import process_feeds
+from rss_reader.workers.tasks import utils as task_utils
+from tests.integration import factories
+
+
+def _post(feed: models.RssFeed, url: str) -> task_utils.PostStub:
+    """Get post stub of feed."""
+    return task_utils.PostStub(
+        title=url,
+        url=url,
+        published_at=datetime.utcnow().replace(microsecond=0),
+        feed_id=feed.id,
+        uid=task_utils.post_uid(None, url),
+    )
+
+
+def _feed(feed: models.RssFeed, **kwargs) -> task_utils.FeedStub:
+    """Get parsed feed stub."""
+    return task_utils.FeedStub(**{
+        "id": feed.id,
+        "url": feed.rss,
+        "parsed_at": datetime.utcnow().replace(microsecond=0),
+        "modified": None,
+        "etag": '"v2"',
+        "posts": (),
+        **kwargs,
+    })
+
+
+def test_save_feeds(db_session: sa.orm.Session):
+    """
+    Test posts of many feeds are saved once and feeds are updated.
+    """
+    feed, other_feed = factories.RssFeedFactory.create_batch(2)
+    old_post = _post(feed, "http://example.com/old")
+    factories.PostFactory(
+        rss_feed=feed, url=old_post.url, uid=old_post.uid,
+        published_at=datetime.utcnow(),
+    )
+    new_post = _post(feed, "http://example.com/new")
+    other_post = _post(other_feed, "http://example.com/other")
+
+    saved = process_feeds._save_feeds(db_session, [
+        _feed(feed, posts=(old_post, new_post)),
+        _feed(other_feed, posts=(other_post,)),
+    ])
+
+    assert [f.posts for f in saved] == [(new_post,), (other_post,)]
+    db_session.expire_all()
+    assert {p.uid for p in feed.posts} == {old_post.uid, new_post.uid}
+    assert feed.etag == '"v2"'
+    assert feed.parsed_at is not None
+    # The old post has been saved bypassing the rolling counters.
+    assert feed.posts_last_week == 1
+    assert feed.next_fetch_at > datetime.utcnow()
+    assert other_feed.posts_last_week == 1
+
+
+def test_save_feeds_skips_posts_saved_before_guids(
+    db_session: sa.orm.Session,
+):
+    """
+    Test posts saved with uids of their links are not saved again by their
+    entry GUIDs.
+    """
+    feed = factories.RssFeedFactory()
+    url = "http://example.com/old"
+    # The uid migration has backfilled the uid of the link.
+    factories.PostFactory(
+        rss_feed=feed, url=url, uid=task_utils.post_uid(None, url),
+        published_at=datetime.utcnow().replace(microsecond=0),
+    )
+    old_post = _post(feed, url)._replace(
+        uid=task_utils.post_uid("tag:example.com,2021:old", url),
+    )
+    new_post = _post(feed, "http://example.com/new")._replace(
+        uid=task_utils.post_uid("tag:example.com,2021:new", "/new"),
+    )
+
+    saved, = process_feeds._save_feeds(db_session, [
+        _feed(feed, posts=(old_post, new_post)),
+    ])
+
+    assert saved.posts == (new_post,)
+    db_session.expire_all()
+    assert sorted(p.url for p in feed.posts) == [new_post.url, url]
+
+
+def test_save_feeds_backs_off_failed_feed(db_session: sa.orm.Session):
+    """
+    Test failed feed is backed off instead of rescheduled.
+    """
+    feed = factories.RssFeedFactory(failures_count=1)
+
+    process_feeds._save_feeds(db_session, [
+        _feed(feed, error="HttpError: HTTP 500"),
+    ])
+
+    db_session.expire_all()
+    assert feed.failures_count == 2
+    assert feed.last_error == "HttpError: HTTP 500"
+    assert feed.parsed_at is None
+    assert feed.backoff_until > datetime.utcnow() + timedelta(minutes=1)
+    assert feed.next_fetch_at == feed.backoff_until
+
+
+def test_save_feeds_reschedules_deferred_feed(db_session: sa.orm.Session):
+    """
+    Test feed of deferred host is only rescheduled.
+    """
+    parsed_at = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    feed = factories.RssFeedFactory(
+        failures_count=1,
+        last_error="HttpError: HTTP 500",
+        parsed_at=parsed_at,
+        unchanged_rate=0.5,
+    )
+    deferred_until = datetime.utcnow().replace(microsecond=0) + timedelta(
+        minutes=10,
+    )
+
+    process_feeds._save_feeds(db_session, [
+        _feed(feed, etag=None, deferred_until=deferred_until),
+    ])
+
+    db_session.expire_all()
+    assert feed.next_fetch_at == deferred_until
+    assert feed.failures_count == 1
+    assert feed.last_error == "HttpError: HTTP 500"
+    assert feed.parsed_at == parsed_at
+    assert feed.unchanged_rate == 0.5
+
+
+def test_save_feeds_keeps_validators_of_pushed_feed(
+    db_session: sa.orm.Session,
+):
+    """
+    Test pushed feed does not overwrite validators saved by a poll.
+    """
+    feed = factories.RssFeedFactory(etag='"v1"', content_hash="0" * 32)
+    pushed = process_feeds._process_push(
+        process_feeds._feed_job(feed), b"<rss><channel/></rss>", {},
+    )
+    # A poll saves newer validators while the pushed content waits.
+    process_feeds._save_feeds(db_session, [
+        _feed(feed, etag='"v2"', content_hash="1" * 32),
+    ])
+
+    process_feeds._save_feeds(db_session, [pushed])
+
+    db_session.expire_all()
+    assert pushed.etag == '"v1"'
+    assert feed.etag == '"v2"'
+    assert feed.content_hash == "1" * 32
+    assert feed.parsed_at == pushed.parsed_at
+
+
+def test_save_feeds_saves_post_contents(db_session: sa.orm.Session):
+    """
+    Test texts of inserted posts are saved to the side table.
+    """
+    feed = factories.RssFeedFactory()
+    post = _post(feed, "http://example.com/post")._replace(
+        summary=compression.compress("Summary"),
+    )
+    title_only = _post(feed, "http://example.com/title")
+
+    process_feeds._save_feeds(db_session, [
+        _feed(feed, posts=(post, title_only)),
+    ])
+
+    db_session.expire_all()
+    contents = {p.url: p.content for p in feed.posts}
+    assert compression.decompress(contents[post.url].summary) == "Summary"
+    assert contents[post.url].content is None
+    assert contents[title_only.url] is None
+
+
+def test_lease_due_feeds(db_session: sa.orm.Session):
+    """
+    Test due feeds are leased, so they are not dispatched twice.
+    """
+    now = datetime.utcnow().replace(microsecond=0)
+    due_feed, new_feed = factories.RssFeedFactory.create_batch(2)
+    due_feed.next_fetch_at = now - timedelta(minutes=1)
+    later_feed = factories.RssFeedFactory(
+        next_fetch_at=now + timedelta(minutes=1),
+    )
+    db_session.commit()
+
+    jobs = process_feeds._lease_due_feeds(db_session, now)
+
+    assert {j.id for j in jobs} == {due_feed.id, new_feed.id}
+    assert process_feeds._lease_due_feeds(db_session, now) == []
+    db_session.expire_all()
+    lease_end = now + timedelta(seconds=settings.RSS_DISPATCH_LEASE)
+    assert due_feed.next_fetch_at == new_feed.next_fetch_at == lease_end
+    assert later_feed.next_fetch_at == now + timedelta(minutes=1)
+
+
+def test_lock_feeds(
+    db_session: sa.orm.Session,
+    db_engine: sa.engine.Engine,
+):
+    """
+    Test saved feeds are locked against updates but not new posts.
+    """
+    feed = factories.RssFeedFactory()
+    locked = sa.select(models.RssFeed.id).where(models.RssFeed.id == feed.id)
+
+    process_feeds._lock_feeds(db_session, [feed.id])
+
+    try:
+        with pytest.raises(sa.exc.OperationalError):
+            with db_engine.begin() as conn:
+                conn.execute(locked.with_for_update(nowait=True))
+        # Inserts of posts take this lock on their feeds.
+        with db_engine.begin() as conn:
+            conn.execute(
+                locked.with_for_update(read=True, key_share=True, nowait=True)
+            )
+    finally:
+        db_session.rollback()
@@ -0,0 +1,48 @@
+"""
+Tests for storing feed icons.
+"""
+
+import sqlalchemy as sa
+import sqlalchemy.orm
+
+from rss_reader import models
+from rss_reader.fetcher import icons
+from rss_reader.workers.tasks import fetch_icon
+from tests.integration import factories
+
+
+PNG_ICON = icons.FetchedIcon(
+    url="https://example.com/icon.png",
+    content_type="image/png",
+    data=b"\x89PNG\r\n\x1a\nicon",
+)
+
+
+def test_save_icons(db_session: sa.orm.Session, monkeypatch):
+    """
+    Test icons are stored once per content and unused ones are deleted.
+    """
+    old_icon = factories.IconFactory()
+    feeds = [
+        factories.RssFeedFactory(icon_hash=old_icon.hash),
+        factories.RssFeedFactory(),
+        factories.RssFeedFactory(icon="https://example.com/old.png"),
+    ]
+    monkeypatch.setattr(
+        icons, "fetch_all", lambda sources: [PNG_ICON, PNG_ICON, None],
+    )
+
+    saved = fetch_icon.save_icons(
+        db_session, feeds, [icons.IconSource(f.url) for f in feeds],
+    )
+    db_session.commit()
+
+    assert saved == 2
+    stored, = db_session.query(models.Icon).all()
+    assert stored.hash == PNG_ICON.hash
+    assert stored.data == PNG_ICON.data
+    assert [(f.icon, f.icon_hash) for f in feeds] == [
+        (PNG_ICON.url, PNG_ICON.hash),
+        (PNG_ICON.url, PNG_ICON.hash),
+        ("https://example.com/old.png", None),
+    ]
@@ -0,0 +1,128 @@
+"""Module with DNS cache tests."""
+
+import asyncio
+import socket
+
+import aiohttp.abc
+import pytest
+
+from rss_reader.config import settings
+from rss_reader.fetcher import cache
+from rss_reader.fetcher import dns
+
+
+class FakeResolver(aiohttp.abc.AbstractResolver):
+    """Resolver which counts lookups."""
+
+    def __init__(self, fail=False):
+        self.lookups = []
+        self.fail = fail
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.lookups.append(host)
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise socket.gaierror(socket.EAI_NONAME, "Name not known")
+        return [{
+            "hostname": host, "host": "127.0.0.1", "port": port,
+            "family": family, "proto": 0, "flags": socket.AI_NUMERICHOST,
+        }]
+
+    async def close(self):
+        pass
+
+
+class Clock:
+    """Clock which is moved by tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def ttl_cache(clock):
+    return cache.TTLCache(ttl=settings.RSS_DNS_CACHE_TTL, clock=clock)
+
+
+def test_lookups_are_cached_until_ttl(ttl_cache, clock):
+    inner = FakeResolver()
+
+    async def run():
+        resolver = dns.CachingResolver(inner, ttl_cache)
+        first = await resolver.resolve("example.com", 80)
+        second = await resolver.resolve("example.com", 80)
+        await resolver.resolve("example.com", 443)
+        clock.now = settings.RSS_DNS_CACHE_TTL + 1
+        await resolver.resolve("example.com", 80)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert inner.lookups == ["example.com"] * 3
+    assert (ttl_cache.hits, ttl_cache.misses) == (1, 3)
+
+
+def test_cache_is_shared_by_resolvers(ttl_cache):
+    inner = FakeResolver()
+
+    async def run():
+        for _ in range(2):
+            await dns.CachingResolver(inner, ttl_cache).resolve("a.test")
+
+    asyncio.run(run())
+    asyncio.run(run())
+
+    assert inner.lookups == ["a.test"]
+    assert ttl_cache.hits == 3
+
+
+def test_concurrent_lookups_are_shared(ttl_cache):
+    inner = FakeResolver()
+
+    async def run():
+        resolver = dns.CachingResolver(inner, ttl_cache)
+        return await asyncio.gather(
+            *(resolver.resolve("a.test", 80) for _ in range(5))
+        )
+
+    results = asyncio.run(run())
+
+    assert inner.lookups == ["a.test"]
+    assert all(r == results[0] for r in results)
+
+
+def test_failed_lookups_are_cached_for_negative_ttl(ttl_cache, clock):
+    inner = FakeResolver(fail=True)
+
+    async def run():
+        resolver = dns.CachingResolver(inner, ttl_cache)
+        for _ in range(2):
+            with pytest.raises(socket.gaierror):
+                await resolver.resolve("missing.test")
+        clock.now = settings.RSS_DNS_NEGATIVE_TTL + 1
+        inner.fail = False
+        return await resolver.resolve("missing.test")
+
+    addresses = asyncio.run(run())
+
+    assert inner.lookups == ["missing.test"] * 2
+    assert addresses[0]["host"] == "127.0.0.1"
+
+
+def test_stats():
+    dns.dns_cache.clear()
+    dns.dns_cache.set(("a.test", 80, socket.AF_INET), [])
+    dns.dns_cache.get(("a.test", 80, socket.AF_INET))
+    dns.dns_cache.get(("b.test", 80, socket.AF_INET))
+
+    assert dns.stats() == {"hits": 1, "misses": 1, "size": 1}
+    dns.dns_cache.clear()
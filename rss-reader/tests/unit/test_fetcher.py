@@ -0,0 +1,385 @@
+"""Module with feeds fetcher tests."""
+
+from datetime import datetime
+import asyncio
+import contextlib
+import gzip
+import threading
+import tracemalloc
+import zlib
+
+from aiohttp import web
+import brotli
+import pytest
+
+from rss_reader import fetcher
+from rss_reader.config import settings
+from rss_reader.fetcher import archive
+from rss_reader.fetcher import client
+from rss_reader.fetcher import decoding
+from rss_reader.fetcher import exceptions
+from rss_reader.fetcher import ratelimit
+
+
+FEED_BODY = b"<rss><channel><title>Feed</title></channel></rss>"
+FEED_ETAG = '"v1"'
+
+
+async def _feed_handler(request: web.Request) -> web.Response:
+    """Serve a feed which supports conditional requests."""
+    if request.headers.get("If-None-Match") == FEED_ETAG:
+        return web.Response(status=304)
+    return web.Response(
+        body=FEED_BODY,
+        headers={
+            "ETag": FEED_ETAG,
+            "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+        },
+    )
+
+
+async def _missing_handler(request: web.Request) -> web.Response:
+    """Serve a missing feed."""
+    return web.Response(status=404)
+
+
+def _throttled_handler():
+    """Get handler of a feed which asks to retry the first request."""
+    hits = []
+
+    async def handler(request: web.Request) -> web.Response:
+        hits.append(request)
+        if len(hits) == 1:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        return web.Response(body=FEED_BODY)
+
+    return handler
+
+
+ENCODERS = {
+    "gzip": gzip.compress,
+    "deflate": zlib.compress,
+    "br": brotli.compress,
+}
+
+
+async def _overloaded_handler(request: web.Request) -> web.Response:
+    """Serve a feed which is always unavailable."""
+    return web.Response(status=503, headers={"Retry-After": "7"})
+
+
+async def _encoded_handler(request: web.Request) -> web.Response:
+    """Serve a feed compressed with the requested encoding."""
+    encoding = request.match_info["encoding"]
+    return web.Response(
+        body=ENCODERS[encoding](FEED_BODY),
+        headers={"Content-Encoding": encoding},
+    )
+
+
+async def _corrupt_handler(request: web.Request) -> web.Response:
+    """Serve a feed which is not encoded with its content encoding."""
+    return web.Response(
+        body=b"\xff" * 100,
+        headers={"Content-Encoding": request.match_info["encoding"]},
+    )
+
+
+async def _large_handler(request: web.Request) -> web.Response:
+    """Serve a feed which is highly compressed."""
+    return web.Response(
+        body=gzip.compress(FEED_BODY * 1000),
+        headers={"Content-Encoding": "gzip"},
+    )
+
+
+class _LocalLimiter:
+    """Host limiter which records deferrals instead of using Redis."""
+
+    def __init__(self):
+        self.deferred = []
+
+    @contextlib.asynccontextmanager
+    async def slot(self, host):
+        yield
+
+    async def defer(self, host, delay):
+        self.deferred.append((host, delay))
+
+
+def _run_with_server(coro_fn):
+    """Run `coro_fn(base_url)` while a local feed server is running."""
+
+    async def run():
+        web_app = web.Application()
+        web_app.router.add_get("/feed", _feed_handler)
+        web_app.router.add_get("/missing", _missing_handler)
+        web_app.router.add_get("/throttled", _throttled_handler())
+        web_app.router.add_get("/overloaded", _overloaded_handler)
+        web_app.router.add_get("/encoded/{encoding}", _encoded_handler)
+        web_app.router.add_get("/corrupt/{encoding}", _corrupt_handler)
+        web_app.router.add_get("/large", _large_handler)
+        runner = web.AppRunner(web_app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await coro_fn(f"http://127.0.0.1:{port}")
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_fetch_many():
+    """Test feeds are fetched with conditional headers in request order."""
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [
+                fetcher.FetchRequest(url=f"{base_url}/feed"),
+                fetcher.FetchRequest(url=f"{base_url}/feed", etag=FEED_ETAG),
+                fetcher.FetchRequest(url=f"{base_url}/missing"),
+            ],
+            concurrency=2,
+        )
+
+    fresh, not_modified, missing = _run_with_server(fetch)
+
+    assert fresh.ok
+    assert fresh.body == FEED_BODY
+    assert fresh.etag == FEED_ETAG
+    assert fresh.modified == datetime(2015, 10, 21, 7, 28)
+
+    assert not_modified.not_modified
+    assert not_modified.body == b""
+
+    assert not missing.ok
+    assert missing.status == 404
+    assert missing.error is not None
+
+
+def test_fetch_many_reports_results():
+    """Test each result is reported with its request index."""
+    reported = []
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [
+                fetcher.FetchRequest(url=f"{base_url}/feed"),
+                fetcher.FetchRequest(url=f"{base_url}/missing"),
+            ],
+            concurrency=2,
+            on_result=lambda i, result: reported.append((i, result.status)),
+        )
+
+    _run_with_server(fetch)
+
+    assert sorted(reported) == [(0, 200), (1, 404)]
+
+
+def test_fetch_many_archives_fetches(tmp_path):
+    """Test fetches are archived and read back as they are fetched."""
+    path = str(tmp_path / "fetches.msgpack.zst")
+    writer = archive.ArchiveWriter(path)
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [
+                fetcher.FetchRequest(url=f"{base_url}/feed", etag='"v0"'),
+                fetcher.FetchRequest(url=f"{base_url}/missing"),
+            ],
+            concurrency=1,
+            on_fetched=writer.write,
+        )
+
+    results = _run_with_server(fetch)
+    writer.close()
+    fetches = list(archive.read(path))
+
+    assert [f.request.etag for f in fetches] == ['"v0"', None]
+    assert [f.result[:-2] for f in fetches] == [r[:-2] for r in results]
+    assert [f.result.wire_size for f in fetches] == [
+        r.wire_size for r in results
+    ]
+    assert isinstance(fetches[1].result.error, exceptions.HttpError)
+    assert all(f.elapsed > 0 for f in fetches)
+
+
+def test_archive_writes_off_fetching_thread(tmp_path, monkeypatch):
+    """Test fetches are packed and written by the writer thread in order."""
+    pack = archive._pack
+    threads = []
+
+    def pack_on_thread(fetch):
+        threads.append(threading.current_thread())
+        return pack(fetch)
+
+    monkeypatch.setattr(archive, "_pack", pack_on_thread)
+    path = str(tmp_path / "fetches.msgpack.zst")
+    writer = archive.ArchiveWriter(path)
+    urls = [f"http://a.test/{num}" for num in range(100)]
+    for url in urls:
+        result = client.FetchResult(
+            url=url, status=200, headers={}, body=FEED_BODY,
+            etag=None, modified=None,
+        )
+        writer.write(client.FetchRequest(url=url), result, 0.0, 0.1)
+    writer.close()
+
+    assert [f.request.url for f in archive.read(path)] == urls
+    assert threading.current_thread() not in threads
+
+
+def test_read_archive_cut_short(tmp_path):
+    """Test an archive cut short is read up to its last whole record."""
+    path = tmp_path / "fetches.msgpack.zst"
+    writer = archive.ArchiveWriter(str(path))
+    result = client.FetchResult(
+        url="http://a.test/feed", status=200, headers={}, body=FEED_BODY,
+        etag=None, modified=None,
+    )
+    for _ in range(2):
+        writer.write(client.FetchRequest(url=result.url), result, 0.0, 0.1)
+    writer.close()
+    path.write_bytes(path.read_bytes()[:-5])
+
+    fetches = list(archive.read(str(path)))
+
+    assert [f.result for f in fetches] == [result]
+
+
+def test_build_headers():
+    """Test conditional headers are built from validators."""
+    headers = client.build_headers(fetcher.FetchRequest(
+        url="http://example.com/feed",
+        modified=datetime(2015, 10, 21, 7, 28),
+        etag=FEED_ETAG,
+    ))
+
+    assert headers["If-None-Match"] == FEED_ETAG
+    assert headers["If-Modified-Since"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+
+
+def test_fetch_many_honors_retry_after():
+    """Test throttled feed is deferred and fetched again."""
+    limiter = _LocalLimiter()
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [fetcher.FetchRequest(url=f"{base_url}/throttled")],
+            concurrency=1,
+            limiter=limiter,
+        )
+
+    result, = _run_with_server(fetch)
+
+    assert result.ok
+    assert result.body == FEED_BODY
+    assert limiter.deferred == [("127.0.0.1", 1.0)]
+
+
+def test_fetch_many_defers_after_retries(monkeypatch):
+    """Test feed is deferred, not failed, once its retries are spent."""
+    monkeypatch.setattr(settings, "RSS_HOST_MAX_RETRIES", 1)
+    limiter = _LocalLimiter()
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [fetcher.FetchRequest(url=f"{base_url}/overloaded")],
+            concurrency=1,
+            limiter=limiter,
+        )
+
+    result, = _run_with_server(fetch)
+
+    assert isinstance(result.error, exceptions.HostDeferred)
+    assert result.error.delay == 7.0
+    assert limiter.deferred == [("127.0.0.1", 7.0)] * 2
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("120", 120.0),
+        ("Wed, 21 Oct 2015 07:30:00 GMT", 120.0),
+        ("Wed, 21 Oct 2015 07:00:00 GMT", 0.0),
+        ("soon", None),
+        (None, None),
+    ]
+)
+def test_parse_retry_after(value, expected):
+    """Test Retry-After is parsed from both delay and date formats."""
+    now = datetime(2015, 10, 21, 7, 28)
+    assert ratelimit.parse_retry_after(value, now=now) == expected
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate", "br"])
+def test_fetch_many_compressed(encoding):
+    """Test compressed feeds are decoded and sizes are recorded."""
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [fetcher.FetchRequest(url=f"{base_url}/encoded/{encoding}")],
+            concurrency=1,
+        )
+
+    result, = _run_with_server(fetch)
+
+    assert result.ok
+    assert result.body == FEED_BODY
+    assert result.body_size == len(FEED_BODY)
+    assert result.wire_size == len(ENCODERS[encoding](FEED_BODY))
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate", "br"])
+def test_fetch_many_corrupt(encoding):
+    """Test corrupt body fails its feed only."""
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [
+                fetcher.FetchRequest(url=f"{base_url}/corrupt/{encoding}"),
+                fetcher.FetchRequest(url=f"{base_url}/feed"),
+            ],
+            concurrency=2,
+        )
+
+    corrupt, fresh = _run_with_server(fetch)
+
+    assert not corrupt.ok
+    assert isinstance(corrupt.error, exceptions.DecodeError)
+    assert fresh.ok
+
+
+def test_fetch_many_too_large(monkeypatch):
+    """Test fetch is aborted once decoded body exceeds the limit."""
+    monkeypatch.setattr(settings, "RSS_FETCH_MAX_BYTES", len(FEED_BODY) * 10)
+
+    async def fetch(base_url):
+        return await client.fetch_many(
+            [fetcher.FetchRequest(url=f"{base_url}/large")],
+            concurrency=1,
+        )
+
+    result, = _run_with_server(fetch)
+
+    assert not result.ok
+    assert isinstance(result.error, exceptions.ResponseTooLarge)
+
+
+def test_brotli_decoder_too_large():
+    """Test brotli body is not decoded past the limit."""
+    bomb = brotli.compress(b"\0" * 64 * 2 ** 20, quality=1)
+    decoder = decoding.create_decoder("br", max_size=1024)
+
+    tracemalloc.start()
+    try:
+        with pytest.raises(exceptions.ResponseTooLarge):
+            decoder.decode(bomb)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 2 ** 20
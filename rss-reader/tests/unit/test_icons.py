@@ -0,0 +1,254 @@
+"""Module with icon resolver tests."""
+
+import asyncio
+
+from aiohttp import web
+import pytest
+
+from rss_reader.fetcher import cache
+from rss_reader.fetcher import icons
+
+
+LINKED_PAGE = (
+    b"<!doctype html><html><head><title>Blog</title>"
+    b'<link rel="stylesheet" href="/style.css">'
+    b'<link rel="Shortcut Icon" href="static/icon.png">'
+    b"</head>"
+)
+
+PNG_ICON = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+ICO_ICON = b"\x00\x00\x01\x00\x01\x00\x10\x10"
+
+
+@pytest.fixture(autouse=True)
+def clear_icons_cache():
+    """Start each test with an empty icons cache."""
+    icons.icons_cache.clear()
+    yield
+    icons.icons_cache.clear()
+
+
+def _run_with_server(coro_fn, favicon=True):
+    """Run `coro_fn(base_url, hits)` while a local site is running."""
+    hits = []
+
+    async def run():
+        # The linked page body does not end until the test is done.
+        done = asyncio.Event()
+
+        async def linked_handler(request):
+            hits.append(request.path)
+            response = web.StreamResponse(
+                headers={"Content-Type": "text/html"},
+            )
+            await response.prepare(request)
+            await response.write(LINKED_PAGE)
+            await response.write(b"<body>" + b"<p>post</p>" * 1000)
+            await done.wait()
+            return response
+
+        async def plain_handler(request):
+            hits.append(request.path)
+            return web.Response(
+                body=b"<html><head><title>Blog</title></head></html>",
+                content_type="text/html",
+            )
+
+        async def favicon_handler(request):
+            hits.append(request.path)
+            if not favicon:
+                return web.Response(status=404)
+            return web.Response(body=ICO_ICON, content_type="image/x-icon")
+
+        async def icon_handler(request):
+            # The content type is often wrong, the format is sniffed.
+            return web.Response(
+                body=PNG_ICON, content_type="application/octet-stream",
+            )
+
+        async def soft_missing_handler(request):
+            return web.Response(body=b"<html>Not found</html>")
+
+        web_app = web.Application()
+        web_app.router.add_get("/linked/", linked_handler)
+        web_app.router.add_get("/plain/", plain_handler)
+        web_app.router.add_get("/favicon.ico", favicon_handler)
+        web_app.router.add_get("/linked/static/icon.png", icon_handler)
+        web_app.router.add_get("/missing.png", soft_missing_handler)
+        runner = web.AppRunner(web_app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await coro_fn(f"http://127.0.0.1:{port}", hits)
+        finally:
+            done.set()
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "html,expected",
+    [
+        (LINKED_PAGE, "http://example.com/blog/static/icon.png"),
+        (
+            b'<html><head><base href="/assets/">'
+            b'<link rel="icon" href="icon.svg"></head>',
+            "http://example.com/assets/icon.svg",
+        ),
+        (
+            b'<link rel="apple-touch-icon" href="/touch.png">'
+            b'<link rel="icon" href="//cdn.example.com/icon.png">',
+            "http://cdn.example.com/icon.png",
+        ),
+        (b"<html><head></head><body></body></html>", None),
+    ]
+)
+def test_icon_finder(html, expected):
+    """Test icon links are found in the head and resolved."""
+    finder = icons.IconFinder()
+    for start in range(0, len(html), 7):
+        if finder.feed(html[start:start + 7]):
+            break
+
+    assert finder.icon_url("http://example.com/blog/") == expected
+
+
+def test_icon_finder_stops_at_head_end():
+    """Test links after the head are not looked for."""
+    finder = icons.IconFinder()
+
+    assert finder.feed(
+        b"<html><head></head><body><link rel='icon' href='/icon.png'>"
+    )
+    assert finder.icon_url("http://example.com/") is None
+
+
+def test_resolve_many():
+    """Test linked icon is found without reading the whole page."""
+
+    async def resolve(base_url, hits):
+        return await asyncio.wait_for(
+            icons.resolve_many([f"{base_url}/linked/"], concurrency=1),
+            timeout=10,
+        )
+
+    icon_url, = _run_with_server(resolve)
+
+    assert icon_url.endswith("/linked/static/icon.png")
+
+
+@pytest.mark.parametrize("favicon", [True, False])
+def test_resolve_many_falls_back_to_favicon(favicon):
+    """Test host favicon is checked if page does not link an icon."""
+
+    async def resolve(base_url, hits):
+        icon_urls = await icons.resolve_many(
+            [f"{base_url}/plain/"], concurrency=1,
+        )
+        return base_url, icon_urls, hits
+
+    base_url, icon_urls, hits = _run_with_server(resolve, favicon=favicon)
+
+    assert icon_urls == [f"{base_url}/favicon.ico" if favicon else None]
+    assert hits == ["/plain/", "/favicon.ico"]
+
+
+def test_resolve_many_caches_per_host():
+    """Test pages of the same host share a single lookup."""
+
+    async def resolve(base_url, hits):
+        first = await icons.resolve_many(
+            [f"{base_url}/plain/", f"{base_url}/linked/"], concurrency=2,
+        )
+        second = await icons.resolve_many(
+            [f"{base_url}/linked/"], concurrency=1,
+        )
+        return first + second, hits
+
+    icon_urls, hits = _run_with_server(resolve)
+
+    assert len(set(icon_urls)) == 1
+    assert hits == ["/plain/", "/favicon.ico"]
+    assert icons.icons_cache.hits == 1
+
+
+def test_resolve_many_unreachable():
+    """Test unreachable hosts have no icon and are cached shortly."""
+    icon_urls = asyncio.run(icons.resolve_many(
+        ["http://127.0.0.1:1/"], concurrency=1,
+    ))
+
+    assert icon_urls == [None]
+    expires_at, _ = icons.icons_cache._items["http://127.0.0.1:1"]
+    assert expires_at < icons.icons_cache._clock() + icons.ERROR_TTL + 1
+
+
+@pytest.mark.parametrize(
+    "data,expected",
+    [
+        (PNG_ICON, "image/png"),
+        (ICO_ICON, "image/x-icon"),
+        (b"GIF89a\x10\x00", "image/gif"),
+        (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+        (b"RIFF\x1a\x00\x00\x00WEBPVP8 ", "image/webp"),
+        (
+            b'<?xml version="1.0"?>\n<SVG xmlns="http://www.w3.org/2000/svg">',
+            "image/svg+xml",
+        ),
+        (b"<!doctype html><html><body>Not found", None),
+        (b"", None),
+    ]
+)
+def test_sniff_content_type(data, expected):
+    """Test icon formats are detected from the data."""
+    assert icons.sniff_content_type(data) == expected
+
+
+def test_fetch_many():
+    """Test icons are resolved and downloaded once per host."""
+
+    async def fetch(base_url, hits):
+        return await icons.fetch_many(
+            [
+                icons.IconSource(f"{base_url}/linked/"),
+                icons.IconSource(f"{base_url}/linked/"),
+                icons.IconSource(f"{base_url}/plain/"),
+                icons.IconSource(
+                    f"{base_url}/plain/", icon_url=f"{base_url}/missing.png",
+                ),
+            ],
+            concurrency=2,
+        )
+
+    linked, same, cached, missing = _run_with_server(fetch)
+
+    assert linked.url.endswith("/linked/static/icon.png")
+    assert linked.content_type == "image/png"
+    assert linked.data == PNG_ICON
+    assert same == linked
+    # Pages of the same host share the icon resolved for the first one.
+    assert cached == linked
+    assert missing is None
+
+
+def test_ttl_cache():
+    """Test items expire after their TTL and the oldest are evicted."""
+    now = [0.0]
+    ttl_cache = cache.TTLCache(ttl=10, max_size=2, clock=lambda: now[0])
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", None, ttl=1)
+
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("b", "missing") is None
+
+    now[0] = 5.0
+    assert ttl_cache.get("b", "missing") == "missing"
+
+    ttl_cache.set("c", 3)
+    ttl_cache.set("d", 4)
+    assert ttl_cache.get("a") is None
+    assert len(ttl_cache) == 2
+    assert (ttl_cache.hits, ttl_cache.misses) == (2, 2)
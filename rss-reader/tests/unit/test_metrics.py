@@ -0,0 +1,138 @@
+"""Module with run metrics tests."""
+
+from datetime import datetime
+import json
+import sys
+
+import pytest
+
+from rss_reader.workers import metrics
+
+
+class _LocalRedis:
+    """Redis client which keeps values in memory instead of Redis."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def pipeline(self):
+        return _LocalPipeline(self)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = str(value)
+        self.ttls[key] = ex
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def hset(self, key, mapping):
+        self.values.setdefault(key, {}).update(
+            (name, str(value)) for name, value in mapping.items()
+        )
+
+    def hincrby(self, key, name, amount):
+        values = self.values.setdefault(key, {})
+        values[name] = str(int(values.get(name, 0)) + amount)
+
+    def hgetall(self, key):
+        return dict(self.values.get(key, {}))
+
+
+class _LocalPipeline:
+    """Pipeline which runs commands of `_LocalRedis` on execute."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+        return command
+
+    def execute(self):
+        return [fn(*args, **kwargs) for fn, args, kwargs in self.commands]
+
+
+def test_run_round_trip():
+    """Test progress of a run is recorded and read back."""
+    client = _LocalRedis()
+
+    metrics.start_run(client, "run-1", feeds_total=3, shards_total=2)
+    metrics.record_saved(
+        client, "run-1", feeds=2, posts=5, failed=1, shards=1,
+    )
+    run = metrics.record_saved(
+        client, "run-1", feeds=1, posts=1, failed=0, shards=1,
+    )
+
+    assert metrics.get_run(client) == metrics.get_run(client, "run-1") == {
+        "run_id": "run-1", **run,
+    }
+    assert {k: v for k, v in run.items() if k != "started_at"} == {
+        "feeds_total": "3",
+        "shards_total": "2",
+        "feeds_done": "3",
+        "shards_done": "2",
+        "posts_saved": "6",
+        "feeds_failed": "1",
+    }
+    assert client.ttls[metrics.LAST_RUN_KEY] == metrics.RUN_TTL
+    assert metrics.get_run(client, "unknown") == {}
+    assert metrics.get_run(_LocalRedis()) == {}
+
+
+def test_retention_round_trip():
+    """Test a finished retention run is recorded and read back."""
+    client = _LocalRedis()
+    started_at = datetime(2021, 10, 4, 10, 0)
+
+    metrics.record_retention(
+        client, "run-1", started_at=started_at, posts_removed=10, batches=2,
+        seconds=1.23456, archive="/archive/posts.jsonl.zst",
+    )
+    metrics.record_retention(
+        client, "run-2", started_at=started_at, posts_removed=0, batches=0,
+        seconds=0.1, archive=None,
+    )
+
+    assert metrics.get_retention(client, "run-1") == {
+        "run_id": "run-1",
+        "started_at": "2021-10-04T10:00:00",
+        "posts_removed": "10",
+        "batches": "2",
+        "seconds": "1.235",
+        "archive": "/archive/posts.jsonl.zst",
+    }
+    assert metrics.get_retention(client)["run_id"] == "run-2"
+    assert metrics.get_retention(client)["archive"] == ""
+    assert client.ttls[metrics.LAST_RETENTION_KEY] == metrics.RETENTION_TTL
+    assert metrics.get_retention(client, "unknown") == {}
+
+
+def test_main_prints_run(monkeypatch, capsys):
+    """Test metrics of the last run are printed as JSON."""
+    client = _LocalRedis()
+    metrics.start_run(client, "run-1", feeds_total=1, shards_total=1)
+    monkeypatch.setattr(metrics, "get_client", lambda: client)
+    monkeypatch.setattr(sys, "argv", ["metrics", "run"])
+
+    metrics.main()
+
+    run = json.loads(capsys.readouterr().out)
+    assert run["run_id"] == "run-1"
+    assert run["feeds_total"] == "1"
+
+
+@pytest.mark.parametrize("kind", ["run", "retention"])
+def test_main_no_runs(monkeypatch, kind):
+    """Test missing metrics fail the command."""
+    monkeypatch.setattr(metrics, "get_client", _LocalRedis)
+    monkeypatch.setattr(sys, "argv", ["metrics", kind])
+
+    with pytest.raises(SystemExit, match=f"No {kind} metrics are found"):
+        metrics.main()
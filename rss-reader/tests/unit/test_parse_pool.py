@@ -0,0 +1,85 @@
+"""Module with parse pool tests."""
+
+from datetime import datetime
+import asyncio
+import concurrent.futures.process
+import os
+import time
+
+import pytest
+
+from rss_reader import fetcher
+from rss_reader.workers.tasks import parse_pool
+from rss_reader.workers.tasks import process_feeds
+from rss_reader.workers.tasks import utils as task_utils
+
+
+FEED_BODY = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Feed</title>
+<item><title>Post</title><link>http://example.com/post</link>
+<pubDate>Tue, 05 Oct 2021 10:00:00 GMT</pubDate></item>
+</channel></rss>
+"""
+
+
+@pytest.fixture
+def pool():
+    pool = parse_pool.ParsePool(processes=1, max_pending=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_without_processes_runs_in_thread():
+    """Test functions run by the submitting thread without processes."""
+    pool = parse_pool.ParsePool(processes=0, max_pending=1)
+
+    assert pool.submit(os.getpid).result() == os.getpid()
+    with pytest.raises(ZeroDivisionError):
+        pool.submit(divmod, 1, 0).result()
+
+
+def test_pool_runs_in_processes(pool):
+    """Test functions run by pool processes."""
+    assert pool.submit(os.getpid).result() != os.getpid()
+
+
+def test_pool_backlog_is_bounded(pool):
+    """Test submit waits while the backlog is full."""
+    pool.submit(os.getpid).result()
+    first = pool.submit(time.sleep, 0.2)
+    second = pool.submit(time.sleep, 0)
+
+    assert first.done()
+    second.result()
+
+
+def test_pool_parses_feed_on_event_loop(pool):
+    """Test fetched feed is parsed by the pool from the event loop."""
+    job = task_utils.FeedJob(
+        id=1,
+        url="http://example.com/feed",
+        prev_parsed_at=datetime(2021, 10, 1),
+        modified_at=None,
+        etag=None,
+    )
+    result = fetcher.FetchResult(
+        url=job.url,
+        status=200,
+        headers={"content-type": "application/rss+xml"},
+        body=FEED_BODY,
+        etag='"v1"',
+        modified=None,
+    )
+
+    feed = asyncio.run(pool.run(process_feeds._parse_response, job, result))
+
+    assert feed.etag == '"v1"'
+    assert [p.title for p in feed.posts] == ["Post"]
+
+
+def test_pool_restarts_after_process_dies(pool):
+    """Test pool is started anew once its process dies."""
+    with pytest.raises(concurrent.futures.process.BrokenProcessPool):
+        pool.submit(os._exit, 1).result()
+
+    assert pool.submit(os.getpid).result() != os.getpid()
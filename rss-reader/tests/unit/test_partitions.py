@@ -0,0 +1,45 @@
+"""Module with monthly partitions tests."""
+
+from datetime import datetime
+
+from rss_reader.db import partitions
+from rss_reader.workers.tasks import partitions as partitions_tasks
+
+
+def test_months():
+    """Test month starts are computed across years."""
+    month = partitions.month_start(datetime(2021, 11, 30, 23, 59, 59, 1))
+
+    assert month == datetime(2021, 11, 1)
+    assert partitions.add_months(month, 2) == datetime(2022, 1, 1)
+    assert partitions.add_months(month, -11) == datetime(2020, 12, 1)
+    assert partitions.add_months(month, -23) == datetime(2019, 12, 1)
+    assert partitions.partition_name("posts", month) == "posts_p2021_11"
+
+
+def test_plan():
+    """Test missing partitions are created and expired ones removed."""
+    months = [
+        datetime(2021, 1, 1),
+        datetime(2021, 8, 1),
+        datetime(2021, 9, 1),
+        datetime(2021, 11, 1),
+    ]
+
+    create, remove = partitions_tasks.plan(
+        months, datetime(2021, 10, 10, 12, 30), ahead=2, retention=1,
+    )
+
+    assert create == [datetime(2021, 10, 1), datetime(2021, 12, 1)]
+    assert remove == [datetime(2021, 1, 1), datetime(2021, 8, 1)]
+
+
+def test_plan_keeps_all_partitions_without_retention():
+    """Test partitions are not removed without retention."""
+    create, remove = partitions_tasks.plan(
+        [datetime(2001, 1, 1)], datetime(2021, 10, 10), ahead=0,
+        retention=None,
+    )
+
+    assert create == [datetime(2021, 10, 1)]
+    assert remove == []
@@ -0,0 +1,41 @@
+"""Module with rolling post counters tests."""
+
+from datetime import datetime
+from datetime import timedelta
+
+from rss_reader.workers.tasks import post_counters
+
+
+NOW = datetime(2021, 10, 10, 12, 30)
+
+
+def test_count_posts():
+    """Test posts are counted in hourly buckets and counter windows."""
+    posts = [
+        (1, datetime(2021, 10, 10, 12, 5)),
+        (1, datetime(2021, 10, 10, 12, 25)),
+        (1, NOW - timedelta(days=3)),
+        (2, NOW - timedelta(days=20)),
+        (2, NOW - timedelta(days=40)),
+    ]
+
+    buckets, increments = post_counters.count_posts(posts, NOW)
+
+    assert buckets == {
+        (1, datetime(2021, 10, 10, 12)): 2,
+        (1, datetime(2021, 10, 7, 12)): 1,
+        (2, datetime(2021, 9, 20, 12)): 1,
+    }
+    assert increments == {
+        1: {"posts_last_day": 2, "posts_last_week": 3, "posts_last_month": 3},
+        2: {"posts_last_day": 0, "posts_last_week": 0, "posts_last_month": 1},
+    }
+
+
+def test_count_posts_window_boundary():
+    """Test posts are counted by their buckets at window boundaries."""
+    posts = [(1, datetime(2021, 10, 9, 12, 10))]
+
+    _, increments = post_counters.count_posts(posts, NOW)
+
+    assert increments[1]["posts_last_day"] == 1
@@ -0,0 +1,334 @@
+"""Module with feeds processing tests."""
+
+from datetime import datetime
+from datetime import timedelta
+import asyncio
+
+import pytest
+
+from rss_reader import fetcher
+from rss_reader.config import settings
+from rss_reader.db import compression
+from rss_reader.fetcher import exceptions
+from rss_reader.workers.tasks import parse_pool
+from rss_reader.workers.tasks import process_feeds
+from rss_reader.workers.tasks import utils as task_utils
+
+
+FEED_URL = "http://example.com/feed"
+FEED_BODY = b"""<?xml version="1.0"?>
+<rss version="2.0">
+  <channel>
+    <title>Feed</title>
+    <item>
+      <title>Second</title>
+      <link>/second</link>
+      <pubDate>Tue, 05 Oct 2021 10:00:00 GMT</pubDate>
+    </item>
+    <item>
+      <title>First</title>
+      <link>http://example.com/first</link>
+      <pubDate>Mon, 04 Oct 2021 10:00:00 GMT</pubDate>
+    </item>
+  </channel>
+</rss>
+"""
+
+
+def _job(**kwargs) -> task_utils.FeedJob:
+    """Get feed job."""
+    params = {
+        "id": 1,
+        "url": FEED_URL,
+        "prev_parsed_at": None,
+        "modified_at": None,
+        "etag": None,
+        **kwargs,
+    }
+    return task_utils.FeedJob(**params)
+
+
+def _result(**kwargs) -> fetcher.FetchResult:
+    """Get fetch result."""
+    params = {
+        "url": FEED_URL,
+        "status": 200,
+        "headers": {"content-type": "application/rss+xml"},
+        "body": FEED_BODY,
+        "etag": '"v2"',
+        "modified": None,
+        **kwargs,
+    }
+    return fetcher.FetchResult(**params)
+
+
+@pytest.fixture
+def process(monkeypatch):
+    """Get function which fetches and parses a feed as batches do."""
+    pool = parse_pool.ParsePool(processes=0, max_pending=1)
+    monkeypatch.setattr(parse_pool, "get_pool", lambda: pool)
+
+    def process(
+        job: task_utils.FeedJob,
+        result: fetcher.FetchResult,
+    ) -> task_utils.FeedStub:
+        def fetch_all(requests, *, concurrency, on_result, on_fetched=None):
+            asyncio.run(on_result(0, result))
+            return [result]
+
+        monkeypatch.setattr(fetcher, "fetch_all", fetch_all)
+        feed, = process_feeds._fetch_and_parse([job], concurrency=1)
+        return feed
+
+    return process
+
+
+def test_fetch_and_parse_new_posts(process):
+    """Test new posts are parsed from feed body."""
+    feed = process(
+        _job(prev_parsed_at=datetime(2021, 10, 6)),
+        _result(),
+    )
+
+    assert feed.etag == '"v2"'
+    assert feed.content_hash == _result().content_hash
+    assert [(p.title, p.url) for p in feed.posts] == [
+        ("Second", "http://example.com/second"),
+    ]
+
+
+def test_fetch_and_parse_not_modified(process):
+    """Test validators of not modified feed are kept."""
+    job = _job(
+        modified_at=datetime(2021, 10, 5),
+        etag='"v1"',
+        content_hash="hash",
+    )
+
+    feed = process(
+        job, _result(status=304, body=b"", etag=None),
+    )
+
+    assert feed.posts == ()
+    assert feed.modified == job.modified_at
+    assert feed.etag == job.etag
+    assert feed.content_hash == job.content_hash
+
+
+def test_fetch_and_parse_failed(process):
+    """Test fetch error is recorded for the feed circuit breaker."""
+    feed = process(
+        _job(),
+        _result(status=404, body=b"", error=exceptions.HttpError(404)),
+    )
+
+    assert feed.posts == ()
+    assert feed.error == "HttpError: HTTP 404"
+
+
+def test_fetch_and_parse_host_deferred(process):
+    """Test feed is not failed when its host is deferred."""
+    feed = process(
+        _job(),
+        _result(
+            status=0,
+            body=b"",
+            error=exceptions.HostDeferred("example.com", 10),
+        ),
+    )
+
+    assert feed.error is None
+    assert feed.deferred_until == feed.parsed_at + timedelta(seconds=10)
+    assert feed.content_hash is None
+
+
+def test_fetch_and_parse_invalid_entry(process):
+    """Test validators and hash of feed which fails to parse are kept."""
+    job = _job(etag='"v1"', content_hash="hash")
+
+    feed = process(
+        job,
+        _result(body=(
+            b"<rss><channel><item><title>No date</title>"
+            b"<link>http://example.com/</link></item></channel></rss>"
+        )),
+    )
+
+    assert feed.error == "InvalidEntry: "
+    assert feed.etag == job.etag
+    assert feed.content_hash == job.content_hash
+
+
+def test_fetch_and_parse_same_content(process):
+    """Test feed body which has not changed is not parsed."""
+    feed = process(
+        _job(content_hash=_result().content_hash),
+        _result(body=FEED_BODY),
+    )
+
+    assert feed.posts == ()
+    assert feed.content_hash == _result().content_hash
+
+
+def test_fetch_and_parse_streaming(monkeypatch, process):
+    """Test streaming parser stops at the first entry which is not new."""
+    monkeypatch.setattr(settings, "RSS_STREAM_PARSING", True)
+
+    feed = process(
+        _job(prev_parsed_at=datetime(2021, 10, 6)),
+        _result(),
+    )
+
+    assert [(p.title, p.url) for p in feed.posts] == [
+        ("Second", "http://example.com/second"),
+    ]
+
+
+def test_fetch_and_parse_streaming_fallback(monkeypatch, process):
+    """Test malformed feed is parsed with feedparser in streaming mode."""
+    monkeypatch.setattr(settings, "RSS_STREAM_PARSING", True)
+    body = FEED_BODY.replace(b"<title>Second", b"<title>Second & Co", 1)
+
+    feed = process(_job(), _result(body=body))
+
+    assert len(feed.posts) == 2
+
+
+def test_entry_2_post_uid():
+    """Test post is identified by GUID and by canonical link otherwise."""
+    entry = {
+        "title": "Post",
+        "link": "HTTP://Example.com:80/post?utm_source=rss#comments",
+        "published_parsed": (2021, 10, 5, 10, 0, 0, 1, 278, 0),
+    }
+
+    by_link = process_feeds._entry_2_post(entry, feed_id=1)
+    by_guid = process_feeds._entry_2_post({**entry, "id": "tag:1"}, 1)
+
+    assert by_link.uid == task_utils.post_uid(None, "http://example.com/post")
+    assert by_guid.uid == task_utils.post_uid("tag:1", "http://other.com/")
+    assert by_link.uid != by_guid.uid
+
+
+def test_shard_jobs(monkeypatch):
+    """Test feeds are dispatched in shards spread over lanes."""
+    monkeypatch.setattr(settings, "RSS_DISPATCH_SHARD_SIZE", 5)
+    monkeypatch.setattr(settings, "RSS_DISPATCH_SHARDS_IN_FLIGHT", 2)
+    jobs = [_job(id=i) for i in range(12)]
+
+    lanes = process_feeds._shard_jobs(jobs)
+
+    assert [[[j.id for j in shard] for shard in lane] for lane in lanes] == [
+        [list(range(0, 5)), [10, 11]],
+        [list(range(5, 10))],
+    ]
+
+
+def test_shard_chord(monkeypatch):
+    """Test shard dispatches the rest of its lane once saved or failed."""
+    monkeypatch.setattr(settings, "RSS_FETCH_BATCH_SIZE", 2)
+    shard, next_shard = [_job(id=i) for i in range(3)], [_job(id=3)]
+
+    chord = process_feeds._shard_chord(shard, [next_shard], run_id="run")
+
+    assert [[j.id for j in batch.args[0]] for batch in chord.tasks] == [
+        [0, 1], [2],
+    ]
+    assert all(batch.immutable for batch in chord.tasks)
+    assert chord.body.kwargs == {"run_id": "run"}
+    dispatch_next = process_feeds.dispatch_shards.si([next_shard], "run")
+    assert chord.body.options["link"] == [dispatch_next]
+    assert chord.body.options["link_error"] == [dispatch_next]
+
+    last = process_feeds._shard_chord(next_shard, [], run_id="run")
+
+    assert "link" not in last.body.options
+    assert "link_error" not in last.body.options
+
+
+def test_fetch_and_parse(monkeypatch):
+    """Test fetched feeds are parsed on the pool as soon as they are done."""
+    pool = parse_pool.ParsePool(processes=0, max_pending=1)
+    monkeypatch.setattr(parse_pool, "get_pool", lambda: pool)
+    parsed = []
+
+    def fetch_all(requests, *, concurrency, on_result, on_fetched=None):
+        results = [
+            _result(url=r.url, status=304, body=b"")
+            if r.etag else _result(url=r.url)
+            for r in requests
+        ]
+
+        async def report():
+            for index, result in reversed(list(enumerate(results))):
+                await on_result(index, result)
+
+        asyncio.run(report())
+        return results
+
+    monkeypatch.setattr(fetcher, "fetch_all", fetch_all)
+
+    feeds = process_feeds._fetch_and_parse(
+        [_job(id=1), _job(id=2, etag='"v1"')],
+        concurrency=2,
+        on_parsed=lambda feed: parsed.append(feed.id),
+    )
+
+    assert [(f.id, len(f.posts)) for f in feeds] == [(1, 2), (2, 0)]
+    assert parsed == [2, 1]
+
+
+def test_fetch_and_parse_failed_feed(monkeypatch):
+    """Test feed which fails on the pool fails alone and is backed off."""
+    pool = parse_pool.ParsePool(processes=0, max_pending=1)
+    monkeypatch.setattr(parse_pool, "get_pool", lambda: pool)
+    parse_response = process_feeds._parse_response
+
+    def fetch_all(requests, *, concurrency, on_result, on_fetched=None):
+        results = [_result(url=r.url) for r in requests]
+
+        async def report():
+            for index, result in enumerate(results):
+                await on_result(index, result)
+
+        asyncio.run(report())
+        return results
+
+    def parse_or_die(job, result):
+        if job.id == 2:
+            raise RuntimeError("Parse process has died")
+        return parse_response(job, result)
+
+    monkeypatch.setattr(fetcher, "fetch_all", fetch_all)
+    monkeypatch.setattr(process_feeds, "_parse_response", parse_or_die)
+
+    ok, failed = process_feeds._fetch_and_parse(
+        [_job(id=1), _job(id=2, etag='"v1"', content_hash="hash")],
+        concurrency=2,
+    )
+
+    assert (ok.error, len(ok.posts)) == (None, 2)
+    assert failed.error == "RuntimeError: Parse process has died"
+    assert (failed.etag, failed.content_hash) == ('"v1"', "hash")
+
+
+def test_fetch_and_parse_saves_texts(monkeypatch, process):
+    """Test summaries and contents of new posts are compressed."""
+    body = FEED_BODY.replace(
+        b"<title>Second</title>",
+        b"<title>Second</title><description>Summary</description>"
+        b"<content:encoded><![CDATA[<p>Content</p>]]></content:encoded>",
+    ).replace(
+        b'<rss version="2.0">',
+        b'<rss version="2.0" '
+        b'xmlns:content="http://purl.org/rss/1.0/modules/content/">',
+    )
+
+    for stream_parsing in (False, True):
+        monkeypatch.setattr(settings, "RSS_STREAM_PARSING", stream_parsing)
+        feed = process(_job(), _result(body=body))
+
+        second, first = feed.posts
+        assert compression.decompress(second.summary) == "Summary"
+        assert compression.decompress(second.content) == "<p>Content</p>"
+        assert (first.summary, first.content) == (None, None)
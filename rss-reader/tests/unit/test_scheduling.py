@@ -0,0 +1,106 @@
+"""Module with feeds polling schedule tests."""
+
+from datetime import datetime
+from datetime import timedelta
+import random
+
+import pytest
+
+from rss_reader.workers.tasks import scheduling
+
+
+MIN_INTERVAL = timedelta(minutes=1)
+MAX_INTERVAL = timedelta(hours=6)
+
+
+def _fetch_interval(**kwargs) -> timedelta:
+    """Calculate fetch interval with default limits and no jitter."""
+    params = {
+        "posts_last_week": 0,
+        "published_at": [],
+        "unchanged_rate": 0,
+        "min_interval": MIN_INTERVAL,
+        "max_interval": MAX_INTERVAL,
+        "jitter": 0,
+        **kwargs,
+    }
+    return scheduling.fetch_interval(**params)
+
+
+@pytest.mark.parametrize(
+    "posts_last_week,expected",
+    [
+        (0, MAX_INTERVAL),
+        (7, MAX_INTERVAL),
+        (7 * 24, timedelta(minutes=30)),
+        (100_000, MIN_INTERVAL),
+    ]
+)
+def test_fetch_interval_by_posts_last_week(posts_last_week, expected):
+    """Test fetch interval follows the feed publishing cadence."""
+    assert _fetch_interval(posts_last_week=posts_last_week) == expected
+
+
+def test_fetch_interval_by_inter_post_gaps():
+    """Test fetch interval follows observed gaps between posts."""
+    start = datetime(2021, 1, 1)
+    published_at = [start + timedelta(minutes=10 * i) for i in range(5)]
+
+    interval = _fetch_interval(posts_last_week=1, published_at=published_at)
+
+    assert interval == timedelta(minutes=5)
+
+
+def test_fetch_interval_grows_with_unchanged_rate():
+    """Test feeds which mostly return nothing new are polled less often."""
+    changing = _fetch_interval(posts_last_week=7 * 24, unchanged_rate=0)
+    unchanged = _fetch_interval(posts_last_week=7 * 24, unchanged_rate=1)
+
+    assert unchanged == 2 * changing
+
+
+def test_fetch_interval_jitter():
+    """Test fetch interval is randomized within jitter."""
+    rng = random.Random(42)
+    intervals = {
+        _fetch_interval(posts_last_week=7 * 24, jitter=0.2, rng=rng)
+        for _ in range(10)
+    }
+
+    assert len(intervals) > 1
+    assert all(
+        timedelta(minutes=24) <= i <= timedelta(minutes=36)
+        for i in intervals
+    )
+
+
+def test_update_unchanged_rate():
+    """Test unchanged rate converges to recent fetches outcome."""
+    rate = 0.0
+    for _ in range(50):
+        rate = scheduling.update_unchanged_rate(rate, unchanged=True)
+    assert rate == pytest.approx(1, abs=0.01)
+
+    rate = scheduling.update_unchanged_rate(rate, unchanged=False)
+    assert rate < 1
+
+
+def test_backoff_interval():
+    """Test failing feeds are backed off exponentially up to the maximum."""
+    intervals = [
+        scheduling.backoff_interval(
+            failures_count=failures_count,
+            base_interval=timedelta(minutes=10),
+            max_interval=timedelta(hours=1),
+            jitter=0,
+        )
+        for failures_count in range(1, 6)
+    ]
+
+    assert intervals == [
+        timedelta(minutes=10),
+        timedelta(minutes=20),
+        timedelta(minutes=40),
+        timedelta(hours=1),
+        timedelta(hours=1),
+    ]
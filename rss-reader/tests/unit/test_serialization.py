@@ -0,0 +1,140 @@
+"""Module with tasks serializer tests."""
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import celery
+import pytest
+
+from rss_reader.db import compression
+from rss_reader.workers import serialization
+from rss_reader.workers.tasks import utils as task_utils
+
+
+NOW = datetime(2021, 10, 5, 10, 0, 0, 123456)
+
+
+def _post(feed_id: int, url: str) -> task_utils.PostStub:
+    """Get post stub."""
+    return task_utils.PostStub(
+        title="Post",
+        url=url,
+        published_at=NOW - timedelta(hours=1),
+        feed_id=feed_id,
+        uid=task_utils.post_uid(None, url),
+    )
+
+
+def _feed(feed_id: int, *urls: str) -> task_utils.FeedStub:
+    """Get feed stub with posts."""
+    return task_utils.FeedStub(
+        id=feed_id,
+        url=f"http://example.com/{feed_id}/feed",
+        parsed_at=NOW,
+        modified=None,
+        etag='"v1"',
+        posts=tuple(_post(feed_id, url) for url in urls),
+        content_hash="0123456789abcdef0123456789abcdef",
+        wire_size=100,
+        body_size=1000,
+    )
+
+
+def test_feed_stubs_round_trip():
+    """Test batches of feed stubs are restored with their posts."""
+    batches = [
+        [
+            _feed(1, "http://example.com/1/a", "http://example.com/1/b"),
+            _feed(2),
+            _feed(3, "http://example.com/3/a")._replace(
+                error="HttpError: HTTP 404", content_hash=None,
+            ),
+            _feed(5)._replace(deferred_until=NOW + timedelta(minutes=1)),
+            _feed(6, "http://example.com/6/a")._replace(pushed=True),
+        ],
+        [
+            _feed(4, "http://other.com/", "https://other.com/")._replace(
+                hub_url="http://hub.example.com/",
+                hub_topic="http://other.com/feed",
+            ),
+        ],
+    ]
+
+    assert serialization.loads(serialization.dumps(batches)) == batches
+
+
+def test_post_texts_round_trip():
+    """Test compressed texts of posts are restored."""
+    post = _post(1, "http://example.com/1/a")._replace(
+        summary=compression.compress("Summary"),
+        content=compression.compress("<p>Content</p>"),
+    )
+    feeds = [_feed(1, "http://example.com/1/b")._replace(
+        posts=(post, _post(1, "http://example.com/1/b")),
+    )]
+
+    assert serialization.loads(serialization.dumps(feeds)) == feeds
+    assert serialization.loads(serialization.dumps([post])) == [post]
+
+
+def test_posts_without_texts_are_unpacked():
+    """Test posts packed before texts were added are unpacked."""
+    post = _post(1, "http://example.com/1/a")
+    data = serialization._packb([
+        [post.title],
+        [post.url],
+        [serialization._datetime_2_int(post.published_at)],
+        [post.feed_id],
+        [bytes.fromhex(post.uid)],
+    ])
+
+    assert serialization._unpack_post_stubs(data) == [post]
+
+
+def test_feed_jobs_round_trip():
+    """Test feed jobs are restored."""
+    jobs = [
+        task_utils.FeedJob(1, "http://example.com/feed", NOW, None, None),
+        task_utils.FeedJob(2, "http://example.com/feed", None, NOW, '"v1"',
+                           content_hash="00" * 16),
+    ]
+
+    assert serialization.loads(serialization.dumps(jobs)) == jobs
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        _feed(1, "http://example.com/1/a"),
+        _post(1, "http://example.com/1/a"),
+        task_utils.FeedJob(1, "http://example.com/feed", NOW, None, None),
+        NOW,
+        NOW.replace(tzinfo=timezone(timedelta(hours=3))),
+        None,
+    ]
+)
+def test_single_values_round_trip(obj):
+    """Test values which are not in lists are restored."""
+    assert serialization.loads(serialization.dumps(obj)) == obj
+
+
+def test_task_message_round_trip():
+    """Test task message with signatures is restored, tuples as lists."""
+    body = (
+        ([[_feed(1)]],),
+        {"run_id": "run"},
+        {"callbacks": [celery.signature("task", args=(1,))], "chord": None},
+    )
+
+    args, kwargs, embed = serialization.loads(serialization.dumps(body))
+
+    assert args == [[[_feed(1)]]]
+    assert kwargs == {"run_id": "run"}
+    assert embed["callbacks"][0]["args"] == [1]
+
+
+def test_unsupported_type():
+    """Test objects of unsupported types are not serialized."""
+    with pytest.raises(TypeError):
+        serialization.dumps(object())
@@ -0,0 +1,96 @@
+"""Module with streaming feed parser tests."""
+
+from datetime import datetime
+
+import lxml.etree
+import pytest
+
+from rss_reader.workers.tasks import stream_parser
+from rss_reader.workers.tasks import utils as task_utils
+
+
+BASE_URL = "http://example.com/feed"
+
+RSS_BODY = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel>
+    <title>Feed</title>
+    <item>
+      <title> Second </title>
+      <link>/second</link>
+      <guid>second-id</guid>
+      <pubDate>Tue, 05 Oct 2021 10:00:00 GMT</pubDate>
+    </item>
+    <item>
+      <title>First</title>
+      <guid isPermaLink="true">http://example.com/first</guid>
+      <dc:date>2021-10-04T10:00:00Z</dc:date>
+    </item>
+  </channel>
+</rss>
+"""
+
+ATOM_BODY = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Feed</title>
+  <entry>
+    <title>Entry</title>
+    <link rel="edit" href="http://example.com/edit"/>
+    <link href="http://example.com/entry"/>
+    <id>urn:uuid:1</id>
+    <updated>2021-10-05T10:00:00Z</updated>
+  </entry>
+</feed>
+"""
+
+
+def _published_at(entry: dict) -> datetime:
+    """Get entry publish date."""
+    return task_utils.time_struct_2_datetime(entry["published_parsed"])
+
+
+def test_iter_entries_rss():
+    """Test RSS items are parsed."""
+    second, first = stream_parser.iter_entries(
+        RSS_BODY, base_url=BASE_URL, max_bytes=len(RSS_BODY),
+    )
+
+    assert second["title"] == "Second"
+    assert second["link"] == "http://example.com/second"
+    assert second["id"] == "second-id"
+    assert _published_at(second) == datetime(2021, 10, 5, 10)
+    assert first["link"] == "http://example.com/first"
+    assert _published_at(first) == datetime(2021, 10, 4, 10)
+
+
+def test_iter_entries_atom():
+    """Test Atom entries are parsed."""
+    entry, = stream_parser.iter_entries(
+        ATOM_BODY, base_url=BASE_URL, max_bytes=len(ATOM_BODY),
+    )
+
+    assert entry["title"] == "Entry"
+    assert entry["link"] == "http://example.com/entry"
+    assert entry["id"] == "urn:uuid:1"
+    assert _published_at(entry) == datetime(2021, 10, 5, 10)
+
+
+def test_iter_entries_byte_budget(monkeypatch):
+    """Test parsing stops once bytes budget is exhausted."""
+    monkeypatch.setattr(stream_parser, "CHUNK_SIZE", 300)
+    entries = stream_parser.iter_entries(
+        RSS_BODY, base_url=BASE_URL, max_bytes=300,
+    )
+
+    with pytest.raises(stream_parser.ByteBudgetExceeded):
+        list(entries)
+
+
+def test_iter_entries_malformed():
+    """Test malformed feed raises syntax error."""
+    body = b"<rss><channel><item><title>Broken</item></channel></rss>"
+
+    with pytest.raises(lxml.etree.XMLSyntaxError):
+        list(stream_parser.iter_entries(
+            body, base_url=BASE_URL, max_bytes=len(body),
+        ))
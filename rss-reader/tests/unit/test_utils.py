@@ -58,3 +58,18 @@ def test_pipeline_each():
         ])
 
     assert result == [{"Foo": 1}, {"Bar": 2}, {"Buzz": 3}]
+
+
+@pytest.mark.parametrize(
+    "data,size,expected",
+    [
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2, 3, 4], 2, [[1, 2], [3, 4]]),
+        ([1, 2], 5, [[1, 2]]),
+        ([], 3, []),
+    ]
+)
+def test_chunks(data, size, expected):
+    """Test the `chunks` util."""
+    result = list(utils.chunks(data, size))
+    assert result == expected
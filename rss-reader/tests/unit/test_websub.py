@@ -0,0 +1,149 @@
+"""Module with WebSub subscriber tests."""
+
+import asyncio
+
+from aiohttp import web
+import aiohttp
+import pytest
+
+from rss_reader import websub
+
+
+RSS_BODY = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
+  <channel>
+    <title>Feed</title>
+    <atom:link rel="hub" href="https://hub.example.com/"/>
+    <atom:link rel="self" href="/feed.xml"/>
+    <item><title>Post</title></item>
+  </channel>
+</rss>
+"""
+
+ATOM_BODY = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Feed</title>
+  <entry>
+    <link rel="hub" href="https://entry-hub.example.com/"/>
+  </entry>
+</feed>
+"""
+
+
+def test_parse_link_header():
+    """Test relation types are parsed from Link header."""
+    links = websub.parse_link_header(
+        '<https://hub.example.com/>; rel="hub", '
+        "<https://example.com/feed>; rel=self, "
+        '<https://example.com/>; title="Home"'
+    )
+
+    assert links == {
+        "hub": "https://hub.example.com/",
+        "self": "https://example.com/feed",
+    }
+
+
+@pytest.mark.parametrize(
+    "body,headers,expected",
+    [
+        (
+            RSS_BODY,
+            {},
+            ("https://hub.example.com/", "http://example.com/feed.xml"),
+        ),
+        (
+            RSS_BODY,
+            {"link": '<http://push.example.com/>; rel="hub"'},
+            ("http://push.example.com/", "http://example.com/feed"),
+        ),
+        (ATOM_BODY, {}, None),
+        (b"not a feed", {}, None),
+    ]
+)
+def test_discover(body, headers, expected):
+    """Test hub is discovered from Link header or the feed head."""
+    assert websub.discover(body, headers, "http://example.com/feed") == (
+        expected
+    )
+
+
+def test_verify_signature():
+    """Test content signature is verified with subscription secret."""
+    body = b"<rss/>"
+    signature = websub.sign("secret", body, "sha1")
+
+    assert websub.verify_signature("secret", body, signature)
+    assert not websub.verify_signature("other", body, signature)
+    assert not websub.verify_signature("secret", b"<rss></rss>", signature)
+    assert not websub.verify_signature("secret", body, "md5=0")
+    assert not websub.verify_signature("secret", body, None)
+
+
+def _run_with_hub(coro_fn, status=202):
+    """Run `coro_fn(hub_url, requests)` while a stand-in hub is running."""
+    requests = []
+
+    async def hub_handler(request: web.Request) -> web.Response:
+        requests.append(dict(await request.post()))
+        return web.Response(status=status)
+
+    async def run():
+        web_app = web.Application()
+        web_app.router.add_post("/", hub_handler)
+        runner = web.AppRunner(web_app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with aiohttp.ClientSession() as session:
+                return await coro_fn(
+                    session, f"http://127.0.0.1:{port}/", requests,
+                )
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def _subscription(hub_url: str) -> websub.Subscription:
+    """Get subscription request."""
+    return websub.Subscription(
+        hub_url=hub_url,
+        topic="http://example.com/feed",
+        callback="http://reader.example.com/api/websub/1",
+        secret="secret",
+    )
+
+
+def test_request_subscription():
+    """Test subscription request is sent to hub."""
+
+    async def subscribe(session, hub_url, requests):
+        await websub.request_subscription(
+            session, _subscription(hub_url), lease_seconds=3600,
+        )
+        return requests
+
+    requests = _run_with_hub(subscribe)
+
+    assert requests == [{
+        "hub.mode": "subscribe",
+        "hub.topic": "http://example.com/feed",
+        "hub.callback": "http://reader.example.com/api/websub/1",
+        "hub.secret": "secret",
+        "hub.lease_seconds": "3600",
+    }]
+
+
+def test_request_subscription_rejected():
+    """Test subscription request rejected by hub raises error."""
+
+    async def subscribe(session, hub_url, requests):
+        await websub.request_subscription(
+            session, _subscription(hub_url), lease_seconds=3600,
+        )
+
+    with pytest.raises(websub.SubscriptionError):
+        _run_with_hub(subscribe, status=400)
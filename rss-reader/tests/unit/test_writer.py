@@ -0,0 +1,42 @@
+"""Module with batching writer tests."""
+
+import asyncio
+
+from rss_reader.workers.tasks import writer
+
+
+def test_batching_writer_flushes_full_batches():
+    """Test micro-batch is flushed once it is full."""
+    flushed = []
+
+    async def run():
+        feeds_writer = writer.BatchingWriter(
+            flushed.append, batch_size=2, max_delay=60,
+        )
+        for feed in ["a", "b", "c"]:
+            feeds_writer.add(feed)
+        assert flushed == [["a", "b"]]
+        feeds_writer.flush()
+
+    asyncio.run(run())
+
+    assert flushed == [["a", "b"], ["c"]]
+
+
+def test_batching_writer_flushes_after_delay():
+    """Test micro-batch is flushed once its first feed waits too long."""
+    flushed = []
+
+    async def run():
+        feeds_writer = writer.BatchingWriter(
+            flushed.append, batch_size=10, max_delay=0.01,
+        )
+        feeds_writer.add("a")
+        await asyncio.sleep(0.05)
+        assert flushed == [["a"]]
+        feeds_writer.add("b")
+        feeds_writer.flush()
+
+    asyncio.run(run())
+
+    assert flushed == [["a"], ["b"]]